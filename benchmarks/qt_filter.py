@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#
+# Times typing a filter string into the Qt main view, one key at a
+# time, against a synthetic show list.
+#
+# Usage: python benchmarks/qt_filter.py [-n rows] [-f filter] [-r repeat]
+#
+# The same list is also filtered by formatting every cell through
+# data(), like ShowListProxy did before the search keys were cached,
+# for comparison. Needs PyQt5; runs with the offscreen platform.
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtCore  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from trackma import utils  # noqa: E402
+from trackma.ui.qt.models import ShowListModel, ShowListProxy  # noqa: E402
+
+WORDS = ['shingeki', 'kyojin', 'no', 'hero', 'academia', 'kimetsu', 'yaiba',
+         'steins', 'gate', 'monogatari', 'bakemonogatari', 'kaguya', 'sama',
+         'love', 'is', 'war', 'mushishi', 'cowboy', 'bebop', 'trigun']
+
+PALETTE = {'is_playing': '#0000ff', 'is_queued': '#00ff00', 'new_episode': '#ff0000',
+           'is_airing': '#ffff00', 'not_aired': '#cccccc'}
+
+
+def make_showlist(rows):
+    start = datetime.date(2000, 1, 1)
+    showlist = []
+    for i in range(rows):
+        show = utils.show()
+        show.update({
+            'id': i + 1,
+            'title': ' '.join(WORDS[(i * k) % len(WORDS)] for k in (1, 3, 7)) + ' %d' % i,
+            'my_progress': i % 24,
+            'my_score': (i % 10) + 0.5,
+            'my_status': ['watching', 'completed', 'plan_to_watch'][i % 3],
+            'total': 24,
+            'status': utils.STATUS_FINISHED,
+            'start_date': start + datetime.timedelta(days=i),
+            'end_date': start + datetime.timedelta(days=i + 90),
+        })
+        showlist.append(show)
+    return showlist
+
+
+class DataProxy(ShowListProxy):
+    """Matches by formatting every cell, without the cached keys."""
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.filter_status is not None and self.sourceModel().showlist[source_row]['my_status'] != self.filter_status:
+            return False
+        return QtCore.QSortFilterProxyModel.filterAcceptsRow(self, source_row, source_parent)
+
+
+def type_filter(proxy, expression):
+    start = time.perf_counter()
+    for i in range(1, len(expression) + 1):
+        proxy.setFilterFixedString(expression[:i])
+    elapsed = time.perf_counter() - start
+    proxy.setFilterFixedString('')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--rows', type=int, default=10000)
+    parser.add_argument('-f', '--filter', default='monogatari 1')
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)  # noqa: F841
+
+    mediainfo = {'statuses_dict': {'watching': 'Watching', 'completed': 'Completed',
+                                   'plan_to_watch': 'Plan to Watch'},
+                 'score_step': 0.5, 'score_max': 10}
+    model = ShowListModel(palette=PALETTE)
+    model.setMediaInfo(mediainfo)
+    model.setShowList(make_showlist(args.rows), {}, {})
+
+    for (name, proxy_class) in (('cached keys', ShowListProxy), ('data()', DataProxy)):
+        proxy = proxy_class()
+        proxy.setFilterKeyColumn(-1)
+        proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        proxy.setSourceModel(model)
+
+        best = min(type_filter(proxy, args.filter) for _ in range(args.repeat))
+        proxy.setFilterFixedString(args.filter)
+        print("{:<12} {:8.1f} ms for {} keystrokes over {} rows ({} matches)".format(
+            name, best * 1000, len(args.filter), args.rows, proxy.rowCount()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+#
+# Compares parsing anime-relations.txt against loading the parsed cache.
+#
+# Usage: python benchmarks/redirections.py [anime-relations.txt] [rules]
+#
+# If no file is given, the bundled one is used, or a synthetic file
+# with the given number of rules (default 5000) is generated.
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from trackma import utils
+from trackma.extras import redirections
+
+
+def make_relations(filename, rules):
+    with open(filename, 'w') as f:
+        f.write("::meta\n- version: 1.3.0\n- last_modified: 2020-01-01\n\n::rules\n")
+        for i in range(1, rules + 1):
+            f.write("- {0}|{1}|{2}:{3}-{4} -> {5}|{6}|{7}:1-{8}!\n".format(
+                i, i + 100000, i + 200000, 13, 24,
+                i + 1, i + 100001, i + 200001, 12))
+
+
+def timeit(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        run(tmpdir)
+
+
+def run(tmpdir):
+    rules = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    if len(sys.argv) > 1:
+        fname = sys.argv[1]
+    else:
+        fname = utils.DATADIR + '/anime-relations/anime-relations.txt'
+        if not utils.file_exists(fname):
+            fname = os.path.join(tmpdir, 'anime-relations.txt')
+            make_relations(fname, rules)
+
+    cache_file = os.path.join(tmpdir, 'anime-relations.mal.cache')
+
+    parse = timeit(lambda: redirections.parse_anime_relations(fname, 'mal'))
+    redirections.load_anime_relations(fname, 'mal', cache_file)
+    cached = timeit(lambda: redirections.load_anime_relations(fname, 'mal', cache_file))
+
+    print("File:        {}".format(fname))
+    print("Parse:       {:8.2f} ms".format(parse * 1000))
+    print("Cache load:  {:8.2f} ms".format(cached * 1000))
+    print("Speedup:     {:8.1f}x".format(parse / cached))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+#
+# Measures the import time of the Trackma interfaces with -X importtime,
+# and optionally how long a full and a minimal Engine.start() take.
+#
+# Usage: python benchmarks/startup.py [-m module] [-n top] [-r repeat] [-a account]
+#
+# The engine start is only measured with -a, since it needs a
+# configured account (with a cached list, to avoid timing the network).
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def run(args):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable] + args, env=env, check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+def importtime(module):
+    """Returns a list of (module, self us, cumulative us) in import order."""
+    output = run(['-X', 'importtime', '-c', 'import ' + module]).stderr
+
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        (self_us, cumulative_us, name) = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def wall_time(module, repeat):
+    """Best wall time of importing **module** in a fresh interpreter, in ms."""
+    import time
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(['-c', 'import ' + module])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def engine_start(account, minimal):
+    code = (
+        "import time\n"
+        "from trackma.accounts import AccountManager\n"
+        "from trackma.engine import Engine\n"
+        "t = time.perf_counter()\n"
+        "e = Engine(AccountManager().get_account({}))\n"
+        "e.start(minimal={})\n"
+        "print(time.perf_counter() - t)\n"
+    ).format(account, minimal)
+    return float(run(['-c', code]).stdout.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-m', '--module', default='trackma.ui.cli')
+    parser.add_argument('-n', '--top', type=int, default=15)
+    parser.add_argument('-r', '--repeat', type=int, default=10)
+    parser.add_argument('-a', '--account', type=int)
+    args = parser.parse_args()
+
+    modules = importtime(args.module)
+    total = next(cumulative for (name, self_us, cumulative) in modules
+                 if name == args.module)
+    baseline = wall_time('sys', args.repeat)
+
+    print("Import of {}: {:.1f} ms ({} modules)".format(args.module, total / 1000, len(modules)))
+    print("Wall time over a bare interpreter (best of {}): {:.1f} ms".format(
+        args.repeat, wall_time(args.module, args.repeat) - baseline))
+    print()
+    print("Slowest modules (self time):")
+    for (name, self_us, cumulative) in sorted(modules, key=lambda m: m[1], reverse=True)[:args.top]:
+        print("  {:<45} {:8.1f} ms {:8.1f} ms".format(name, self_us / 1000, cumulative / 1000))
+
+    if args.account:
+        print()
+        print("Engine.start():               {:8.1f} ms".format(
+            engine_start(args.account, False) * 1000))
+        print("Engine.start(minimal=True):   {:8.1f} ms".format(
+            engine_start(args.account, True) * 1000))
+
+
+if __name__ == '__main__':
+    main()
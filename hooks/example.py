@@ -10,13 +10,20 @@
 # You can customize it freely to make Trackma do what you want after
 # changes in your list have been made.
 #
-# These functions are called upon immediately by Trackma after the
-# signal of the same name has been triggered. A reference to the Engine
-# and the relevant arguments are also passed to the function.
+# These functions are called by Trackma after the signal of the same
+# name has been triggered. A reference to the Engine and the relevant
+# arguments are also passed to the function.
+#
+# Hooks run in the background, in order, so a slow hook doesn't block
+# the tracker or the interface. If you need a hook to run immediately,
+# before Trackma continues, set synchronous to True (or to a list of
+# signal names).
 #
 # You can have several hook files in the "hooks" directory.
 # ===================================
 
+synchronous = False
+
 # These functions are called when changes are made locally.
 def playing(engine, show, is_playing, episode):
     """This is called when a player is detected to be playing a show.
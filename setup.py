@@ -36,6 +36,7 @@ setup(
     entry_points={
         'console_scripts': [
             'trackma = trackma.ui.cli:main',
+            'trackma-daemon = trackma.daemon:main',
             'trackma-curses = trackma.ui.curses:main [curses]',
         ],
         'gui_scripts': [
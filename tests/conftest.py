@@ -0,0 +1,72 @@
+import sys
+import types
+
+import pytest
+
+from trackma import utils
+from trackma.lib import lib as libbase
+
+ACCOUNT = {'username': 'tester', 'api': 'fake', 'password': 'x', 'extra': {}}
+
+_MEDIAINFO = {
+    'has_progress': True, 'can_add': True, 'can_delete': True, 'can_score': True,
+    'can_status': True, 'can_update': True, 'can_play': True, 'can_date': False,
+    'status_start': 1, 'status_finish': 2,
+    'statuses_start': [1], 'statuses_finish': [2], 'statuses': [1, 2, 3],
+    'statuses_dict': {1: 'Current', 2: 'Completed', 3: 'On Hold'},
+    'score_max': 10, 'score_step': 1,
+}
+
+
+class libfake(libbase.lib):
+    """An API that keeps its list in memory."""
+    name = 'libfake'
+    api_info = {'name': 'Fake', 'shortname': 'fake', 'version': 1, 'merge': False}
+    default_mediatype = 'anime'
+    mediatypes = {'anime': dict(_MEDIAINFO), 'manga': dict(_MEDIAINFO)}
+
+    def __init__(self, messenger, account, userconfig):
+        super().__init__(messenger, account, userconfig)
+        self.updates = []
+
+    def fetch_list(self):
+        showlist = {}
+        for showid in (1, 2, 3):
+            show = utils.show()
+            show.update(id=showid, title='%s %d' % (self.mediatype.title(), showid),
+                        total=12, my_progress=showid, my_status=1)
+            showlist[showid] = show
+        return showlist
+
+    def add_show(self, item):
+        self.updates.append(('add', item))
+        return item['id']
+
+    def update_show(self, item):
+        self.updates.append(('update', item))
+
+    def delete_show(self, item):
+        self.updates.append(('delete', item))
+
+    def search(self, criteria, method):
+        return []
+
+
+@pytest.fixture
+def trackma_home(tmp_path, monkeypatch):
+    """Points the config, data and cache directories to a temporary one
+    and registers the fake API."""
+    monkeypatch.setattr(utils, 'HOME', str(tmp_path))
+    for var in ('XDG_CONFIG_HOME', 'XDG_DATA_HOME', 'XDG_CACHE_HOME'):
+        monkeypatch.delenv(var, raising=False)
+
+    module = types.ModuleType('trackma.lib.libfake')
+    module.libfake = libfake
+    monkeypatch.setitem(sys.modules, 'trackma.lib.libfake', module)
+
+    utils.make_dir(utils.to_config_path())
+    config = dict(utils.config_defaults)
+    config.update(tracker_enabled=False, library_autoscan=False, autosend='manual',
+                  autoretrieve='never', redirections_time=0)
+    utils.save_config(config, utils.to_config_path('config.json'))
+    return tmp_path
@@ -0,0 +1,103 @@
+import contextlib
+import datetime
+import io
+import json
+
+from trackma import importer
+from trackma import utils
+from trackma.ui import cli
+
+
+def make_showlist():
+    showlist = []
+    for (showid, title) in ((1, 'First'), (2, 'Tab\tin title')):
+        show = utils.show()
+        show.update({'id': showid, 'title': title, 'my_progress': showid, 'total': 12})
+        showlist.append(show)
+    showlist[0]['my_start_date'] = datetime.date(2020, 4, 1)
+    return showlist
+
+
+def test_write_json():
+    out = io.StringIO()
+    cli.write_json(cli.export_rows(make_showlist(), {2: 'Second'}), out)
+
+    rows = json.loads(out.getvalue())
+    assert [row['id'] for row in rows] == [1, 2]
+    assert rows[0]['my_start_date'] == '2020-04-01'
+    assert rows[1]['altname'] == 'Second'
+    assert set(rows[0]) == set(cli.EXPORT_FIELDS)
+
+    out = io.StringIO()
+    cli.write_json(iter(()), out)
+    assert json.loads(out.getvalue()) == []
+
+
+def test_write_tsv():
+    out = io.StringIO()
+    cli.write_tsv(cli.export_rows(make_showlist(), {}), out)
+
+    lines = out.getvalue().splitlines()
+    assert lines[0].split('\t') == list(cli.EXPORT_FIELDS)
+    assert len(lines) == 3
+    fields = dict(zip(cli.EXPORT_FIELDS, lines[2].split('\t')))
+    assert fields['title'] == 'Tab in title'
+    assert fields['altname'] == ''
+    assert fields['my_progress'] == '2'
+
+
+class FakeAccounts:
+    def select_account(self, bypass):
+        return {'username': 'tester', 'api': 'fake'}
+
+
+class FakeEngine:
+    def __init__(self):
+        self.batches = 0
+        self.unloaded = False
+
+    @contextlib.contextmanager
+    def batch(self):
+        self.batches += 1
+        yield self
+
+    def unload(self):
+        self.unloaded = True
+
+
+def test_run_batch(monkeypatch):
+    monkeypatch.setattr(cli, 'Trackma_accounts', FakeAccounts)
+    main_cmd = cli.Trackma_cmd(interactive=False)
+    main_cmd.engine = FakeEngine()
+    ran = []
+    main_cmd.onecmd = ran.append
+
+    lines = ['# Comment', 'update 1 5', '', '   ', '  score 1 8  ', 'quit', 'update 2 3']
+    main_cmd.run_batch(lines)
+
+    assert ran == ['update 1 5', 'score 1 8']
+    assert main_cmd.engine.batches == 1
+    assert main_cmd.engine.unloaded
+
+
+def test_import_ids(monkeypatch):
+    used = []
+
+    class Importer:
+        def __init__(self, engine, use_ids=False):
+            used.append(use_ids)
+
+        def import_file(self, filename, fmt, dry_run=False):
+            return importer.ImportPlan()
+
+    monkeypatch.setattr(importer, 'Importer', Importer)
+    monkeypatch.setattr(cli, 'Trackma_accounts', FakeAccounts)
+    main_cmd = cli.Trackma_cmd(interactive=False)
+    main_cmd.engine = FakeEngine()
+
+    # IDs are only trusted for MyAnimeList exports on MyAnimeList, or when asked
+    for (api, args) in (('anilist', 'list.csv'), ('anilist', 'list.xml'), ('mal', 'list.json'),
+                        ('mal', 'list.xml'), ('anilist', 'list.csv --ids')):
+        main_cmd.engine.api_info = {'shortname': api}
+        main_cmd.onecmd('import ' + args)
+    assert used == [False, False, False, True, True]
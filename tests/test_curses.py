@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip('urwid')
+
+from trackma import utils
+from trackma.ui.curses import ShowItem, ShowWalker
+
+
+def make_item(showid, title, progress=0):
+    show = utils.show()
+    show.update({'id': showid, 'title': title, 'my_progress': progress})
+    return ShowItem(show)
+
+
+def titles(walker):
+    return [item.showtitle for item in walker]
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_walker_sorted_insertion(reverse):
+    walker = ShowWalker([make_item(1, 'b'), make_item(2, 'd')], reverse=reverse)
+    (position, focused) = walker._get_showitem(2)
+    walker.set_focus(position)
+
+    for item in (make_item(3, 'a'), make_item(4, 'c'), make_item(5, 'e')):
+        walker.insert_show(item)
+
+    expected = ['a', 'b', 'c', 'd', 'e']
+    assert titles(walker) == (expected[::-1] if reverse else expected)
+    assert walker[walker.focus] is focused
+
+    assert walker.remove_show(1).showtitle == 'b'
+    assert walker.remove_show(1) is None
+    assert walker[walker.focus] is focused
+    assert walker._get_showitem(4) == (titles(walker).index('c'), walker[titles(walker).index('c')])
+
+
+def test_walker_update_moves_item():
+    walker = ShowWalker([make_item(i, 't%d' % i, progress=i) for i in range(1, 5)],
+                        sort_key='my_progress')
+    walker.set_focus(0)
+
+    show = dict(walker[0].show, my_progress=10)
+    assert walker.update_show(show)
+    assert [item.showid for item in walker] == [2, 3, 4, 1]
+    assert walker[walker.focus].showid == 1
+
+    walker.set_order('my_progress', True)
+    assert [item.showid for item in walker] == [1, 4, 3, 2]
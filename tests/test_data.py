@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from trackma import data
+from trackma import messenger
+from trackma import utils
+
+from conftest import ACCOUNT
+
+
+@pytest.fixture
+def handler(trackma_home, monkeypatch):
+    saved = []
+    save_data = utils.save_data
+
+    def record(obj, filename):
+        saved.append(os.path.basename(filename))
+        save_data(obj, filename)
+
+    monkeypatch.setattr(utils, 'save_data', record)
+
+    # Engine creates these before loading the data handler
+    utils.make_dir(utils.to_data_path('tester.fake'))
+    config = utils.parse_config(utils.to_config_path('config.json'), utils.config_defaults)
+    handler = data.Data(messenger.Messenger(None), config, ACCOUNT, None)
+    handler.start()
+    handler.saved = saved
+    saved.clear()
+    yield handler
+    if os.path.exists(handler.lock_file):
+        handler.unload(force=True)
+
+
+def test_deferred_saves(handler):
+    show = handler.get()[1]
+    with handler.deferred():
+        with handler.deferred():
+            handler.queue_update(show, 'my_progress', 5)
+        handler.queue_update(show, 'my_score', 8)
+        assert handler.saved == []
+
+    # Written once each when the outermost one closes
+    assert sorted(handler.saved) == ['anime.list', 'anime.queue']
+    assert utils.load_data(handler.queue_file)[0]['my_score'] == 8
+
+
+def test_unload_while_deferred(handler):
+    show = handler.get()[1]
+    with handler.deferred():
+        handler.queue_update(show, 'my_progress', 5)
+        handler.unload()
+
+        # Written before the lock was removed
+        assert 'anime.queue' in handler.saved
+        assert not os.path.exists(handler.lock_file)
+        handler.saved.clear()
+
+    # Nothing is left for the end of the block
+    assert handler.saved == []
+
+    # And autosend_at_exit sent the queue
+    assert [(action, item['my_progress']) for (action, item) in handler.api.updates] == [('update', 5)]
+    assert utils.load_data(handler.queue_file) == []
+
+
+def test_queue_updates(handler):
+    (first, second) = (handler.get()[1], handler.get()[2])
+    handler.queue_update(first, 'my_progress', 4)
+    handler.saved.clear()
+
+    # Keys are checked before anything changes
+    with pytest.raises(utils.DataError):
+        handler.queue_updates([(second, {'my_progress': 7}), (first, {'unknown': 1})])
+    assert second['my_progress'] == 2 and len(handler.queue) == 1
+
+    emitted = []
+    handler.subscribe_signal('queue_changed', emitted.append)
+    handler.queue_updates([(first, {'my_score': 6}), (second, {'my_progress': 7})])
+
+    assert [(item['id'], item.get('my_progress'), item.get('my_score')) for item in handler.queue] == [
+        (1, 4, 6), (2, 7, None)]
+    assert second['my_progress'] == 7 and second['queued']
+    assert len(emitted) == 1
+    assert sorted(handler.saved) == ['anime.list', 'anime.queue']
+
+
+def test_indexes(handler):
+    def ids(status):
+        return [show['id'] for show in handler.get_by_status(status)]
+
+    (first, second, third) = (handler.get()[1], handler.get()[2], handler.get()[3])
+    assert ids(1) == [1, 2, 3] and handler.get_by_title('Anime 2') is second
+
+    # Buckets keep the list order, whatever the order of the changes
+    handler.set_show_attr(second, 'my_status', 2)
+    handler.set_show_attr(first, 'my_status', 2)
+    assert ids(1) == [3] and ids(2) == [1, 2]
+    handler.set_show_attr(second, 'my_status', 1)
+    assert ids(1) == [2, 3] and ids(2) == [1]
+
+    version = handler.index_version
+    handler.set_show_attr(third, 'title', 'Anime 2')
+    assert handler.get_by_title('Anime 3') is None
+    assert handler.get_by_title('Anime 2') is second
+    assert handler.index_version > version
+
+    # Added shows go last, and deleted ones leave every index
+    new = utils.show()
+    new.update(id=4, title='Anime 4', my_status=2)
+    handler.queue_add(new)
+    assert ids(2) == [1, 4] and handler.get_by_title('Anime 4') is new
+    handler.queue_delete(first)
+    assert ids(2) == [4] and handler.get_by_title('Anime 1') is None
+    handler.queue_add(first)
+    handler.set_show_attr(new, 'my_status', 1)
+    assert ids(1) == [2, 3, 4] and ids(2) == [1]
+
+    # A sync rebuilds them from the remote list
+    handler.download_data()
+    assert ids(1) == [1, 2, 3] and ids(2) == []
+    assert handler.get_by_title('Anime 3') is handler.get()[3]
+    assert handler.get_by_title('Anime 4') is None
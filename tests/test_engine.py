@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from trackma import utils
+from trackma.engine import Engine
+
+from conftest import ACCOUNT
+
+
+@pytest.fixture
+def engine(trackma_home):
+    engine = Engine(ACCOUNT)
+    engine.start()
+    yield engine
+    if engine.loaded:
+        engine.unload(force=True)
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    saved = []
+    save_data = utils.save_data
+
+    def record(obj, filename):
+        saved.append(os.path.basename(filename))
+        save_data(obj, filename)
+
+    monkeypatch.setattr(utils, 'save_data', record)
+    return saved
+
+
+def test_reload_inside_batch(engine, saved):
+    with engine.batch():
+        engine.set_episode(1, 5)
+        assert 'anime.queue' not in saved
+
+        # The old data handler writes its queue before unlocking
+        engine.reload(mediatype='manga')
+        assert 'anime.queue' in saved
+        assert not os.path.exists(utils.to_data_path('tester.fake', 'anime.lock'))
+
+        # The new one is held back until the batch closes
+        engine.set_episode(1, 6)
+        assert 'manga.queue' not in saved
+
+    assert 'manga.queue' in saved
+    assert utils.load_data(engine.data_handler.queue_file)[0]['my_progress'] == 6
+
+
+def test_apply_changes_all_or_nothing(engine, saved):
+    changes = [{'id': 1, 'my_progress': 5}, {'id': 2, 'my_status': None}]
+    with pytest.raises(utils.EngineError):
+        engine.apply_changes(changes)
+
+    assert engine.get_show_info(1)['my_progress'] == 1
+    assert engine.data_handler.queue == []
+    assert saved == []
+
+    # Or leave out the invalid ones
+    changes += [{'id': 3, 'my_progress': 13}, {'id': 99, 'my_score': 5}]
+    shows = engine.apply_changes(changes, skip_invalid=True)
+    assert [show['id'] for show in shows] == [1]
+    assert [item['id'] for item in engine.data_handler.queue] == [1]
+
+
+def test_apply_changes(engine, saved):
+    engine.set_episode(2, 4)
+    saved.clear()
+
+    signals = []
+    engine.subscribe_signal('queue_changed', lambda queue: signals.append(('queue_changed', len(queue))))
+    engine.subscribe_signal('changes_applied', lambda shows: signals.append(
+        ('changes_applied', [show['id'] for show in shows])))
+
+    shows = engine.apply_changes([
+        {'id': 1, 'my_progress': 1, 'my_score': 7},
+        {'id': 2, 'my_progress': 6},
+        {'id': 3, 'my_progress': 3, 'my_status': 1},
+    ])
+
+    # Show 3 already had those values, and so did the progress of show 1
+    assert [show['id'] for show in shows] == [1, 2]
+    queue = {item['id']: item for item in engine.data_handler.queue}
+    assert sorted(queue) == [1, 2]
+    assert queue[1]['my_score'] == 7 and 'my_progress' not in queue[1]
+
+    # Merged into the item set_episode queued
+    assert queue[2]['my_progress'] == 6
+
+    assert signals == [('queue_changed', 2), ('changes_applied', [1, 2])]
+    assert sorted(saved) == ['anime.list', 'anime.queue']
@@ -0,0 +1,78 @@
+import threading
+import time
+import types
+
+from trackma import hooks
+from trackma import messenger
+from trackma import utils
+
+
+def _executor(**config):
+    cfg = dict(utils.config_defaults)
+    cfg.update(config)
+    warnings = []
+    msg = messenger.Messenger(
+        lambda classname, msgtype, text: msgtype == messenger.TYPE_WARN and warnings.append(text))
+    return hooks.HookExecutor('engine', msg, cfg), warnings
+
+
+def _hook(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def test_hooks_run_in_order_off_thread():
+    executor, warnings = _executor()
+    calls = []
+    done = threading.Event()
+
+    def episode_changed(engine, show):
+        calls.append((engine, show, threading.current_thread().name))
+        if show == 4:
+            done.set()
+
+    executor.add(_hook('ordered', episode_changed=episode_changed))
+    for i in range(5):
+        executor.emit('episode_changed', i)
+    executor.emit('show_added', 0)
+
+    assert done.wait(5)
+    assert [show for (engine, show, thread) in calls] == list(range(5))
+    assert all(engine == 'engine' for (engine, show, thread) in calls)
+    assert all(thread != threading.current_thread().name for (e, s, thread) in calls)
+    executor.shutdown()
+    assert not warnings
+
+
+def test_synchronous_hooks_run_inline():
+    executor, warnings = _executor()
+    calls = []
+    executor.add(_hook('inline', synchronous=['playing'],
+                       playing=lambda engine, show: calls.append(threading.current_thread())))
+    executor.emit('playing', {})
+    assert calls == [threading.current_thread()]
+    executor.shutdown()
+
+
+def test_full_queue_drops_and_reports():
+    executor, warnings = _executor(hooks_queue_size=1, hooks_slow_threshold=0.05)
+    release = threading.Event()
+    started = threading.Event()
+
+    def show_added(engine, show):
+        started.set()
+        release.wait(5)
+
+    executor.add(_hook('slow', show_added=show_added))
+    executor.emit('show_added', 1)
+    assert started.wait(5)
+    executor.emit('show_added', 2)  # queued
+    executor.emit('show_added', 3)  # dropped
+    time.sleep(0.1)
+    release.set()
+    executor.shutdown()
+
+    assert executor.dropped['slow'] == 1
+    assert executor.slow_report()[0][:3] == ('slow', 'show_added', 1)
+    assert any('dropped' in warning for warning in warnings)
@@ -0,0 +1,147 @@
+import http.server
+import os
+import threading
+
+import pytest
+
+from trackma import imagecache
+from trackma import utils
+
+CONTENT = b'x' * 1000
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    connections = set()
+    release = None
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        self.connections.add(self.client_address)
+        if self.release:
+            self.release.wait(5)
+
+        if self.path == '/missing':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(CONTENT)))
+        self.end_headers()
+        self.wfile.write(CONTENT)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+    Handler.connections = set()
+    Handler.release = None
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:%d' % httpd.server_port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_coalesces_and_reuses_connection(tmp_path, server):
+    cache = imagecache.ImageCache(str(tmp_path), max_workers=1)
+
+    Handler.release = threading.Event()
+    first = cache.fetch(server + '/a.jpg')
+    second = cache.fetch(server + '/a.jpg')
+    Handler.release.set()
+
+    filename = first.result(5)
+    assert second.result(5) == filename
+    with open(filename, 'rb') as f:
+        assert f.read() == CONTENT
+    assert Handler.requests == ['/a.jpg']
+
+    # Cached now, and another image comes through the same connection
+    assert cache.cached(server + '/a.jpg') == filename
+    cache.fetch(server + '/b.jpg').result(5)
+    assert Handler.requests == ['/a.jpg', '/b.jpg']
+    assert len(Handler.connections) == 1
+
+
+def test_cancel_only_affects_its_caller(tmp_path, server):
+    cache = imagecache.ImageCache(str(tmp_path), max_workers=1)
+
+    Handler.release = threading.Event()
+    blocker = cache.fetch(server + '/blocker.jpg')
+    first = cache.fetch(server + '/a.jpg')
+    second = cache.fetch(server + '/a.jpg')
+    unwanted = cache.fetch(server + '/unwanted.jpg')
+
+    assert first.cancel()
+    assert unwanted.cancel()
+    Handler.release.set()
+
+    blocker.result(5)
+    assert os.path.isfile(second.result(5))
+    assert '/unwanted.jpg' not in Handler.requests
+
+
+def test_lru_byte_budget(tmp_path, server):
+    cache = imagecache.ImageCache(str(tmp_path), max_bytes=2500)
+
+    for name in ('a', 'b'):
+        cache.fetch('%s/%s.jpg' % (server, name)).result(5)
+    # Using a makes b the least recently used one
+    assert cache.cached(server + '/a.jpg')
+    cache.fetch(server + '/c.jpg').result(5)
+
+    assert cache.size() == 2000
+    assert cache.cached(server + '/a.jpg')
+    assert cache.cached(server + '/b.jpg') is None
+    assert cache.cached(server + '/c.jpg')
+
+
+def test_fetch_error(tmp_path, server):
+    cache = imagecache.ImageCache(str(tmp_path))
+
+    with pytest.raises(utils.TrackmaError):
+        cache.fetch(server + '/missing').result(5)
+    assert cache.cached(server + '/missing') is None
+
+
+def test_prefetcher_cancels_rows_out_of_view(tmp_path, server):
+    cache = imagecache.ImageCache(str(tmp_path), max_workers=1)
+    prefetcher = imagecache.Prefetcher(cache=cache)
+
+    Handler.release = threading.Event()
+    blocker = cache.fetch(server + '/blocker.jpg')
+    prefetcher.update([server + '/a.jpg', server + '/b.jpg'])
+    assert prefetcher.pending(server + '/a.jpg')
+
+    # Scrolled away from a; b is still wanted and now asked for directly
+    prefetcher.update([server + '/b.jpg', server + '/c.jpg'])
+    assert not prefetcher.pending(server + '/a.jpg')
+    wanted = cache.fetch(server + '/b.jpg')
+    Handler.release.set()
+
+    blocker.result(5)
+    wanted.result(5)
+    prefetcher.futures[server + '/c.jpg'].result(5)
+    assert Handler.requests == ['/blocker.jpg', '/b.jpg', '/c.jpg']
+
+
+def test_old_images_removed(trackma_home, monkeypatch):
+    monkeypatch.setattr(imagecache, '_cache', None)
+    directory = utils.to_cache_path()
+    utils.make_dir(directory)
+    names = ('anilist_anime_12.jpg', 'mal_manga_f_3.jpg', 'anime-relations.mal.cache', 'cover.jpg')
+    for name in names:
+        open(os.path.join(directory, name), 'wb').close()
+
+    cache = imagecache.get_cache()
+    assert cache.path == utils.to_cache_path('images')
+    assert sorted(os.listdir(directory)) == ['anime-relations.mal.cache', 'cover.jpg']
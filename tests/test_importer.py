@@ -0,0 +1,171 @@
+import contextlib
+import datetime
+import io
+
+from trackma import importer
+from trackma import messenger
+from trackma import utils
+from trackma.engine import Engine
+
+MAL_XML = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<myanimelist>
+  <myinfo><user_name>someone</user_name></myinfo>
+  <anime>
+    <series_animedb_id>1</series_animedb_id>
+    <series_title><![CDATA[Cowboy Bebop]]></series_title>
+    <my_watched_episodes>26</my_watched_episodes>
+    <my_start_date>0000-00-00</my_start_date>
+    <my_score>9</my_score>
+    <my_status>Completed</my_status>
+  </anime>
+  <anime>
+    <series_animedb_id>5</series_animedb_id>
+    <series_title><![CDATA[Trigun]]></series_title>
+    <my_watched_episodes>3</my_watched_episodes>
+    <my_score>0</my_score>
+    <my_status>On-Hold</my_status>
+  </anime>
+</myanimelist>
+"""
+
+
+class FakeEngine:
+    api_info = {'shortname': 'fake', 'mediatype': 'anime'}
+    mediainfo = {
+        'can_update': True, 'can_score': True, 'can_status': True, 'can_date': True,
+        'statuses': [1, 2, 3], 'statuses_dict': {1: 'Watching', 2: 'Completed', 3: 'On Hold'},
+        'score_step': 1, 'score_max': 10,
+    }
+
+    # The same checks as the engine
+    check_change = Engine.check_change
+    _check_episode = Engine._check_episode
+    _check_score = Engine._check_score
+    _check_status = Engine._check_status
+
+    def __init__(self, shows, remote):
+        self.msg = messenger.Messenger(None)
+        self.shows = {show['id']: show for show in shows}
+        self.remote = remote
+        self.searches = []
+        self.calls = []
+        self.batches = 0
+
+    def get_show_info(self, showid):
+        try:
+            return self.shows[showid]
+        except KeyError:
+            raise utils.EngineError("Show not found.")
+
+    def get_list(self):
+        return self.shows.values()
+
+    def altnames(self):
+        return {}
+
+    @contextlib.contextmanager
+    def batch(self):
+        self.batches += 1
+        self.calls.append('batch')
+        yield self
+        self.calls.append('end')
+
+    def apply_changes(self, changes, skip_invalid=False):
+        self.calls.append(('apply_changes', skip_invalid))
+        # Like the engine, leave out the changes to unknown shows
+        return [self.shows[change['id']] for change in changes if change['id'] in self.shows]
+
+    def add_show(self, show, status):
+        self.calls.append(('add_show', show['id'], status))
+        if show['title'] == 'Unavailable':
+            raise utils.EngineError("Show already in list.")
+
+    def search(self, title):
+        self.searches.append(title)
+        results = [show for show in self.remote if show['title'] == title]
+        if not results:
+            raise utils.DataError('No results.')
+        return results
+
+
+def make_show(showid, title, **values):
+    show = utils.show()
+    show.update(id=showid, title=title, total=26, **values)
+    return show
+
+
+def test_readers(monkeypatch):
+    entries = list(importer.read_mal_xml(io.BytesIO(MAL_XML)))
+    assert [entry['title'] for entry in entries] == ['Cowboy Bebop', 'Trigun']
+    assert entries[0]['my_progress'] == '26'
+    assert entries[1]['my_status'] == 'On-Hold'
+
+    rows = list(importer.read_csv(io.StringIO('id\ttitle\tmy_progress\n1\tA, B\t3\n')))
+    assert rows == [{'id': '1', 'title': 'A, B', 'my_progress': '3'}]
+
+    # Objects split between reads, in an array or one per line
+    monkeypatch.setattr(importer, '_READ_SIZE', 7)
+    text = '[\n{"id": 1, "title": "A [1]"},\n{"id": 2, "title": "B"}\n]\n'
+    assert [obj['id'] for obj in importer.read_json(io.StringIO(text))] == [1, 2]
+    text = '{"id": 1}\n{"id": 2}\n'
+    assert [obj['id'] for obj in importer.read_json(io.StringIO(text))] == [1, 2]
+
+
+def test_plan(tmp_path):
+    engine = FakeEngine(
+        [make_show(10, 'Cowboy Bebop', my_progress=20, my_status=1)],
+        [make_show(20, 'Trigun')])
+    cache = importer.SearchCache('fake', 'anime', path=str(tmp_path / 'search'))
+    imp = importer.Importer(engine, use_ids=False, search_cache=cache)
+
+    entries = list(importer.read_mal_xml(io.BytesIO(MAL_XML)))
+    entries.append({'title': 'Unknown', 'my_start_date': '2020-01-02'})
+    plan = imp.plan(entries)
+
+    assert plan.entries == 3
+    assert plan.changes == [{'id': 10, 'my_progress': 26, 'my_score': 9, 'my_status': 2}]
+    assert [(show['id'], show['my_progress'], show['my_status']) for show in plan.adds] == [(20, 3, 3)]
+    assert plan.unmatched == ['Unknown']
+
+    # Searches are remembered, including the ones without results
+    engine.searches = []
+    cache = importer.SearchCache('fake', 'anime', path=str(tmp_path / 'search'))
+    plan = importer.Importer(engine, use_ids=False, search_cache=cache).plan(entries)
+    assert engine.searches == []
+    assert plan.adds[0]['id'] == 20
+    assert imp._convert_start_date('2020-01-02') == datetime.date(2020, 1, 2)
+
+
+def test_plan_checks_values(tmp_path):
+    engine = FakeEngine([make_show(10, 'Cowboy Bebop', my_score=7)], [make_show(20, 'Trigun')])
+    warnings = []
+    engine.msg = messenger.Messenger(
+        lambda classname, msgtype, msg: msgtype == messenger.TYPE_WARN and warnings.append(msg))
+    cache = importer.SearchCache('fake', 'anime', path=str(tmp_path / 'search'))
+    imp = importer.Importer(engine, search_cache=cache)
+
+    plan = imp.plan([
+        {'title': 'Cowboy Bebop', 'my_score': '7.5', 'my_progress': '3'},
+        {'title': 'Trigun', 'my_score': '11', 'my_progress': '30', 'my_status': '2'},
+    ])
+
+    # Only the invalid values are left out
+    assert plan.changes == [{'id': 10, 'my_progress': 3}]
+    assert (plan.adds[0]['my_score'], plan.adds[0]['my_progress'], plan.adds[0]['my_status']) == (0, 26, 2)
+    assert warnings == ['Ignoring invalid my_score for Cowboy Bebop: 7.5',
+                        'Ignoring invalid my_score for Trigun: 11.0']
+
+
+def test_apply(tmp_path):
+    engine = FakeEngine([make_show(10, 'Cowboy Bebop'), make_show(11, 'Trigun')], [])
+    plan = importer.ImportPlan()
+    plan.changes = [{'id': 10, 'my_progress': 5}, {'id': 99, 'my_progress': 1}, {'id': 11, 'my_score': 7}]
+    plan.adds = [make_show(20, 'Monster', my_status=1), make_show(21, 'Unavailable', my_status=3)]
+
+    imp = importer.Importer(engine, search_cache=importer.SearchCache('fake', 'anime', path=str(tmp_path / 'search')))
+    assert imp.apply(plan) == (2, 1)
+
+    # Everything is queued in one batch, skipping what's invalid
+    assert engine.batches == 1
+    assert engine.calls == ['batch', ('apply_changes', True), ('add_show', 20, 1),
+                            ('add_show', 21, 3), 'end']
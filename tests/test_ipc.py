@@ -0,0 +1,178 @@
+import datetime
+import os
+
+import pytest
+
+from trackma import ipc
+
+
+def test_encode_roundtrip():
+    value = {
+        'statuses_dict': {1: 'Watching', 2: 'Completed'},
+        'library': {(1, 2): ['a', ('b', 3)]},
+        'start_date': datetime.date(2020, 1, 2),
+        'updated': datetime.datetime(2020, 1, 2, 3, 4, 5),
+        'aliases': {'x'},
+        'nested': [{'title': 'Show', 'total': None}],
+    }
+    decoded = ipc.loads(ipc.dumps(value))
+    assert decoded == dict(value, aliases=['x'])
+    assert isinstance(decoded['library'][(1, 2)][1], tuple)
+
+
+class FakeEngine:
+    signals = {'episode_changed': None, 'queue_changed': None}
+
+    def __init__(self, account, message_handler=None):
+        from trackma.signals import SignalBus
+
+        self.bus = SignalBus(self.signals)
+        self.msg = message_handler
+        self.mediainfo = {'mediatype': 'anime'}
+        self.config = {'player': 'mpv'}
+        self.shows = {1: {'id': 1, 'title': 'Show', 'my_progress': 0,
+                          'my_start_date': datetime.date(2020, 1, 2)}}
+        self.started = self.unloaded = False
+
+    def subscribe_signal(self, signal, callback):
+        self.bus.subscribe(signal, callback)
+
+    def start(self):
+        self.started = True
+
+    def unload(self):
+        self.unloaded = True
+
+    def get_show_info(self, showid):
+        from trackma import utils
+        try:
+            return self.shows[showid]
+        except KeyError:
+            raise utils.EngineError("Show not found.")
+
+    def set_episode(self, showid, episode):
+        show = self.get_show_info(showid)
+        show['my_progress'] = episode
+        self.bus.emit('episode_changed', show)
+        return show
+
+    def set_config(self, key, value):
+        self.config[key] = value
+
+    def reload(self, account=None, mediatype=None):
+        self.mediainfo = {'mediatype': mediatype}
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    import tempfile
+    import threading
+    import time
+
+    from trackma import daemon as daemon_module
+
+    monkeypatch.setattr(daemon_module, 'Engine', FakeEngine)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Unix socket paths are short, so not under tmp_path
+        server = daemon_module.EngineDaemon({'username': 'a', 'api': 'fake'},
+                                            os.path.join(tmpdir, 'sock'))
+        thread = threading.Thread(target=server.serve, daemon=True)
+        thread.start()
+        for _ in range(100):
+            if server.server and os.path.exists(server.path):
+                break
+            time.sleep(0.01)
+
+        yield server
+        server.shutdown()
+        thread.join(5)
+
+
+def test_proxy_roundtrip(daemon):
+    import threading
+
+    from trackma import utils
+
+    proxy = ipc.EngineProxy(daemon.path)
+    other = ipc.EngineProxy(daemon.path)
+    try:
+        # Calls and the values JSON can't represent
+        show = proxy.get_show_info(1)
+        assert show['my_start_date'] == datetime.date(2020, 1, 2)
+
+        # Errors keep their type
+        with pytest.raises(utils.EngineError, match="Show not found"):
+            proxy.get_show_info(2)
+        with pytest.raises(utils.EngineError, match="Unknown method"):
+            proxy.batch()
+
+        # Signals arrive on their own thread, which may call back
+        received = []
+        done = threading.Event()
+
+        def episode_changed(show):
+            received.append((show['my_progress'], proxy.get_show_info(1)['my_progress']))
+            done.set()
+
+        proxy.connect_signal('episode_changed', episode_changed)
+        other.set_episode(1, 5)
+        assert done.wait(5)
+        assert received == [(5, 5)]
+
+        # Only what changes on reload is cached
+        assert proxy.mediainfo == {'mediatype': 'anime'}
+        assert proxy.config['player'] == 'mpv'
+        other.set_config('player', 'vlc')
+        assert proxy.config['player'] == 'vlc'
+        other.reload(None, 'manga')
+        proxy.get_show_info(1)
+        assert proxy.mediainfo == {'mediatype': 'manga'}
+
+        # The daemon owns the engine
+        proxy.start()
+        proxy.unload()
+        assert daemon.engine.started and not daemon.engine.unloaded
+        with pytest.raises(utils.EngineFatal):
+            proxy.get_show_info(1)
+    finally:
+        proxy.unload()
+        other.unload()
+
+
+def test_proxy_errors(daemon):
+    import threading
+
+    from trackma import messenger
+    from trackma import utils
+
+    messages = []
+    reported = threading.Event()
+
+    def message_handler(classname, msgtype, msg):
+        messages.append((classname, msgtype, msg))
+        if msgtype == messenger.TYPE_WARN:
+            reported.set()
+
+    proxy = ipc.EngineProxy(daemon.path, message_handler)
+    try:
+        # Callback errors go to the message handler
+        def episode_changed(show):
+            raise ValueError('callback')
+
+        proxy.connect_signal('episode_changed', episode_changed)
+        proxy.set_episode(1, 5)
+        assert reported.wait(5)
+        assert ('EngineProxy', messenger.TYPE_WARN,
+                'Error in a listener of episode_changed: callback') in messages
+
+        # Losing the connection fails the calls instead of blocking
+        import socket
+        proxy.sock.shutdown(socket.SHUT_RDWR)
+        result = []
+        thread = threading.Thread(target=lambda: result.append(
+            pytest.raises(utils.EngineFatal, proxy.get_show_info, 1)))
+        thread.start()
+        thread.join(5)
+        assert result and not thread.is_alive()
+    finally:
+        proxy.unload()
@@ -0,0 +1,88 @@
+import json
+import threading
+
+from trackma import utils
+from trackma.pool import EnginePool
+
+from conftest import ACCOUNT
+
+
+class FakeEngine:
+    barrier = None
+
+    def __init__(self, account, message_handler=None, mediatype=None):
+        self.account = account
+        self.api_info = {'mediatype': mediatype or 'anime'}
+        self.started = False
+        self.unloaded = False
+
+    def start(self):
+        self.started = True
+
+    def unload(self):
+        self.unloaded = True
+
+    def list_download(self):
+        # Only passes if every engine downloads at the same time
+        self.barrier.wait(timeout=5)
+        if self.account['username'] == 'bad':
+            raise utils.APIError('Failed')
+
+    def list_upload(self):
+        pass
+
+
+def _account(name):
+    return {'username': name, 'api': 'anilist'}
+
+
+def test_pool_lru():
+    pool = EnginePool(max_engines=2, engine_class=FakeEngine)
+    a = pool.switch(_account('a'))
+    b = pool.get(_account('b'))
+    assert a.started and pool.get(_account('a')) is a
+
+    # b is the least recently used one
+    c = pool.get(_account('c'))
+    assert b.unloaded and not a.unloaded
+    assert list(pool.engines) == [EnginePool.key(_account('a'), 'anime'), EnginePool.key(_account('c'), 'anime')]
+
+    # The active engine is never evicted
+    pool.get(_account('d'))
+    assert c.unloaded and not a.unloaded
+    assert pool.active is a
+
+    pool.unload()
+    assert a.unloaded and pool.active is None and not pool.engines
+
+
+def test_pool_download_all_concurrently():
+    pool = EnginePool(max_engines=3, engine_class=FakeEngine)
+    for name in ('a', 'b', 'bad'):
+        pool.get(_account(name))
+
+    FakeEngine.barrier = threading.Barrier(3)
+    errors = pool.download_all()
+    assert list(errors) == [EnginePool.key(_account('bad'), 'anime')]
+    assert isinstance(errors[EnginePool.key(_account('bad'), 'anime')], utils.APIError)
+
+
+def test_pool_mediatypes(trackma_home):
+    pool = EnginePool()
+    anime = pool.get(ACCOUNT, 'anime')
+    manga = pool.get(ACCOUNT, 'manga')
+    assert anime is not manga
+    assert anime.api_info['mediatype'] == 'anime'
+    assert manga.api_info['mediatype'] == 'manga'
+    assert manga.get_show_info(1)['title'] == 'Manga 1'
+
+    # Without a mediatype, the last used engine of the account
+    assert pool.get(ACCOUNT) is manga
+    assert pool.get(ACCOUNT, 'anime') is anime
+
+    # Neither is saved as the mediatype to load next time
+    with open(utils.to_data_path('tester.fake', 'user.json')) as f:
+        assert json.load(f)['mediatype'] == ''
+
+    pool.unload()
+    assert not anime.loaded and not manga.loaded
@@ -0,0 +1,121 @@
+import os
+
+from trackma.extras import redirections
+
+RELATIONS = """# Comment
+::meta
+- version: 1.3.0
+- last_modified: {last}
+
+::rules
+- 1|101|1001:13-24 -> 2|102|1002:1-12
+- 3|103|1003:1-? -> ~|~|~:2-?
+"""
+
+
+def _write(tmpdir, last='2020-01-01'):
+    fname = os.path.join(str(tmpdir), 'anime-relations.txt')
+    with open(fname, 'w') as f:
+        f.write(RELATIONS.format(last=last))
+    return fname
+
+
+def test_parse(tmpdir):
+    relations = redirections.parse_anime_relations(_write(tmpdir), 'mal')
+    assert relations['meta']['last_modified'] == '2020-01-01'
+    assert relations[1] == [((13, 24), 2, (1, 12))]
+    assert relations[3] == [((1, -1), 3, (2, -1))]
+
+    assert redirections.parse_anime_relations(
+        _write(tmpdir), 'anilist', last='2020-01-01') is None
+
+
+def test_load_uses_cache(tmpdir, monkeypatch):
+    fname = _write(tmpdir)
+    cache_file = os.path.join(str(tmpdir), 'cache', 'relations.cache')
+
+    relations = redirections.load_anime_relations(fname, 'mal', cache_file)
+    assert os.path.isfile(cache_file)
+
+    def _fail(*args):
+        raise AssertionError("Shouldn't parse again")
+    monkeypatch.setattr(redirections, 'parse_anime_relations', _fail)
+    assert redirections.load_anime_relations(fname, 'mal', cache_file) == relations
+
+
+def test_load_invalidates_cache(tmpdir):
+    fname = _write(tmpdir)
+    cache_file = os.path.join(str(tmpdir), 'relations.cache')
+
+    redirections.load_anime_relations(fname, 'mal', cache_file)
+    _write(tmpdir, last='2021-02-02')
+    relations = redirections.load_anime_relations(fname, 'mal', cache_file)
+    assert relations['meta']['last_modified'] == '2021-02-02'
+
+    # A different API uses different IDs
+    relations = redirections.load_anime_relations(fname, 'anilist', cache_file)
+    assert 1001 in relations
+
+
+def _index():
+    return redirections.RedirectionIndex({
+        'meta': {},
+        1: [((13, 24), 2, (1, 12)), ((25, -1), 5, (1, -1))],
+        3: [((1, -1), 3, (2, -1)), ((5, 6), 4, (1, 2))],
+    })
+
+
+def test_index_lookup():
+    index = _index()
+    assert index.lookup(1, 12) == []
+    assert index.lookup(1, 13) == [(2, 1)]
+    assert index.lookup(1, 24) == [(2, 12)]
+    assert index.lookup(1, 30) == [(5, 6)]
+    assert index.lookup(2, 1) == []
+    # Overlapping rules are checked in file order
+    assert index.lookup(3, 5) == [(3, 6), (4, 1)]
+
+
+def test_index_lookup_range():
+    index = _index()
+    assert index.lookup_range(1, 10, 15) == [(1, 10, 12), (2, 1, 3)]
+    assert index.lookup_range(1, 23, 26) == [(2, 11, 12), (5, 1, 2)]
+    assert index.lookup_range(1, 1, 12) == [(1, 1, 12)]
+    assert index.lookup_range(2, 1, 12) == [(2, 1, 12)]
+
+
+def test_redirect_show_and_range():
+    from trackma import utils
+    shows = {i: {'id': i, 'title': 'Show %d' % i} for i in (1, 2)}
+    tracker_list = (shows, {})
+    index = _index()
+
+    assert utils.redirect_show((shows[1], 14), index, tracker_list) == (shows[2], 2)
+    # Destination not in the list
+    assert utils.redirect_show((shows[1], 26), index, tracker_list) == (shows[1], 26)
+    # Plain dictionaries still work
+    assert utils.redirect_show((shows[1], 14), {1: [((13, 24), 2, (1, 12))]},
+                               tracker_list) == (shows[2], 2)
+
+    assert utils.redirect_range(shows[1], 11, 14, index, tracker_list) == [
+        (shows[1], 11, 12), (shows[2], 1, 2)]
+    assert utils.redirect_range(shows[1], 23, 26, index, tracker_list) == [
+        (shows[2], 11, 12), (shows[1], 25, 26)]
+
+
+def test_redirect_overlapping_candidates():
+    from trackma import utils
+    shows = {i: {'id': i, 'title': 'Show %d' % i} for i in (7, 9)}
+    tracker_list = (shows, {})
+    # Show 8 isn't in the list, so both functions fall through to 9
+    index = redirections.RedirectionIndex({
+        7: [((1, 12), 8, (1, 12)), ((5, 12), 9, (1, 8))],
+    })
+
+    assert utils.redirect_show((shows[7], 6), index, tracker_list) == (shows[9], 2)
+    assert utils.redirect_range(shows[7], 3, 6, index, tracker_list) == [
+        (shows[7], 3, 4), (shows[9], 1, 2)]
+    for ep in range(3, 7):
+        (show, new_ep) = utils.redirect_show((shows[7], ep), index, tracker_list)
+        assert any(segment[0] is show and segment[1] <= new_ep <= segment[2]
+                   for segment in utils.redirect_range(shows[7], 3, 6, index, tracker_list))
@@ -0,0 +1,100 @@
+import pytest
+
+from trackma import messenger
+from trackma.signals import SignalBus, report_to
+
+
+def test_primary_and_subscribers():
+    calls = []
+    bus = SignalBus(['show_added', 'queue_changed'])
+    bus.connect('show_added', lambda show: calls.append(('old', show)))
+    bus.connect('show_added', lambda show: calls.append(('primary', show)))
+    bus.subscribe('show_added', lambda show: calls.append(('sub', show)))
+
+    bus.emit('show_added', 1)
+    assert calls == [('primary', 1), ('sub', 1)]
+
+    with pytest.raises(KeyError):
+        bus.emit('unknown')
+    with pytest.raises(KeyError):
+        bus.connect('unknown', print)
+
+
+def test_batch_coalesces():
+    calls = []
+    bus = SignalBus(['show_synced', 'queue_changed'], coalesce=['queue_changed'])
+    bus.connect('queue_changed', lambda queue: calls.append(('queue', queue)))
+    bus.connect('show_synced', lambda show: calls.append(('synced', show)))
+
+    with bus.batch():
+        for i in range(3):
+            bus.emit('show_synced', i)
+            with bus.batch():
+                bus.emit('queue_changed', i)
+        assert calls == [('synced', 0), ('synced', 1), ('synced', 2)]
+
+    assert calls[3:] == [('queue', 2)]
+
+
+class Owner:
+    name = 'Owner'
+
+    def __init__(self):
+        self.messages = []
+        self.msg = messenger.Messenger(
+            lambda classname, msgtype, msg: self.messages.append((classname, msgtype, msg)))
+
+
+def test_subscriber_errors_are_isolated():
+    calls = []
+    owner = Owner()
+    bus = SignalBus(['show_added'], on_error=report_to(owner))
+
+    def primary(show):
+        raise ValueError('primary')
+
+    def failing(show):
+        raise RuntimeError('subscriber')
+
+    bus.connect('show_added', primary)
+    bus.subscribe('show_added', failing)
+    bus.subscribe('show_added', calls.append)
+
+    # The primary callback's error is the one raised, after every subscriber ran
+    with pytest.raises(ValueError):
+        bus.emit('show_added', 1)
+    assert calls == [1]
+
+    # Reported through the owner's messenger, with the traceback to debug
+    assert owner.messages[0] == ('Owner', messenger.TYPE_WARN,
+                                 'Error in a listener of show_added: subscriber')
+    assert owner.messages[-1][1] == messenger.TYPE_DEBUG
+    assert 'RuntimeError' in owner.messages[-1][2]
+
+
+def test_queued_subscribers():
+    import threading
+
+    calls = []
+    release = threading.Event()
+    bus = SignalBus(['show_synced', 'queue_changed'], coalesce=['queue_changed'])
+
+    def slow(show):
+        release.wait(5)
+        calls.append(('synced', show, threading.current_thread().name))
+
+    bus.subscribe('show_synced', slow, queued=True)
+    bus.subscribe('queue_changed', lambda queue: calls.append(('queue', queue)), queued=True)
+
+    # Emitting doesn't wait for the queued subscribers
+    bus.emit('show_synced', 1)
+    for i in range(3):
+        bus.emit('queue_changed', i)
+    bus.emit('show_synced', 2)
+    assert calls == []
+
+    release.set()
+    assert bus.flush(5)
+    # In order, with the waiting queue_changed emissions coalesced
+    assert [call[:2] for call in calls] == [('synced', 1), ('queue', 2), ('synced', 2)]
+    assert calls[0][2] == 'trackma-signals'
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from trackma import messenger
+from trackma.startup import StartupPlan
+
+
+def make_plan():
+    return StartupPlan(messenger.Messenger(None))
+
+
+def test_requires_order():
+    events = []
+    plan = make_plan()
+
+    def phase(name, delay=0):
+        def run():
+            events.append(('start', name))
+            time.sleep(delay)
+            events.append(('end', name))
+        return run
+
+    plan.add('data', phase('data', 0.05))
+    plan.add('hooks', phase('hooks'))
+    plan.add('tracker', phase('tracker'), requires=('data', 'hooks'))
+    timings = plan.run()
+
+    assert events.index(('start', 'tracker')) > events.index(('end', 'data'))
+    assert events.index(('start', 'tracker')) > events.index(('end', 'hooks'))
+    assert set(timings) == {'data', 'hooks', 'tracker', 'total'}
+
+
+def test_independent_phases_overlap():
+    # Only passes if both phases run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+    plan = make_plan()
+    plan.add('data', barrier.wait)
+    plan.add('redirections', barrier.wait)
+    plan.run()
+
+
+def test_failure_stops_dependents():
+    ran = []
+    plan = make_plan()
+
+    def fail():
+        raise ValueError('data')
+
+    def slow():
+        time.sleep(0.05)
+        ran.append('redirections')
+
+    plan.add('data', fail)
+    plan.add('redirections', slow)
+    plan.add('library', lambda: ran.append('library'), requires=('data',))
+
+    with pytest.raises(ValueError, match='data'):
+        plan.run()
+
+    # The running phase finished, the dependent one never started
+    assert ran == ['redirections']
+
+
+def test_invalid_requires():
+    plan = make_plan()
+    plan.add('data', lambda: None)
+
+    with pytest.raises(ValueError):
+        plan.add('tracker', lambda: None, requires=('library',))
+
+    # Phases can only require earlier ones, so redefining one could make a cycle
+    plan.add('library', lambda: None, requires=('data',))
+    with pytest.raises(ValueError):
+        plan.add('data', lambda: None, requires=('library',))
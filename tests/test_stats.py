@@ -0,0 +1,20 @@
+from trackma import stats
+
+
+def test_call_stats_snapshot():
+    call_stats = stats.CallStats(samples=100)
+    for i in range(1, 101):
+        call_stats.record('episode_changed', i / 1000.0, error=(i % 10 == 0))
+    call_stats.record('show_added', 0.5)
+
+    snapshot = call_stats.snapshot()
+    stat = snapshot['episode_changed']
+    assert stat['count'] == 100
+    assert stat['errors'] == 10
+    assert abs(stat['total'] - 5.05) < 1e-9
+    assert abs(stat['mean'] - 0.0505) < 1e-9
+    assert stat['p95'] == 0.095
+    assert snapshot['show_added']['p95'] == 0.5
+
+    call_stats.reset()
+    assert call_stats.snapshot() == {}
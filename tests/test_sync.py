@@ -0,0 +1,77 @@
+import http.server
+import os
+import threading
+
+import pytest
+
+from trackma import utils
+
+CONTENT = b'# anime-relations\n'
+ETAG = '"abc123"'
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.path == '/missing':
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Last-Modified', 'Wed, 01 Jan 2020 00:00:00 GMT')
+        self.send_header('Content-Length', str(len(CONTENT)))
+        self.end_headers()
+        self.wfile.write(CONTENT)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+    httpd = http.server.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:%d/anime-relations.txt' % httpd.server_port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_sync_file_conditional(tmp_path, server):
+    fname = str(tmp_path / 'anime-relations.txt')
+    assert utils.sync_outdated(fname, 3600)
+
+    assert utils.sync_file(fname, server)
+    with open(fname, 'rb') as f:
+        assert f.read() == CONTENT
+    assert 'If-None-Match' not in Handler.requests[0]
+    assert not utils.sync_outdated(fname, 3600)
+
+    # Not modified: the file is left alone but the check is recorded
+    os.utime(fname, (0, 0))
+    assert not utils.sync_file(fname, server)
+    assert Handler.requests[1]['If-None-Match'] == ETAG
+    assert Handler.requests[1]['If-Modified-Since'] == 'Wed, 01 Jan 2020 00:00:00 GMT'
+    assert os.path.getmtime(fname) == 0
+    assert not utils.sync_outdated(fname, 3600)
+    assert not os.path.exists(fname + '.tmp')
+
+
+def test_sync_file_error_keeps_file(tmp_path, server):
+    fname = str(tmp_path / 'anime-relations.txt')
+    with open(fname, 'wb') as f:
+        f.write(b'old')
+
+    assert not utils.sync_file(fname, server.replace('/anime-relations.txt', '/missing'))
+    with open(fname, 'rb') as f:
+        assert f.read() == b'old'
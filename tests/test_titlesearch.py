@@ -0,0 +1,60 @@
+from trackma import utils
+from trackma.titlesearch import TitleSearch
+
+
+class FakeData:
+    def __init__(self, titles):
+        self.showlist = {}
+        for showid, title in enumerate(titles, 1):
+            show = utils.show()
+            show.update(id=showid, title=title)
+            self.showlist[showid] = show
+        self.altnames = {}
+        self.index_version = 0
+
+    def get(self):
+        return self.showlist
+
+    def altnames_get(self):
+        return self.altnames
+
+
+def test_complete_prefix():
+    data = FakeData(['Toradora!', 'Tokyo Ghoul', 'Bakemonogatari', 'tonari no Totoro'])
+    search = TitleSearch(data)
+    assert search.complete('to') == ['Tokyo Ghoul', 'tonari no Totoro', 'Toradora!']
+    assert search.complete('TOR') == ['Toradora!']
+    assert search.complete('x') == []
+
+
+def test_complete_regex_and_altnames():
+    data = FakeData(['Toradora!', 'Tokyo Ghoul'])
+    data.showlist[2]['aliases'] = ['TG']
+    data.altnames[1] = 'Tiger x Dragon'
+    data.index_version += 1
+    search = TitleSearch(data)
+    assert search.complete('T.k') == ['Tokyo Ghoul']
+    assert search.complete('ti') == []
+    assert search.complete('ti', altnames=True) == ['Tiger x Dragon']
+    assert search.complete('tg', altnames=True) == ['TG']
+
+
+def test_index_refreshes_on_version_change():
+    data = FakeData(['Toradora!'])
+    search = TitleSearch(data)
+    assert search.complete('k') == []
+
+    show = utils.show()
+    show.update(id=5, title='K-On!')
+    data.showlist[5] = show
+    assert search.complete('k') == []  # Version unchanged, still cached
+    data.index_version += 1
+    assert search.complete('k') == ['K-On!']
+
+
+def test_search():
+    data = FakeData(['Toradora!', 'Tokyo Ghoul', 'Ghost in the Shell'])
+    data.altnames[1] = 'Tiger Ghost'
+    search = TitleSearch(data)
+    assert [s['id'] for s in search.search('gho')] == [2, 3]
+    assert sorted(s['id'] for s in search.search('gho', altnames=True)) == [1, 2, 3]
@@ -0,0 +1,171 @@
+import threading
+import time
+
+from trackma import messenger
+from trackma import utils
+from trackma.tracker import tracker
+from trackma.tracker.composite import CompositeTracker
+
+CONFIG = {'tracker_update_wait_s': 0, 'tracker_update_close': False,
+          'tracker_ignore_not_next': False, 'tracker_interval': 0.01}
+
+
+class Recorder:
+    """A messenger handler that keeps the messages."""
+
+    def __init__(self):
+        self.messages = []
+        self.changed = threading.Condition()
+
+    def __call__(self, classname, msgtype, msg):
+        with self.changed:
+            self.messages.append((msgtype, msg))
+            self.changed.notify_all()
+
+    def wait_for(self, msg):
+        with self.changed:
+            return self.changed.wait_for(
+                lambda: any(message == msg for (msgtype, message) in self.messages), 5)
+
+
+def make_show(showid, title):
+    show = utils.show()
+    show.update(id=showid, title=title, total=12)
+    return show
+
+
+class FakeTracker(tracker.TrackerBase):
+    """A tracker driven by the test instead of a player."""
+
+    def _start(self, config, watch_dirs):
+        pass
+
+    def play(self, show, episode):
+        self.last_show_tuple = (show, episode)
+        self.last_state = utils.TRACKER_PLAYING
+        self._emit_signal('playing', show['id'], True, episode)
+
+    def finish(self):
+        self._emit_signal('update', *self.last_show_tuple)
+
+    def stop(self):
+        (show, episode) = self.last_show_tuple
+        self.last_show_tuple = None
+        self.last_state = utils.TRACKER_NOVIDEO
+        self._emit_signal('playing', show['id'], False, episode)
+
+
+class FakeJellyfin(FakeTracker):
+    name = 'Jellyfin'
+
+
+def make_composite():
+    composite = CompositeTracker(messenger.Messenger(None), None, CONFIG, [],
+                                 tracker_classes=(FakeTracker, FakeJellyfin))
+    signals = []
+    for signal in ('playing', 'update', 'unrecognised'):
+        composite.connect_signal(signal, lambda *args, signal=signal: signals.append((signal,) + args))
+    return (composite, composite.children, signals)
+
+
+def test_composite_owner():
+    (composite, (first, second), signals) = make_composite()
+    show = make_show(1, 'Foo')
+
+    first.play(show, 3)
+    second.play(show, 3)
+    assert signals == [('playing', 1, True, 3)]
+    assert composite.get_status()['show'] == (show, 3)
+
+    # Only the owner's update goes through
+    second.finish()
+    assert len(signals) == 1
+    first.finish()
+    assert signals[-1] == ('update', show, 3)
+
+    # The other one only stops being muted once the owner stops
+    second.stop()
+    first.stop()
+    assert signals[-1] == ('playing', 1, False, 3)
+
+
+def test_composite_dedup():
+    (composite, (first, second), signals) = make_composite()
+    show = make_show(1, 'Foo')
+
+    first.play(show, 3)
+    second.play(show, 3)
+    first.finish()
+    first.stop()
+
+    # Still the same playback for the other tracker
+    second.finish()
+    assert [signal for signal in signals if signal[0] == 'update'] == [('update', show, 3)]
+    second.stop()
+
+    # Watching it again later is a new playback
+    second.play(show, 3)
+    second.finish()
+    assert [signal for signal in signals if signal[0] == 'update'] == [('update', show, 3)] * 2
+
+
+class FakePoller(tracker.PollingTrackerBase):
+    name = 'Poller'
+
+    def __init__(self, *args, fail=False):
+        self.fail = fail
+        self.polls = 0
+        super().__init__(*args)
+
+    def prepare(self, config, watch_dirs):
+        if self.fail:
+            raise OSError('No player')
+
+    def poll(self, config, watch_dirs):
+        self.polls += 1
+        if self.polls == 2:
+            raise ValueError('Bad reply')
+        if self.polls == 4:
+            self.disable()
+
+
+def test_poll_loop():
+    recorder = Recorder()
+    poller = FakePoller(messenger.Messenger(recorder), None, CONFIG, [])
+
+    # Polls until disabled, even after an error
+    assert recorder.wait_for('Tracker has stopped.')
+    assert poller.polls == 4
+    assert (messenger.TYPE_WARN, 'Error while polling: Bad reply') in recorder.messages
+
+
+def test_poll_loop_prepare_error():
+    recorder = Recorder()
+    poller = FakePoller(messenger.Messenger(recorder), None, CONFIG, [], fail=True)
+
+    assert recorder.wait_for("Couldn't start tracker: No player")
+    assert poller.polls == 0
+
+
+def test_countdown_pause_resume():
+    config = dict(CONFIG, tracker_update_wait_s=0.5)
+    child = FakeTracker(messenger.Messenger(None), None, config, [])
+    updated = threading.Event()
+    child.connect_signal('update', lambda show, episode: updated.set())
+    show = make_show(1, 'Foo')
+    show['my_progress'] = 2
+
+    # The countdown is a call scheduled in the shared runtime
+    child.update_show_if_needed(utils.TRACKER_PLAYING, (show, 3))
+    assert child._scheduled_update and not updated.is_set()
+
+    # Pausing cancels it and resuming schedules it again, later
+    child.pause_timer()
+    assert child._scheduled_update is None
+    time.sleep(1.5)
+    assert not updated.is_set()
+
+    child.resume_timer()
+    assert child._scheduled_update
+    assert updated.wait(5)
+    child.disable()
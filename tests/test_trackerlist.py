@@ -0,0 +1,54 @@
+from trackma import utils
+from trackma.tracker.trackerlist import TrackerList
+
+
+def _entry(showid, title, progress=0, aliases=()):
+    return {
+        'id': showid,
+        'title': title,
+        'my_progress': progress,
+        'total': 12,
+        'type': None,
+        'titles': [title] + list(aliases),
+    }
+
+
+def test_unpacks_like_tuple():
+    tracker_list = TrackerList([_entry(1, 'Foo')], {'bar': 1})
+    (showlist, altnames_map) = tracker_list
+    assert list(showlist) == [1]
+    assert altnames_map == {'bar': 1}
+    assert tracker_list[0] is showlist
+
+
+def test_update_show_patches_entry_and_titles():
+    tracker_list = TrackerList([_entry(1, 'Foo'), _entry(2, 'Bar')])
+    showlist = tracker_list[0]
+
+    tracker_list.update_show(_entry(1, 'Foo', progress=3, aliases=['Foo TV']))
+    assert tracker_list[0] is showlist  # Existing show: patched in place
+    assert tracker_list[0][1]['my_progress'] == 3
+    assert tracker_list.find_title('foo tv')['id'] == 1
+
+    tracker_list.update_show(_entry(3, 'Baz'))
+    assert tracker_list[0] is not showlist  # New show: copy-on-write
+    assert 3 not in showlist
+    assert tracker_list.find_title('BAZ')['id'] == 3
+
+
+def test_remove_show_and_altnames():
+    tracker_list = TrackerList([_entry(1, 'Foo'), _entry(2, 'Bar')])
+    tracker_list.remove_show(2)
+    assert 2 not in tracker_list[0]
+    assert tracker_list.find_title('bar') is None
+
+    tracker_list.set_altname(1, 'Something Else')
+    assert utils.guess_show('something else', tracker_list)['id'] == 1
+    tracker_list.set_altname(1, '')
+    assert tracker_list[1] == {}
+
+
+def test_guess_show_uses_title_index():
+    tracker_list = TrackerList([_entry(1, 'Foo'), _entry(2, 'Foo Bar')])
+    assert utils.guess_show('foo bar', tracker_list)['id'] == 2
+    assert utils.guess_show('Foo Barr', tracker_list)['id'] == 2
@@ -0,0 +1,232 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import argparse
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+
+from trackma import ipc
+from trackma import messenger
+from trackma import utils
+from trackma.accounts import AccountManager
+from trackma.engine import Engine
+
+# Engine methods that only make sense in the process hosting it
+PRIVATE_METHODS = ('start', 'unload', 'connect_signal', 'subscribe_signal',
+                   'unsubscribe_signal', 'set_message_handler', 'batch')
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.send_lock = threading.Lock()
+        self.server.daemon.add_client(self)
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = ipc.loads(line)
+            except ValueError:
+                continue
+            reply = self.server.daemon.call(request)
+            try:
+                data = ipc.dumps(reply)
+            except TypeError as e:
+                data = ipc.dumps({'id': reply['id'], 'error': {
+                    'type': 'EngineError', 'message': str(e)}})
+            self.write(data)
+
+    def finish(self):
+        self.server.daemon.remove_client(self)
+        super().finish()
+
+    def write(self, data):
+        with self.send_lock:
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                pass
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class EngineDaemon:
+    """
+    Hosts one Engine and serves it to local clients over a Unix socket.
+
+    Every client gets all the engine signals and messages; calls from
+    all clients are run one at a time. See trackma.ipc for the protocol
+    and the client side.
+    """
+    name = 'Daemon'
+
+    def __init__(self, account, path=None, message_handler=None):
+        self.path = path or ipc.socket_path()
+        self.message_handler = message_handler
+        self.clients = []
+        self.server = None
+
+        self._clients_lock = threading.Lock()
+        self._call_lock = threading.Lock()
+
+        self.engine = Engine(account, self._message)
+        for name in self.engine.signals:
+            self.engine.subscribe_signal(name, self._make_forwarder(name))
+
+    def _make_forwarder(self, name):
+        def forward(*args):
+            self.broadcast({'signal': name, 'params': list(args)})
+        return forward
+
+    def _message(self, classname, msgtype, msg):
+        if self.message_handler:
+            self.message_handler(classname, msgtype, msg)
+        self.broadcast({'message': [classname, msgtype, msg]})
+
+    def add_client(self, client):
+        with self._clients_lock:
+            self.clients.append(client)
+
+    def remove_client(self, client):
+        with self._clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def broadcast(self, message):
+        try:
+            data = ipc.dumps(message)
+        except TypeError:
+            # Not something a client could use anyway
+            return
+
+        with self._clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.write(data)
+
+    def call(self, request):
+        """Runs a request on the engine and returns the reply message."""
+        request_id = request.get('id')
+        method = request.get('method', '')
+        params = request.get('params', [])
+
+        try:
+            with self._call_lock:
+                if method == '__getattr__':
+                    if params[0] not in ipc.ATTRIBUTES:
+                        raise utils.EngineError("Unknown attribute: {}".format(params[0]))
+                    result = getattr(self.engine, params[0])
+                else:
+                    if method.startswith('_') or method in PRIVATE_METHODS:
+                        raise utils.EngineError("Unknown method: {}".format(method))
+                    func = getattr(self.engine, method, None)
+                    if not callable(func):
+                        raise utils.EngineError("Unknown method: {}".format(method))
+                    result = func(*params)
+
+                if method == 'reload':
+                    # Before any other call can see the new engine
+                    self.broadcast({'reloaded': True})
+
+            return {'id': request_id, 'result': result}
+        except (utils.TrackmaError, utils.TrackmaFatal) as e:
+            return {'id': request_id, 'error': {'type': type(e).__name__, 'message': str(e)}}
+        except Exception as e:
+            return {'id': request_id, 'error': {'type': 'EngineError',
+                                                'message': "{}: {}".format(type(e).__name__, e)}}
+
+    def _bind(self):
+        if os.path.exists(self.path):
+            # Only replace the socket if nobody is listening on it
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.unlink(self.path)
+            else:
+                raise utils.EngineFatal("trackma-daemon is already running at {}".format(self.path))
+            finally:
+                probe.close()
+
+        # Only the user can talk to the engine
+        umask = os.umask(0o177)
+        try:
+            self.server = _Server(self.path, _Handler)
+        finally:
+            os.umask(umask)
+        self.server.daemon = self
+
+    def serve(self):
+        """Starts the engine and serves clients until shutdown() is called."""
+        self._bind()
+        try:
+            self.engine.start()
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.engine.unload()
+
+    def shutdown(self):
+        if self.server:
+            # serve_forever() must be stopped from another thread
+            threading.Thread(target=self.server.shutdown).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Runs a Trackma engine that other Trackma interfaces can attach to.')
+    parser.add_argument('-a', '--account', type=int,
+                        help='Use specific account number.')
+    parser.add_argument('-s', '--socket',
+                        help='Path of the Unix socket (default: {}).'.format(ipc.socket_path()))
+    parser.add_argument('-d', '--debug', action='store_true',
+                        help='Show debugging messages.')
+    args = parser.parse_args()
+
+    accountman = AccountManager()
+    try:
+        account = accountman.get_account(args.account) if args.account else accountman.get_default()
+    except KeyError:
+        account = None
+    if not account:
+        print("No account selected. Use -a or set a default account with the trackma CLI.")
+        sys.exit(1)
+
+    def message_handler(classname, msgtype, msg):
+        if msgtype != messenger.TYPE_DEBUG or args.debug:
+            print("{}: {}".format(classname, msg), flush=True)
+
+    try:
+        daemon = EngineDaemon(account, args.socket, message_handler)
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.shutdown())
+        signal.signal(signal.SIGINT, lambda signum, frame: daemon.shutdown())
+        daemon.serve()
+    except utils.TrackmaFatal as e:
+        print("{}: {}".format(type(e).__name__, e))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,12 +14,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import contextlib
+import copy
 import os.path
 import sys
 import threading
 import time
 
 from trackma import utils
+from trackma.signals import SignalBus, report_to
 
 
 class Data:
@@ -55,11 +58,36 @@ class Data:
         'queue_changed':     None,
     }
 
-    def __init__(self, messenger, config, account, mediatype):
-        """Checks if the config is correct and creates an API object."""
+    def __init__(self, messenger, config, account, mediatype, remember_mediatype=True):
+        """
+        Checks if the config is correct and creates an API object.
+        **mediatype** is saved as the one to load next time, unless
+        **remember_mediatype** is False.
+        """
         self.msg = messenger
         self.config = config
         self.msg.info(self.name, "Initializing...")
+        self.bus = SignalBus(self.signals, coalesce=('queue_changed',),
+                             on_error=report_to(self))
+
+        # The class attributes are only defaults; several data handlers
+        # can be loaded at once (see EnginePool) and must not share them.
+        self.showlist = None
+        self.infocache = {}
+        self.queue = []
+        self.meta = copy.deepcopy(self.meta)
+
+        # Secondary indexes of the showlist, see _rebuild_indexes.
+        # index_version changes whenever a title or altname changes.
+        self.status_index = {}
+        self.title_index = {}
+        self.index_version = 0
+        self._positions = {}
+        self._next_position = 0
+
+        # Files and actions held back by deferred(), see there
+        self._defer_depth = 0
+        self._deferred = set()
 
         # Get filenames
         userfolder = "%s.%s" % (account['username'], account['api'])
@@ -67,9 +95,12 @@ class Data:
 
         # Handle userconfig and media type to load
         self._load_userconfig()
+        self.saved_mediatype = self.userconfig.get('mediatype')
         if mediatype:
             self.userconfig['mediatype'] = mediatype
-            self._save_userconfig()
+            if remember_mediatype:
+                self.saved_mediatype = mediatype
+                self._save_userconfig()
 
         # Import the API
         libbase = account['api']
@@ -98,15 +129,15 @@ class Data:
         self.info_file = utils.to_data_path(userfolder,  '%s.info' % mediatype)
         self.cache_file = utils.to_data_path(userfolder, '%s.list' % mediatype)
         self.meta_file = utils.to_data_path(userfolder, '%s.meta' % mediatype)
-        self.lock_file = utils.to_data_path(userfolder,  'lock')
+        # Per mediatype, so an account can be loaded with several at once
+        self.lock_file = utils.to_data_path(userfolder, '%s.lock' % mediatype)
 
         # Connect signals
         self.api.connect_signal('show_info_changed', self.info_update)
         self.api.connect_signal('userconfig_changed', self.userconfig_update)
 
     def _emit_signal(self, signal, *args):
-        if self.signals[signal]:
-            self.signals[signal](*args)
+        self.bus.emit(signal, *args)
 
     def _is_queue_ready(self):
         # Checks if queue should be sent ASAP
@@ -116,9 +147,42 @@ class Data:
                 (self.config['autosend'] == 'minutes' and time.time() - self.meta['lastsend'] >= self.config['autosend_minutes']*60) or
                 (self.config['autosend'] == 'size' and len(self.queue) >= self.config['autosend_size']))
 
+    @contextlib.contextmanager
+    def deferred(self):
+        """
+        Context manager that holds back writing the list cache and the
+        queue, and sending the queue when autosend asks for it, until
+        the outermost one closes; then each of them is done only once.
+        """
+        self._defer_depth += 1
+        try:
+            yield self
+        finally:
+            # unload() may have ended it already
+            if self._defer_depth:
+                self._defer_depth -= 1
+                if not self._defer_depth:
+                    self._flush_deferred()
+
+    def _flush_deferred(self, send=True):
+        (pending, self._deferred) = (self._deferred, set())
+        if 'cache' in pending:
+            self._save_cache()
+        if 'queue' in pending:
+            self._save_queue()
+        if send and 'send' in pending and self._is_queue_ready():
+            self.process_queue()
+
     def connect_signal(self, signal, callback):
         try:
-            self.signals[signal] = callback
+            self.bus.connect(signal, callback)
+        except KeyError:
+            raise utils.DataFatal("Invalid signal.")
+
+    def subscribe_signal(self, signal, callback, queued=False):
+        """Adds **callback** as an additional listener of **signal**."""
+        try:
+            self.bus.subscribe(signal, callback, queued)
         except KeyError:
             raise utils.DataFatal("Invalid signal.")
 
@@ -126,12 +190,14 @@ class Data:
         self.msg = message_handler
         self.api.set_message_handler(self.msg)
 
-    def start(self):
+    def start(self, sync=True):
         """
         Does all necessary tasks to start the data handler
 
         This should be called before doing any other operation with the data handler,
         as it loads the list cache (or downloads it if necessary) and queue.
+        If **sync** is False, the cache is used as is: the queue isn't sent
+        and the list isn't retrieved unless there's no cache at all.
 
         """
         # Lock the database
@@ -153,6 +219,11 @@ class Data:
         # If there is a list cache, load from it
         # otherwise query the API for a remote list
         if self._cache_exists() and self.meta.get('version') == self.version and self.meta.get('apiversion') == self.api_version:
+            if not sync:
+                if not self.showlist:
+                    self._load_cache()
+                return (self.api.api_info, self.api.media_info())
+
             # Auto-send: Process the queue if we're beyond the auto-send time limit for some reason
             if self._is_queue_ready():
                 self.process_queue()
@@ -201,6 +272,10 @@ class Data:
         if self.autosend_timer:
             self.autosend_timer.cancel()
 
+        # Do what deferred() is holding back while the files are still ours
+        self._defer_depth = 0
+        self._flush_deferred(send=not force)
+
         # We push changes if specified on config file
         if not force:
             if self.config['autosend_at_exit']:
@@ -240,6 +315,8 @@ class Data:
             raise utils.DataError("Show already in the list.")
 
         self.showlist[showid] = show
+        self._index_show(show)
+        self.index_version += 1
 
         # Check if the show add is already in queue
         exists = False
@@ -276,7 +353,7 @@ class Data:
             raise utils.DataError('Invalid key for queue update.')
 
         # Do update on memory
-        show[key] = value
+        self.set_show_attr(show, key, value)
 
         # Check if the show update is already in queue
         exists = False
@@ -305,8 +382,60 @@ class Data:
         self.msg.info(self.name, "Queued update for %s" % show['title'])
         self.msg.debug(self.name, "Queued: {} -> {}".format(key, value))
 
-        # Immediately process the action if necessary
-        if self._is_queue_ready():
+        self._autosend()
+
+    def queue_updates(self, updates):
+        """
+        Queues the updates of many shows at once
+
+        Like queue_update, but the list and the queue are saved,
+        queue_changed is emitted and autosend is checked only once.
+
+        updates: List of (show, changes) tuples, where changes is a
+        dictionary of the keys to modify and their new values
+        """
+        for (show, changes) in updates:
+            for key in changes:
+                if key not in show:
+                    raise utils.DataError('Invalid key for queue update.')
+
+        # Queue items the updates can be added to, like in queue_update
+        queued = {}
+        for q in self.queue:
+            if q['action'] in ['add', 'update']:
+                queued.setdefault(q['id'], q)
+
+        for (show, changes) in updates:
+            # Do update on memory
+            for (key, value) in changes.items():
+                self.set_show_attr(show, key, value)
+
+            item = queued.get(show['id'])
+            if item is None:
+                item = {'id': show['id'],
+                        'my_id': show['my_id'],
+                        'action': 'update',
+                        'title': show['title'],
+                        }
+                self.queue.append(item)
+                queued[show['id']] = item
+            item.update(changes)
+
+            show['queued'] = True
+            self.msg.debug(self.name, "Queued: {} -> {}".format(show['title'], changes))
+
+        self._save_queue()
+        self._save_cache()
+        self._emit_signal('queue_changed', self.queue)
+        self.msg.info(self.name, "Queued updates for %d shows" % len(updates))
+
+        self._autosend()
+
+    def _autosend(self):
+        # Immediately process the queue if necessary
+        if self._defer_depth:
+            self._deferred.add('send')
+        elif self._is_queue_ready():
             self.process_queue()
 
     def queue_delete(self, show):
@@ -326,6 +455,9 @@ class Data:
             raise utils.DataError("Show not in the list.")
 
         item = self.showlist.pop(showid)
+        self._unindex_show(item)
+        del self._positions[showid]
+        self.index_version += 1
 
         # Check if the show add is already in queue
         exists = False
@@ -376,58 +508,60 @@ class Data:
             # except utils.APIError as e:
             #    raise utils.DataError("Can't process queue, will leave unsynced. Reason: %s" % e)
 
-            # Run through queue
-            items_processed = []
-            items_failed = []
-            while True:
-                try:
-                    item = self.queue.pop(0)
-                except IndexError:
-                    break
-
-                showid = item['id']
-
-                try:
-                    show = self.showlist[showid]
-                except KeyError:
-                    show = None
-
-                try:
-                    # Call the API to do the requested operation
-                    operation = item.get('action')
-                    if operation == 'add':
-                        my_id = self.api.add_show(item)
-
-                        if my_id:
-                            show['my_id'] = my_id
-                    elif operation == 'update':
-                        self.api.update_show(item)
-                    elif operation == 'delete':
-                        self.api.delete_show(item)
-                    else:
+            # Run through queue. queue_changed is coalesced into a single
+            # signal once the whole queue has been processed.
+            with self.bus.batch():
+                items_processed = []
+                items_failed = []
+                while True:
+                    try:
+                        item = self.queue.pop(0)
+                    except IndexError:
+                        break
+
+                    showid = item['id']
+
+                    try:
+                        show = self.showlist[showid]
+                    except KeyError:
+                        show = None
+
+                    try:
+                        # Call the API to do the requested operation
+                        operation = item.get('action')
+                        if operation == 'add':
+                            my_id = self.api.add_show(item)
+
+                            if my_id:
+                                show['my_id'] = my_id
+                        elif operation == 'update':
+                            self.api.update_show(item)
+                        elif operation == 'delete':
+                            self.api.delete_show(item)
+                        else:
+                            self.msg.warn(
+                                self.name, "Unknown operation in queue (%s), skipping..." % repr(operation))
+
+                        if self.showlist.get(showid):
+                            self.showlist[showid]['queued'] = False
+                            self._emit_signal('show_synced', show, item)
+
+                        items_processed.append((show, item))
+                        self._emit_signal('queue_changed', self.queue)
+                    except utils.APIError as e:
                         self.msg.warn(
-                            self.name, "Unknown operation in queue (%s), skipping..." % repr(operation))
-
-                    if self.showlist.get(showid):
-                        self.showlist[showid]['queued'] = False
-                        self._emit_signal('show_synced', show, item)
-
-                    items_processed.append((show, item))
-                    self._emit_signal('queue_changed', self.queue)
-                except utils.APIError as e:
-                    self.msg.warn(
-                        self.name, "Can't process %s, will leave unsynced." % item['title'])
-                    self.msg.debug(self.name, "Info: %s" % e)
-                    items_failed.append(item)
-                except NotImplementedError:
-                    self.msg.warn(
-                        self.name, "Operation not implemented in API. Skipping...")
-                    items_failed.append(item)
-                # except TypeError:
-                #    self.msg.warn(self.name, "%s not in list, unexpected. Not changing queued status." % showid)
+                            self.name, "Can't process %s, will leave unsynced." % item['title'])
+                        self.msg.debug(self.name, "Info: %s" % e)
+                        items_failed.append(item)
+                    except NotImplementedError:
+                        self.msg.warn(
+                            self.name, "Operation not implemented in API. Skipping...")
+                        items_failed.append(item)
+                    # except TypeError:
+                    #    self.msg.warn(self.name, "%s not in list, unexpected. Not changing queued status." % showid)
 
-            if items_failed:
-                self.queue += items_failed
+                if items_failed:
+                    self.queue += items_failed
 
             self.api.logout()
             self._save_cache()
@@ -460,10 +594,12 @@ class Data:
 
     def altname_set(self, showid, altname):
         self.meta['altnames'][showid] = altname
+        self.index_version += 1
 
     def altname_clear(self, showid):
         if showid in self.meta['altnames']:
             del self.meta['altnames'][showid]
+            self.index_version += 1
 
     def altnames_get(self):
         return self.meta['altnames']
@@ -484,7 +620,69 @@ class Data:
         return show.get(key)
 
     def set_show_attr(self, show, key, value):
-        show[key] = value
+        if key in ('my_status', 'title') and show['id'] in self.status_index.get(show['my_status'], {}):
+            # Keep the indexes in sync with indexed keys
+            self._unindex_show(show)
+            show[key] = value
+            self._index_show(show)
+            if key == 'title':
+                self.index_version += 1
+        else:
+            show[key] = value
+
+    def get_by_status(self, status):
+        """Returns the shows in the list with the specified status,
+        in list order."""
+        return list(self.status_index.get(status, {}).values())
+
+    def get_by_title(self, title):
+        """Returns the first show with the exact specified title, or None."""
+        ids = self.title_index.get(title)
+        if ids:
+            return self.showlist.get(next(iter(ids)))
+        return None
+
+    def _rebuild_indexes(self):
+        self.status_index = {}
+        self.title_index = {}
+        self._positions = {}
+        self._next_position = 0
+        if self.showlist:
+            for show in self.showlist.values():
+                self._index_show(show)
+        self.index_version += 1
+
+    def _index_show(self, show):
+        # Shows added later go after every show already in the list
+        if show['id'] not in self._positions:
+            self._positions[show['id']] = self._next_position
+            self._next_position += 1
+
+        self._index_into(self.status_index.setdefault(show['my_status'], {}), show['id'], show)
+        # Dictionaries are used as ordered sets, to keep the original order
+        self._index_into(self.title_index.setdefault(show['title'], {}), show['id'], None)
+
+    def _index_into(self, bucket, showid, value):
+        """Adds an entry to an index bucket, keeping the buckets in list order."""
+        position = self._positions[showid]
+        if bucket and self._positions[next(reversed(bucket))] > position:
+            # The show moved here from another bucket; it only
+            # happens on a change, so re-sorting it is cheap enough
+            bucket[showid] = value
+            entries = sorted(bucket.items(), key=lambda entry: self._positions[entry[0]])
+            bucket.clear()
+            bucket.update(entries)
+        else:
+            bucket[showid] = value
+
+    def _unindex_show(self, show):
+        self.status_index.get(show['my_status'], {}).pop(show['id'], None)
+
+        ids = self.title_index.get(show['title'])
+        if ids is not None:
+            ids.pop(show['id'], None)
+            if not ids:
+                del self.title_index[show['title']]
 
     def get_show_titles(self, show):
         return [show['title']] + show['aliases']
@@ -508,8 +706,13 @@ class Data:
     def _load_cache(self):
         self.msg.debug(self.name, "Reading cache...")
         self.showlist = utils.load_data(self.cache_file)
+        self._rebuild_indexes()
 
     def _save_cache(self):
+        if self._defer_depth:
+            self._deferred.add('cache')
+            return
+
         self.msg.debug(self.name, "Saving cache...")
         utils.save_data(self.showlist, self.cache_file)
 
@@ -528,13 +731,19 @@ class Data:
 
     def _save_userconfig(self):
         self.msg.debug(self.name, "Saving userconfig...")
-        utils.save_config(self.userconfig, self.userconfig_file)
+        # Keep the mediatype to load next time, see __init__
+        utils.save_config(dict(self.userconfig, mediatype=self.saved_mediatype),
+                          self.userconfig_file)
 
     def _load_queue(self):
         self.msg.debug(self.name, "Reading queue...")
         self.queue = utils.load_data(self.queue_file)
 
     def _save_queue(self):
+        if self._defer_depth:
+            self._deferred.add('queue')
+            return
+
         self.msg.debug(self.name, "Saving queue...")
         utils.save_data(self.queue, self.queue_file)
 
@@ -578,6 +787,7 @@ class Data:
                     showid = info['id']
                     self.api.merge(self.showlist[showid], info)
 
+        self._rebuild_indexes()
         self._save_cache()
         self.api.logout()
 
@@ -608,7 +818,7 @@ class Data:
         if os.path.isfile(self.lock_file):
             raise utils.DataFatal("Database is locked by another process. "
                                   "If you\'re sure there's no other process is using it, "
-                                  "remove the file ~/.trackma/lock")
+                                  "remove the file %s" % self.lock_file)
 
         f = open(self.lock_file, 'w')
         f.close()
@@ -14,23 +14,26 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import re
+import contextlib
 import os
 import sys
-import subprocess
-import difflib
+import functools
 import time
 import datetime
-import random
-import shlex
-import shutil
 from decimal import Decimal
 
 from trackma import messenger
 from trackma import data
+from trackma import stats
 from trackma import utils
-from trackma.extras import AnimeInfoExtractor
-from trackma.extras import redirections
+from trackma.signals import SignalBus, report_to
+from trackma.startup import StartupPlan
+from trackma.titlesearch import TitleSearch
+from trackma.tracker.trackerlist import TrackerList
+
+# The hooks, redirections, filename parser and player helpers are
+# imported where they're used, so one-shot commands that never need
+# them start faster.
 
 
 class Engine:
@@ -52,12 +55,20 @@ class Engine:
     """
     data_handler = None
     tracker = None
+    tracker_list = None
     redirections = None
     config = {}
     msg = None
     loaded = False
     playing = False
     hooks_available = []
+    hooks_pending = []
+    hook_executor = None
+    hook_subscriptions = []
+    startup_timings = {}
+
+    # ExitStack of the outermost batch() while it's open
+    _batch = None
 
     name = 'Engine'
 
@@ -66,6 +77,8 @@ class Engine:
                'episode_changed':   None,
                'score_changed':     None,
                'status_changed':    None,
+               'tags_changed':      None,
+               'changes_applied':   None,
                'show_synced':       None,
                'sync_complete':     None,
                'queue_changed':     None,
@@ -75,17 +88,20 @@ class Engine:
                'tracker_state':     None,
                }
 
-    def __init__(self, account=None, message_handler=None, accountnum=None):
+    def __init__(self, account=None, message_handler=None, accountnum=None, mediatype=None):
         self.msg = messenger.Messenger(message_handler)
+        self.signal_stats = stats.CallStats()
+        self.bus = SignalBus(self.signals, coalesce=('queue_changed',),
+                             stats=self.signal_stats, on_error=report_to(self))
 
         # Utility parameter to get the account from the account manager
         if accountnum:
             from trackma import accounts
             account = accounts.AccountManager().get_account(accountnum)
 
-        # Initialize
+        # Initialize; a mediatype given here isn't remembered for next time
         self._load(account)
-        self._init_data_handler()
+        self._init_data_handler(mediatype, remember_mediatype=False)
 
     def _load(self, account):
         self.account = account
@@ -116,15 +132,16 @@ class Engine:
         self.searchdirs = [path for path in utils.expand_paths(
             self.config['searchdir']) if self._searchdir_exists(path)]
 
-    def _init_data_handler(self, mediatype=None):
+    def _init_data_handler(self, mediatype=None, remember_mediatype=True):
         # Create data handler
         self.data_handler = data.Data(
-            self.msg, self.config, self.account, mediatype)
+            self.msg, self.config, self.account, mediatype, remember_mediatype)
         self.data_handler.connect_signal('show_synced', self._data_show_synced)
         self.data_handler.connect_signal(
             'sync_complete', self._data_sync_complete)
         self.data_handler.connect_signal(
             'queue_changed', self._data_queue_changed)
+        self.titlesearch = TitleSearch(self.data_handler)
 
         # Record the API details
         (self.api_info, self.mediainfo) = self.data_handler.get_api_info()
@@ -166,55 +183,66 @@ class Engine:
 
     def _emit_signal(self, signal, *args):
         try:
-            # Call the signal function
-            if self.signals[signal]:
-                self.signals[signal](*args)
+            # Call the signal function, the hooks are subscribers
+            self.bus.emit(signal, *args)
         except AttributeError:
             pass
 
-        # If there are loaded hooks, call the functions in all of them
-        for module in self.hooks_available:
-            method = getattr(module, signal, None)
-            if method is not None:
-                self.msg.debug(self.name, "Calling hook {}:{}...".format(
-                    module.__name__, signal))
-                try:
-                    method(self, *args)
-                except Exception as err:
-                    self.msg.warn(self.name, "Exception on hook {}:{}: {}".format(
-                        module.__name__, signal, err))
-
     def _get_tracker_list(self, filter_num=None):
-        tracker_list = {}
         if isinstance(filter_num, type(None)):
-            source_list = self.get_list()
+            # The full list is built once and then patched by _update_tracker
+            if self.tracker_list is None:
+                self.tracker_list = TrackerList(
+                    (self._get_tracker_entry(show) for show in self.get_list()),
+                    self.data_handler.get_altnames_map())
+            return self.tracker_list
         elif isinstance(filter_num, list):
             source_list = []
             for status in filter_num:
                 if status is not self.mediainfo['statuses_finish']:
                     self.msg.debug(self.name, "Scanning for "
                                    "{}".format(self.mediainfo['statuses_dict'][status]))
-                    source_list = source_list + self.filter_list(status)
+                    source_list.extend(self.filter_list(status))
         else:
             source_list = self.filter_list(filter_num)
 
+        tracker_list = {}
         for show in source_list:
-            tracker_list[show['id']] = {
-                'id': show['id'],
-                'title': show['title'],
-                'my_progress': show['my_progress'],
-                'total': show['total'],
-                'type': None,
-                'titles': self.data_handler.get_show_titles(show),
-            }
+            tracker_list[show['id']] = self._get_tracker_entry(show)
 
         altnames_map = self.data_handler.get_altnames_map()
         return (tracker_list, altnames_map)
 
-    def _update_tracker(self):
+    def _get_tracker_entry(self, show):
+        return {
+            'id': show['id'],
+            'title': show['title'],
+            'my_progress': show['my_progress'],
+            'total': show['total'],
+            'type': None,
+            'titles': self.data_handler.get_show_titles(show),
+        }
+
+    def _update_tracker(self, show=None, deleted=False):
+        """
+        Updates the tracker list. If a **show** is given only its entry is
+        patched, otherwise the whole list is rebuilt.
+        """
+        if show and self.tracker_list is not None:
+            if deleted:
+                self.tracker_list.remove_show(show['id'])
+            else:
+                self.tracker_list.update_show(self._get_tracker_entry(show))
+            return
+
+        self.tracker_list = None
         if self.tracker:
             self.tracker.update_list(self._get_tracker_list())
 
+    def _update_tracker_altname(self, showid, altname):
+        if self.tracker_list is not None:
+            self.tracker_list.set_altname(showid, altname)
+
     def _cleanup(self):
         # If the engine wasn't closed for whatever reason, do it
         if self.loaded:
@@ -226,33 +254,120 @@ class Engine:
 
     def connect_signal(self, signal, callback):
         try:
-            self.signals[signal] = callback
+            self.bus.connect(signal, callback)
+        except KeyError:
+            raise utils.EngineFatal("Invalid signal.")
+
+    def subscribe_signal(self, signal, callback, queued=False):
+        """
+        Adds **callback** as an additional listener of **signal**.
+        Unlike connect_signal, it doesn't replace the existing ones.
+        With **queued**, it's called on a separate thread, see SignalBus.
+        """
+        try:
+            self.bus.subscribe(signal, callback, queued)
+        except KeyError:
+            raise utils.EngineFatal("Invalid signal.")
+
+    def unsubscribe_signal(self, signal, callback):
+        """Removes a listener added with subscribe_signal."""
+        try:
+            self.bus.unsubscribe(signal, callback)
         except KeyError:
             raise utils.EngineFatal("Invalid signal.")
 
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager that coalesces the queue_changed signals emitted
+        inside it into a single one, emitted when it closes. Use it around
+        bulk changes so interfaces redraw only once.
+
+        Once the engine is started, the list cache and the queue are also
+        written only once, when it closes, and the queue is sent then if
+        autosend asks for it; see Data.deferred. A data handler loaded
+        inside it, like by reload(), is held back the same way.
+        """
+        with self.bus.batch():
+            if self._batch is not None:
+                # Nested, the outermost one defers the data handler
+                yield self
+                return
+
+            with contextlib.ExitStack() as stack:
+                self._batch = stack
+                try:
+                    if self.loaded:
+                        stack.enter_context(self.data_handler.deferred())
+                    yield self
+                finally:
+                    self._batch = None
+
+    def _set_loaded(self):
+        self.loaded = True
+        if self._batch is not None:
+            # Started inside batch(), e.g. by reload(); unloading the old
+            # data handler already did what it was holding back
+            self._batch.enter_context(self.data_handler.deferred())
+
     def set_message_handler(self, message_handler):
         """Changes the message handler function on the fly."""
         self.msg = messenger.Messenger(message_handler)
         self.data_handler.set_message_handler(self.msg)
 
-    def start(self):
+    def start(self, minimal=False):
         """
         Starts the engine.
         This function should be called before doing anything with the engine,
         as it initializes the data handler.
+
+        With **minimal**, only the cached list is loaded: there's no
+        automatic sync, and the redirections, hooks, library scan and
+        tracker are skipped. It's meant for quick one-shot commands.
         """
         if self.loaded:
             raise utils.TrackmaError("Already loaded.")
 
+        self.tracker_list = None
+
+        if minimal:
+            start = time.time()
+            self._start_data(sync=False)
+            self.startup_timings = {'data': time.time() - start}
+            self._set_loaded()
+            return True
+
+        # Independent phases run concurrently; the library scan and the
+        # tracker wait for the list and the redirections to be ready.
+        plan = StartupPlan(self.msg)
+        plan.add('data', self._start_data)
+        plan.add('redirections', self._load_redirections)
+        plan.add('hooks_import', self._import_hooks)
+        plan.add('hooks_init', self._init_hooks,
+                 requires=('data', 'hooks_import'))
+        plan.add('library', self._start_library,
+                 requires=('data', 'redirections'))
+        plan.add('tracker', self._start_tracker,
+                 requires=('data', 'redirections', 'library', 'hooks_init'))
+        self.startup_timings = plan.run()
+
+        self._set_loaded()
+        return True
+
+    def _start_data(self, sync=True):
         # Start the data handler
         try:
-            (self.api_info, self.mediainfo) = self.data_handler.start()
+            (self.api_info, self.mediainfo) = self.data_handler.start(sync)
         except utils.DataError as e:
             raise utils.DataFatal(str(e))
         except utils.APIError as e:
             raise utils.APIFatal(str(e))
 
+    def _load_redirections(self):
         # Load redirection file if supported
+        from trackma.extras import redirections
+
+        self.redirections = None
         api = self.api_info['shortname']
         mediatype = self.data_handler.userconfig['mediatype']
         if redirections.supports(api, mediatype):
@@ -262,27 +377,29 @@ class Engine:
                     self.name, "Using user-provided redirection file.")
             else:
                 fname = utils.to_data_path('anime-relations.txt')
-                if self.config['redirections_time'] and (
-                        not utils.file_exists(fname) or
-                        utils.file_older_than(fname, self.config['redirections_time'] * 86400)):
+                if self.config['redirections_time'] and utils.sync_outdated(
+                        fname, self.config['redirections_time'] * 86400):
                     self.msg.info(self.name, "Syncing redirection file...")
                     self.msg.debug(self.name, "Syncing from: %s" %
                                    self.config['redirections_url'])
-                    utils.sync_file(fname, self.config['redirections_url'])
+                    if not utils.sync_file(fname, self.config['redirections_url']):
+                        self.msg.debug(self.name, "Redirection file unchanged.")
 
             if not utils.file_exists(fname):
                 self.msg.debug(
                     self.name, "Defaulting to repo provided redirections file.")
                 fname = utils.DATADIR + '/anime-relations/anime-relations.txt'
 
-            self.msg.info(self.name, "Parsing redirection file...")
+            self.msg.info(self.name, "Loading redirection file...")
             try:
-                self.redirections = redirections.parse_anime_relations(
-                    fname, api)
+                self.redirections = redirections.RedirectionIndex(
+                    redirections.load_anime_relations(
+                        fname, api, utils.to_cache_path('anime-relations.%s.cache' % api)))
             except Exception as e:
                 self.msg.warn(self.name, "Error parsing anime-relations.txt!")
                 self.msg.debug(self.name, "{}".format(e))
 
+    def _start_library(self):
         # Rescan library if necessary
         if self.config['library_autoscan']:
             try:
@@ -291,7 +408,9 @@ class Engine:
                 self.msg.warn(
                     self.name, "Can't auto-scan library: {}".format(e))
 
+    def _import_hooks(self):
         # Load hook files
+        self.hooks_pending = []
         if self.config['use_hooks']:
             hooks_dir = utils.to_config_path('hooks')
             if os.path.isdir(hooks_dir):
@@ -299,17 +418,13 @@ class Engine:
 
                 self.msg.info(self.name, "Importing user hooks...")
                 for loader, name, ispkg in pkgutil.iter_modules([hooks_dir]):
-                    # List all the hook files in the hooks folder, import them
-                    # and call the init() function if they have them
-                    # We build the list "hooks available" with the loaded modules
-                    # for later calls.
+                    # List all the hook files in the hooks folder and import them.
+                    # They get initialized once the list is loaded.
                     try:
                         self.msg.debug(
                             self.name, "Importing hook {}...".format(name))
                         module = loader.find_module(name).load_module(name)
-                        if hasattr(module, 'init'):
-                            module.init(self)
-                        self.hooks_available.append(module)
+                        self.hooks_pending.append(module)
                     except ImportError:
                         self.msg.warn(
                             self.name, "Error importing hook {}.".format(name))
@@ -318,19 +433,34 @@ class Engine:
                         for line in traceback.format_exception(exc_type, exc_value, exc_traceback):
                             self.msg.debug(self.name, line.rstrip())
 
+    def _init_hooks(self):
+        # Call the init() function of the imported hooks if they have them
+        # We build the list "hooks available" with the loaded modules
+        # for later calls.
+        from trackma import hooks
+
+        self.hooks_available = []
+        self.hook_executor = hooks.HookExecutor(self, self.msg, self.config)
+        for module in self.hooks_pending:
+            if hasattr(module, 'init'):
+                module.init(self)
+            self.hooks_available.append(module)
+            self.hook_executor.add(module)
+        self.hooks_pending = []
+
+        # The hooks get every signal after the interface does
+        self.hook_subscriptions = [
+            (signal, functools.partial(self.hook_executor.emit, signal))
+            for signal in self.signals]
+        for (signal, callback) in self.hook_subscriptions:
+            self.bus.subscribe(signal, callback)
+
+    def _start_tracker(self):
         # Start tracker
         if self.mediainfo.get('can_play') and self.config['tracker_enabled']:
             self.msg.debug(self.name, "Initializing tracker...")
             try:
-                TrackerClass = self._get_tracker_class(
-                    self.config['tracker_type'])
-
-                self.tracker = TrackerClass(self.msg,
-                                            self._get_tracker_list(),
-                                            self.config,
-                                            self.searchdirs,
-                                            self.redirections,
-                                            )
+                self.tracker = self._create_tracker()
                 self.tracker.connect_signal('detected', self._tracker_detected)
                 self.tracker.connect_signal('removed', self._tracker_removed)
                 self.tracker.connect_signal('playing', self._tracker_playing)
@@ -342,25 +472,28 @@ class Engine:
                 self.msg.warn(self.name, "Couldn't import specified tracker: {}".format(
                     self.config['tracker_type']))
 
-        self.loaded = True
-        return True
-
-    def unload(self):
+    def unload(self, force=False):
         """
         Closes the data handler and closes the engine cleanly.
         This should be called when closing the client application, or when you're
         sure you're not going to use the engine anymore. This does all the necessary
         procedures to close the data handler cleanly and then itself.
+        With **force**, the queue isn't sent nor the metadata saved.
 
         """
         if self.loaded:
             self.msg.info(self.name, "Unloading...")
-            self.data_handler.unload()
+            self.data_handler.unload(force)
             if self.tracker:
                 self.tracker.disable()
 
             # If there are loaded hooks, unload them
             self.msg.info(self.name, "Unloading user hooks...")
+            for (signal, callback) in self.hook_subscriptions:
+                self.bus.unsubscribe(signal, callback)
+            self.hook_subscriptions = []
+            if self.hook_executor:
+                self.hook_executor.shutdown()
             for module in self.hooks_available.copy():
                 self.msg.debug(self.name, "Unloading hook {}...".format(
                     module.__name__))
@@ -368,12 +501,27 @@ class Engine:
                     if hasattr(module, 'destroy'):
                         module.destroy(self)
                     self.hooks_available.remove(module)
+                    self.hook_executor.remove(module)
                 except Exception as err:
                     self.msg.warn(self.name, "Error destroying hook {}: {}".format(
                         module.__name__, err))
 
             self.loaded = False
 
+    def stats(self):
+        """
+        Returns call statistics of the signals emitted by the engine.
+
+        The result has two dictionaries: 'signals', keyed by signal name,
+        with the time spent in the connected interface callback; and
+        'hooks', keyed by 'hook:signal', with the time spent in each hook.
+        Every entry has count, errors, total, mean and p95 (in seconds).
+        """
+        return {
+            'signals': self.signal_stats.snapshot(),
+            'hooks': self.hook_executor.stats.snapshot() if self.hook_executor else {},
+        }
+
     def reload(self, account=None, mediatype=None):
         """Changes the API and/or mediatype and reloads itself."""
         if self.loaded:
@@ -426,15 +574,15 @@ class Engine:
             except KeyError:
                 raise utils.EngineError("Show not found.")
         elif title:
-            showdict = self.data_handler.get()
-            # Get show by title, slower
-            for show in showdict.values():
-                if show['title'] == title:
-                    return show
+            # Get show by title
+            show = self.data_handler.get_by_title(title)
+            if show:
+                return show
             raise utils.EngineError("Show not found.")
         elif filename:
             # Guess show by filename
             self.msg.debug(self.name, "Guessing by filename.")
+            from trackma.extras import AnimeInfoExtractor
 
             aie = AnimeInfoExtractor(filename)
             (show_title, ep) = aie.getName(), aie.getEpisode()
@@ -457,24 +605,25 @@ class Engine:
         """
         return self.data_handler.info_get(show)
 
-    def regex_list(self, regex):
+    def regex_list(self, regex, altnames=False):
         """
-        It asks the data handler to do a regex search for a show and returns the
+        It does a regex search for a show and returns the
         list of show dictionaries with all the matches.
+        If **altnames** is set, aliases and alternative names are searched too.
         """
-        showlist = self.data_handler.get()
-        return list(v for k, v in showlist.items() if re.search(regex, v['title'], re.I))
+        return self.titlesearch.search(regex, altnames)
 
-    def regex_list_titles(self, pattern):
-        # TODO : Temporal hack for the client autocomplete function
-        showlist = self.data_handler.get()
+    def regex_list_titles(self, pattern, altnames=False):
+        """
+        Returns the titles starting with **pattern**, quoted for the
+        client autocomplete function.
+        """
         newlist = list()
-        for v in showlist.values():
-            if re.match(pattern, v['title'], re.I):
-                if ' ' in v['title']:
-                    newlist.append('"' + v['title'] + '" ')
-                else:
-                    newlist.append(v['title'] + ' ')
+        for title in self.titlesearch.complete(pattern, altnames):
+            if ' ' in title:
+                newlist.append('"' + title + '" ')
+            else:
+                newlist.append(title + ' ')
 
         return newlist
 
@@ -520,7 +669,7 @@ class Engine:
         self.data_handler.queue_add(show)
 
         # Update the tracker with the new information
-        self._update_tracker()
+        self._update_tracker(show)
 
         # Emit signal
         self._emit_signal('show_added', show)
@@ -534,17 +683,10 @@ class Engine:
         if not self.mediainfo.get('can_update'):
             raise utils.EngineError('Operation not supported by API.')
 
-        # Check for the episode number
-        try:
-            newep = int(newep)
-        except ValueError:
-            raise utils.EngineError('Episode must be numeric.')
-
         # Get the show info
         show = self.get_show_info(showid)
         # More checks
-        if (show['total'] and newep > show['total']) or newep < 0:
-            raise utils.EngineError('Episode out of limits.')
+        newep = self._check_episode(show, newep)
         if show['my_progress'] == newep:
             raise utils.EngineError("Show already at episode %d" % newep)
 
@@ -596,7 +738,7 @@ class Engine:
                     self.name, 'Updated episode but dates weren\'t changed: %s' % e)
 
         # Update the tracker with the new information
-        self._update_tracker()
+        self._update_tracker(show)
 
         return show
 
@@ -630,21 +772,11 @@ class Engine:
         if not self.mediainfo.get('can_score'):
             raise utils.EngineError('Operation not supported by API.')
 
-        # Check for the correctness of the score
-        if (Decimal(str(newscore)) % Decimal(str(self.mediainfo['score_step']))) != 0:
-            raise utils.EngineError('Invalid score.')
-
-        # Convert to proper type
-        if isinstance(self.mediainfo['score_step'], int):
-            newscore = int(newscore)
-        else:
-            newscore = float(newscore)
+        newscore = self._check_score(newscore)
 
         # Get the show and update it
         show = self.get_show_info(showid)
         # More checks
-        if newscore > self.mediainfo['score_max']:
-            raise utils.EngineError('Score out of limits.')
         if show['my_score'] == newscore:
             raise utils.EngineError("Score already at %s" % newscore)
 
@@ -684,15 +816,8 @@ class Engine:
         if not self.mediainfo.get('can_status'):
             raise utils.EngineError('Operation not supported by API.')
 
-        try:
-            newstatus = int(newstatus)
-        except ValueError:
-            pass  # It's not necessary for it to be an int
-
-        # Check if the status is valid
+        newstatus = self._check_status(newstatus)
         _statuses = self.mediainfo['statuses_dict']
-        if newstatus not in _statuses:
-            raise utils.EngineError('Invalid status.')
 
         # Get the show and update it
         show = self.get_show_info(showid)
@@ -737,6 +862,140 @@ class Engine:
 
         return show
 
+    def apply_changes(self, changes, skip_invalid=False):
+        """
+        Applies many changes to the list at once and queues them
+        for the next sync.
+
+        **changes** is a list of dictionaries with the 'id' of a show
+        and any of its new my_progress, my_score, my_status, my_tags,
+        my_start_date and my_finish_date. All of them are checked before
+        anything is changed: if one is invalid an EngineError is raised
+        and the list is left as it was, or with **skip_invalid** that
+        change is left out with a warning. Values the show already has
+        are skipped, and unlike set_episode no status or date is changed
+        automatically.
+
+        The list and the queue are saved once, and the changes_applied
+        signal is emitted once with the changed shows, after the usual
+        signals of each change. Returns the changed shows.
+        """
+        updates = {}
+        for change in changes:
+            change = dict(change)
+            try:
+                show = self.get_show_info(change.pop('id', None))
+                if not show:
+                    raise utils.EngineError('Missing show ID.')
+
+                try:
+                    values = {key: self.check_change(show, key, value)
+                              for (key, value) in change.items()}
+                except utils.EngineError as e:
+                    raise utils.EngineError('%s: %s' % (show['title'], e))
+            except utils.EngineError as e:
+                if not skip_invalid:
+                    raise
+                self.msg.warn(self.name, "Skipping change: %s" % e)
+                continue
+
+            for (key, value) in values.items():
+                if show[key] != value:
+                    updates.setdefault(show['id'], (show, {}))[1][key] = value
+
+        updates = [(show, values) for (show, values) in updates.values() if values]
+        if not updates:
+            return []
+
+        self.msg.info(self.name, "Updating %d shows..." % len(updates))
+        old_statuses = {show['id']: show['my_status'] for (show, values) in updates}
+        with self.batch():
+            self.data_handler.queue_updates(updates)
+
+            for (show, values) in updates:
+                if 'my_progress' in values:
+                    self._update_tracker(show)
+                    self._emit_signal('episode_changed', show)
+                if 'my_score' in values:
+                    self._emit_signal('score_changed', show)
+                if 'my_status' in values:
+                    self._emit_signal('status_changed', show, old_statuses[show['id']])
+                if 'my_tags' in values:
+                    self._emit_signal('tags_changed', show)
+
+        shows = [show for (show, values) in updates]
+        self._emit_signal('changes_applied', shows)
+        return shows
+
+    def check_change(self, show, key, value):
+        """
+        Checks that **key** of **show** can be set to **value** and returns
+        it as it should be stored. Raises an EngineError if it can't.
+        """
+        if key == 'my_progress':
+            if not self.mediainfo.get('can_update'):
+                raise utils.EngineError('Operation not supported by API.')
+            return self._check_episode(show, value)
+        elif key == 'my_score':
+            if not self.mediainfo.get('can_score'):
+                raise utils.EngineError('Operation not supported by API.')
+            return self._check_score(value)
+        elif key == 'my_status':
+            if not self.mediainfo.get('can_status'):
+                raise utils.EngineError('Operation not supported by API.')
+            return self._check_status(value)
+        elif key == 'my_tags':
+            if not self.mediainfo.get('can_tag'):
+                raise utils.EngineError('Operation not supported by API.')
+            return value
+        elif key in ('my_start_date', 'my_finish_date'):
+            if not self.mediainfo.get('can_date'):
+                raise utils.EngineError('Operation not supported by API.')
+            if value is not None and not isinstance(value, datetime.date):
+                raise utils.EngineError('%s must be a Date object.' % key)
+            return value
+        else:
+            raise utils.EngineError('Invalid key: %s' % key)
+
+    def _check_episode(self, show, newep):
+        try:
+            newep = int(newep)
+        except (TypeError, ValueError):
+            raise utils.EngineError('Episode must be numeric.')
+
+        if (show['total'] and newep > show['total']) or newep < 0:
+            raise utils.EngineError('Episode out of limits.')
+        return newep
+
+    def _check_score(self, newscore):
+        # Check for the correctness of the score
+        try:
+            if (Decimal(str(newscore)) % Decimal(str(self.mediainfo['score_step']))) != 0:
+                raise utils.EngineError('Invalid score.')
+        except ArithmeticError:
+            raise utils.EngineError('Invalid score.')
+
+        # Convert to proper type
+        if isinstance(self.mediainfo['score_step'], int):
+            newscore = int(newscore)
+        else:
+            newscore = float(newscore)
+
+        if newscore > self.mediainfo['score_max']:
+            raise utils.EngineError('Score out of limits.')
+        return newscore
+
+    def _check_status(self, newstatus):
+        try:
+            newstatus = int(newstatus)
+        except (TypeError, ValueError):
+            pass  # It's not necessary for it to be an int
+
+        # Check if the status is valid
+        if newstatus not in self.mediainfo['statuses_dict']:
+            raise utils.EngineError('Invalid status.')
+        return newstatus
+
     def delete_show(self, show):
         """
         Deletes **show** completely from the list and queues the list update for the next sync.
@@ -748,7 +1007,7 @@ class Engine:
         self.data_handler.queue_delete(show)
 
         # Update the tracker with the new information
-        self._update_tracker()
+        self._update_tracker(show, deleted=True)
 
         # Emit signal
         self._emit_signal('show_deleted', show)
@@ -802,18 +1061,20 @@ class Engine:
     def remove_from_library(self, path, filename):
         library = self.data_handler.library_get()
         library_cache = self.data_handler.library_cache_get()
-        tracker_list = self._get_tracker_list()
         fullpath = path+"/"+filename
         # Only remove if the filename matches library entry
         if filename in library_cache and library_cache[filename]:
-            (show_id, show_ep) = library_cache[filename]
-            if show_id and show_id in library \
-                    and show_ep and show_ep in library[show_id].keys():
-                if library[show_id][show_ep] == fullpath:
-                    self.msg.debug(
-                        self.name, "File removed from local library: %s" % fullpath)
-                    library_cache.pop(filename, None)
-                    library[show_id].pop(show_ep, None)
+            removed = False
+            for (show_id, show_ep_start, show_ep_end) in self._library_cache_segments(library_cache[filename]):
+                for show_ep in range(show_ep_start, show_ep_end+1):
+                    if show_id in library and library[show_id].get(show_ep) == fullpath:
+                        library[show_id].pop(show_ep, None)
+                        removed = True
+
+            if removed:
+                self.msg.debug(
+                    self.name, "File removed from local library: %s" % fullpath)
+                library_cache.pop(filename, None)
 
     def add_to_library(self, path, filename, rescan=False):
         # The inotify tracker tells us when files are created in
@@ -825,19 +1086,29 @@ class Engine:
         self._add_show_to_library(
             library, library_cache, rescan, fullpath, filename, tracker_list)
 
+    def _library_cache_segments(self, entry):
+        """
+        Returns the (show_id, start, end) segments of a library cache entry.
+        Entries are (show_id, ep), (show_id, (start, end)) or, for ranges
+        redirected across several shows, a list of the latter.
+        """
+        if isinstance(entry, list):
+            return [(show_id, start, end) for (show_id, (start, end)) in entry]
+
+        (show_id, show_ep) = entry
+        if type(show_ep) is tuple:
+            return [(show_id, show_ep[0], show_ep[1])]
+        return [(show_id, show_ep, show_ep)]
+
     def _add_show_to_library(self, library, library_cache, rescan, fullpath, filename, tracker_list):
-        show_id = None
+        segments = []
         if not rescan and filename in library_cache:
             # If the filename was already seen before
             # use the cached information, if there's no information (None)
             # then it means it doesn't correspond to any show in the list
             # and can be safely skipped.
             if library_cache[filename]:
-                (show_id, show_ep) = library_cache[filename]
-                if type(show_ep) is tuple:
-                    (show_ep_start, show_ep_end) = show_ep
-                else:
-                    show_ep_start = show_ep_end = show_ep
+                segments = self._library_cache_segments(library_cache[filename])
                 self.msg.debug(self.name, "File in cache: {}".format(fullpath))
             else:
                 self.msg.debug(
@@ -848,6 +1119,8 @@ class Engine:
             # the information from the filename and do a fuzzy search
             # on the user's list. Cache the information.
             # If it fails, cache it as None.
+            from trackma.extras import AnimeInfoExtractor
+
             aie = AnimeInfoExtractor(filename)
             show_title = aie.getName()
             (show_ep_start, show_ep_end) = aie.getEpisodeNumbers(True)
@@ -858,19 +1131,30 @@ class Engine:
                         self.name, "Adding to library: {}".format(fullpath))
 
                     if show_ep_start == show_ep_end:
-                        # TODO : Support redirections for episode ranges
                         (show, show_ep) = utils.redirect_show(
                             (show, show_ep_start), self.redirections, tracker_list)
-                        show_ep_end = show_ep_start = show_ep
 
                         self.msg.debug(self.name, "Redirected to: {} {}".format(
                             show['title'], show_ep))
                         library_cache[filename] = (show['id'], show_ep)
+                        segments = [(show['id'], show_ep, show_ep)]
                     else:
-                        library_cache[filename] = (
-                            show['id'], (show_ep_start, show_ep_end))
-
-                    show_id = show['id']
+                        # Range packs may cross into a sequel
+                        redirected = utils.redirect_range(
+                            show, show_ep_start, show_ep_end, self.redirections, tracker_list)
+                        segments = [(seg_show['id'], start, end)
+                                    for (seg_show, start, end) in redirected]
+
+                        for (seg_show, start, end) in redirected:
+                            self.msg.debug(self.name, "Redirected to: {} {}-{}".format(
+                                seg_show['title'], start, end))
+
+                        if len(segments) == 1:
+                            library_cache[filename] = (
+                                segments[0][0], (segments[0][1], segments[0][2]))
+                        else:
+                            library_cache[filename] = [
+                                (show_id, (start, end)) for (show_id, start, end) in segments]
                 else:
                     self.msg.debug(self.name,
                                    "Unable to match '{}', skipping: {}"
@@ -882,7 +1166,9 @@ class Engine:
                 library_cache[filename] = None
 
         # After we got our information, add it to our library
-        if show_id:
+        for (show_id, show_ep_start, show_ep_end) in segments:
+            if not show_id:
+                continue
             if show_id not in library:
                 library[show_id] = {}
             for show_ep in range(show_ep_start, show_ep_end+1):
@@ -923,6 +1209,7 @@ class Engine:
         if not newep:
             raise utils.EngineError('No new episodes found to pick from.')
 
+        import random
         show = random.choice(newep)
         return self.play_episode(show)
 
@@ -959,6 +1246,9 @@ class Engine:
 
             if filename:
                 self.msg.info(self.name, 'Found. Starting player...')
+                import shlex
+                import shutil
+
                 args = shlex.split(self.config['player'])
 
                 if len(args) > 0 and shutil.which(args[0]) == None:
@@ -988,7 +1278,7 @@ class Engine:
                 self.msg.info(
                     self.name, 'Changed alternate name to %s.' % newname)
             # Update the tracker with the new altname
-            self._update_tracker()
+            self._update_tracker_altname(showid, newname)
         else:
             return self.data_handler.altname_get(showid)
 
@@ -1003,8 +1293,7 @@ class Engine:
         Returns a show list with the shows in the specified **status_num** status.
         If you need a list with all the shows, use :func:`get_list`.
         """
-        showlist = self.data_handler.get()
-        return list(v for k, v in showlist.items() if v['my_status'] == status_num)
+        return self.data_handler.get_by_status(status_num)
 
     def list_download(self):
         """Asks the data handler to download the remote list."""
@@ -1061,6 +1350,34 @@ class Engine:
 
         return new_status
 
+    def _create_tracker(self):
+        tracker_args = (self.msg,
+                        self._get_tracker_list(),
+                        self.config,
+                        self.searchdirs,
+                        self.redirections,
+                        )
+
+        if not self.config['tracker_extra_types']:
+            TrackerClass = self._get_tracker_class(self.config['tracker_type'])
+            return TrackerClass(*tracker_args)
+
+        # Several sources were requested, run them all at once
+        from trackma.tracker.composite import CompositeTracker
+
+        tracker_classes = [self._get_tracker_class(self.config['tracker_type'])]
+        for ttype in self.config['tracker_extra_types']:
+            try:
+                TrackerClass = self._get_tracker_class(ttype)
+            except ImportError:
+                self.msg.warn(self.name, "Couldn't import extra tracker: {}".format(ttype))
+                continue
+
+            if TrackerClass not in tracker_classes:
+                tracker_classes.append(TrackerClass)
+
+        return CompositeTracker(*tracker_args, tracker_classes=tracker_classes)
+
     def _get_tracker_class(self, ttype):
         # Choose the tracker we want to tart
         if ttype == 'plex':
@@ -14,14 +14,63 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import bisect
+import os
+import pickle
+
 from trackma import utils
 
 SUPPORTED_APIS = ['mal', 'kitsu', 'anilist']
 SUPPORTED_MEDIATYPES = ['anime']
 
+# Bump whenever the format of the parsed relations changes
+CACHE_VERSION = 1
+
 def supports(api, mediatype):
     return api in SUPPORTED_APIS and mediatype in SUPPORTED_MEDIATYPES
 
+def read_last_modified(filename):
+    """
+    Returns the last_modified field of the meta section of the
+    relations file without parsing its rules.
+    """
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line[:16] == "- last_modified:":
+                return line[17:]
+            if line == "::rules":
+                break
+
+    return None
+
+def load_anime_relations(filename, api, cache_file):
+    """
+    Returns the parsed relations for **api**, using a cache of a previous
+    parse saved in **cache_file** if the relations file hasn't changed since.
+
+    The cache is keyed by the file's modification time, size and its
+    last_modified field, so a warm start doesn't have to parse anything.
+    """
+    stat = os.stat(filename)
+    key = (CACHE_VERSION, api, os.path.abspath(filename),
+           stat.st_mtime, stat.st_size, read_last_modified(filename))
+
+    try:
+        cached = utils.load_data(cache_file)
+        if cached['key'] == key:
+            return cached['relations']
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, TypeError, ValueError):
+        # Missing or unusable cache, parse it again
+        pass
+
+    relations = parse_anime_relations(filename, api)
+
+    utils.make_dir(os.path.dirname(cache_file))
+    utils.save_data({'key': key, 'relations': relations}, cache_file)
+
+    return relations
+
 def parse_anime_relations(filename, api, last=None):
     """
     Support for Taiga-style anime relations file.
@@ -37,8 +86,8 @@ def parse_anime_relations(filename, api, last=None):
 
         relations = {'meta': {}}
 
-        id_pattern = "(\d+|[\?~])\|(\d+|[\?~])\|(\d+|[\?~])"
-        ep_pattern = "(\d+)-?(\d+|\?)?"
+        id_pattern = r"(\d+|[\?~])\|(\d+|[\?~])\|(\d+|[\?~])"
+        ep_pattern = r"(\d+)-?(\d+|\?)?"
         full = r'- {0}:{1} -> {0}:{1}(!)?'.format(id_pattern, ep_pattern)
         _re = re.compile(full)
 
@@ -107,3 +156,117 @@ def parse_anime_relations(filename, api, last=None):
                     print("Not recognized. " + line)
 
         return relations
+
+class RedirectionIndex:
+    """
+    Interval index over the parsed relations.
+
+    Rules are kept per source ID sorted by their first episode, so
+    finding the rule for an episode is a binary search. Episode
+    ranges are split into one segment per rule they cross.
+    """
+
+    def __init__(self, relations):
+        self.meta = relations.get('meta', {}) if relations else {}
+        self.index = {}
+
+        if not relations:
+            return
+
+        for src_id, rules in relations.items():
+            if src_id == 'meta':
+                continue
+
+            ordered = sorted(rules, key=lambda rule: rule[0][0])
+            overlapping = any(
+                prev[0][1] == -1 or prev[0][1] >= rule[0][0]
+                for prev, rule in zip(ordered, ordered[1:]))
+
+            if overlapping:
+                # Keep the file order and check every rule, like before
+                self.index[src_id] = (None, rules)
+            else:
+                self.index[src_id] = ([rule[0][0] for rule in ordered], ordered)
+
+    def __contains__(self, src_id):
+        return src_id in self.index
+
+    def __bool__(self):
+        return bool(self.index)
+
+    @staticmethod
+    def _covers(src_eps, ep):
+        return ep >= src_eps[0] and (src_eps[1] == -1 or ep <= src_eps[1])
+
+    def lookup(self, src_id, ep):
+        """
+        Returns the candidate (dst_id, dst_ep) redirections for
+        episode **ep** of **src_id**, in priority order.
+        """
+        if src_id not in self.index:
+            return []
+
+        (starts, rules) = self.index[src_id]
+        if starts is None:
+            return [(dst_id, ep + (dst_eps[0] - src_eps[0]))
+                    for (src_eps, dst_id, dst_eps) in rules
+                    if self._covers(src_eps, ep)]
+
+        i = bisect.bisect_right(starts, ep) - 1
+        if i >= 0:
+            (src_eps, dst_id, dst_eps) = rules[i]
+            if self._covers(src_eps, ep):
+                return [(dst_id, ep + (dst_eps[0] - src_eps[0]))]
+
+        return []
+
+    def lookup_range(self, src_id, start, end, accept=None):
+        """
+        Splits the episodes **start** to **end** of **src_id** into
+        segments, returning a list of (dst_id, dst_start, dst_end).
+        Episodes not covered by any rule are returned under **src_id**.
+
+        If given, **accept** is called with a destination ID and tells
+        whether it can be used; like with lookup(), each episode goes to
+        the first candidate accepted, or stays under **src_id**.
+        """
+        if src_id not in self.index:
+            return [(src_id, start, end)]
+
+        (starts, rules) = self.index[src_id]
+        if starts is None:
+            # Overlapping rules; resolve the range episode by episode
+            segments = []
+            for ep in range(start, end + 1):
+                (dst_id, dst_ep) = next(
+                    (candidate for candidate in self.lookup(src_id, ep)
+                     if accept is None or accept(candidate[0])),
+                    (src_id, ep))
+                if segments and segments[-1][0] == dst_id and segments[-1][2] + 1 == dst_ep:
+                    segments[-1] = (dst_id, segments[-1][1], dst_ep)
+                else:
+                    segments.append((dst_id, dst_ep, dst_ep))
+            return segments
+
+        segments = []
+        ep = start
+        i = max(bisect.bisect_right(starts, start) - 1, 0)
+        while ep <= end:
+            if i < len(rules) and rules[i][0][0] <= ep:
+                (src_eps, dst_id, dst_eps) = rules[i]
+                if self._covers(src_eps, ep):
+                    seg_end = end if src_eps[1] == -1 else min(end, src_eps[1])
+                    if accept is None or accept(dst_id):
+                        offset = dst_eps[0] - src_eps[0]
+                        segments.append((dst_id, ep + offset, seg_end + offset))
+                    else:
+                        segments.append((src_id, ep, seg_end))
+                    ep = seg_end + 1
+                i += 1
+            else:
+                # Not redirected until the next rule starts
+                seg_end = end if i >= len(rules) else min(end, rules[i][0][0] - 1)
+                segments.append((src_id, ep, seg_end))
+                ep = seg_end + 1
+
+        return segments
@@ -0,0 +1,192 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections
+import threading
+import time
+from concurrent import futures
+
+from trackma import stats
+
+
+class HookExecutor:
+    """
+    Delivers engine signals to user hooks without blocking the caller.
+
+    Every hook module gets its own bounded queue, and its calls run
+    one at a time and in order on a shared pool of worker threads.
+    If the queue of a hook is full, new calls to it are dropped.
+
+    Python threads can't be interrupted, so a call that runs past the
+    timeout is only reported; the hook gets no new calls until it
+    returns. Hooks that need to run inline (e.g. to see the engine
+    before the signal handler returns) can set ``synchronous = True``,
+    or a list of signal names, in their module.
+    """
+    name = 'Hooks'
+
+    def __init__(self, engine, messenger, config):
+        self.engine = engine
+        self.msg = messenger
+        self.queue_size = config['hooks_queue_size']
+        self.timeout = config['hooks_timeout']
+        self.slow_threshold = config['hooks_slow_threshold']
+
+        self.modules = []
+        self.queues = {}
+        self.running = {}
+        self.stalled = set()
+        self.slow = {}
+        self.dropped = collections.Counter()
+        self.stats = stats.CallStats()
+
+        self._lock = threading.Lock()
+        self._pool = futures.ThreadPoolExecutor(
+            max_workers=config['hooks_workers'], thread_name_prefix='trackma-hook')
+        self._closed = False
+
+    def add(self, module):
+        """Starts delivering signals to the hook **module**."""
+        with self._lock:
+            self.modules.append(module)
+            self.queues[module.__name__] = collections.deque()
+
+    def remove(self, module):
+        """Stops delivering signals to the hook **module**."""
+        with self._lock:
+            if module in self.modules:
+                self.modules.remove(module)
+            self.queues.pop(module.__name__, None)
+
+    def is_synchronous(self, module, signal):
+        synchronous = getattr(module, 'synchronous', False)
+        if isinstance(synchronous, bool):
+            return synchronous
+        return signal in synchronous
+
+    def emit(self, signal, *args):
+        """Calls **signal** on every hook that implements it."""
+        for module in list(self.modules):
+            method = getattr(module, signal, None)
+            if method is None:
+                continue
+
+            if self._closed or self.is_synchronous(module, signal):
+                self._call(module, signal, method, args)
+            else:
+                self._submit(module, signal, method, args)
+
+    def _submit(self, module, signal, method, args):
+        hook = module.__name__
+        with self._lock:
+            queue = self.queues.get(hook)
+            if queue is None:
+                return
+
+            if self._check_timeout(hook) or len(queue) >= self.queue_size:
+                self.dropped[hook] += 1
+                self.msg.warn(self.name, "Hook {} is busy, dropping {}.".format(
+                    hook, signal))
+                return
+
+            queue.append((module, signal, method, args))
+            if hook in self.running:
+                # Its worker will pick this call up
+                return
+            self.running[hook] = None
+
+        self._pool.submit(self._drain, hook)
+
+    def _check_timeout(self, hook):
+        current = self.running.get(hook)
+        if current is None:
+            return hook in self.stalled
+
+        (signal, start) = current
+        if time.time() - start > self.timeout:
+            if hook not in self.stalled:
+                self.stalled.add(hook)
+                self.msg.warn(self.name, "Hook {}:{} timed out after {}s.".format(
+                    hook, signal, self.timeout))
+            return True
+        return False
+
+    def _drain(self, hook):
+        while True:
+            with self._lock:
+                queue = self.queues.get(hook)
+                if not queue:
+                    self.running.pop(hook, None)
+                    return
+                (module, signal, method, args) = queue.popleft()
+                self.running[hook] = (signal, time.time())
+
+            self._call(module, signal, method, args)
+
+            with self._lock:
+                self.stalled.discard(hook)
+
+    def _call(self, module, signal, method, args):
+        self.msg.debug(self.name, "Calling hook {}:{}...".format(
+            module.__name__, signal))
+        start = time.time()
+        error = False
+        try:
+            method(self.engine, *args)
+        except Exception as err:
+            error = True
+            self.msg.warn(self.name, "Exception on hook {}:{}: {}".format(
+                module.__name__, signal, err))
+        finally:
+            self._record(module.__name__, signal, time.time() - start, error)
+
+    def _record(self, hook, signal, elapsed, error):
+        self.stats.record('{}:{}'.format(hook, signal), elapsed, error)
+        if elapsed < self.slow_threshold:
+            return
+
+        with self._lock:
+            (count, longest) = self.slow.get((hook, signal), (0, 0))
+            self.slow[(hook, signal)] = (count + 1, max(longest, elapsed))
+
+    def slow_report(self):
+        """
+        Returns a list of (hook, signal, slow calls, longest call)
+        for the hooks that went over the slow threshold.
+        """
+        with self._lock:
+            return sorted(((hook, signal, count, longest)
+                           for ((hook, signal), (count, longest)) in self.slow.items()),
+                          key=lambda item: item[3], reverse=True)
+
+    def shutdown(self, wait=True):
+        """
+        Stops accepting asynchronous calls and waits up to the timeout
+        for the queued ones to finish. Later signals run inline.
+        """
+        self._closed = True
+        if wait:
+            deadline = time.time() + self.timeout
+            while self.running and time.time() < deadline:
+                time.sleep(0.05)
+        self._pool.shutdown(wait=False)
+
+        for (hook, signal, count, longest) in self.slow_report():
+            self.msg.warn(self.name, "Hook {}:{} was slow {} time(s), longest {:.2f}s.".format(
+                hook, signal, count, longest))
+        for hook, dropped in self.dropped.items():
+            self.msg.warn(self.name, "Hook {} dropped {} call(s).".format(
+                hook, dropped))
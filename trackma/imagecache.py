@@ -0,0 +1,410 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Image cache shared by the user interfaces.
+
+Images are downloaded by a small pool of worker threads that keep their
+HTTP connections open between requests. Asking for an image that's
+already being downloaded waits for that download instead of starting
+another one.
+
+Every image is stored once as downloaded, plus one scaled copy for
+every size it was requested with. Files are evicted, least recently
+used first, once the cache grows over its byte budget.
+"""
+
+import collections
+import hashlib
+import itertools
+import os
+import queue
+import re
+import threading
+from concurrent import futures
+
+from trackma import utils
+
+MAX_BYTES = 64 * 1024 * 1024
+MAX_WORKERS = 4
+MAX_REDIRECTS = 5
+
+# Prefetches go after anything an interface is waiting for
+PREFETCH_PRIORITY = 100
+
+# Images the interfaces kept in the cache directory before there was an
+# image cache, named <api>_<mediatype>_[f_]<show id>.jpg
+OLD_IMAGE_RE = re.compile(r'[a-z]+_[a-z]+_(f_)?.+\.jpg')
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the image cache shared by the whole process."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            path = utils.to_cache_path('images')
+            if not os.path.isdir(path):
+                # First run with the image cache
+                remove_old_images(utils.to_cache_path())
+            _cache = ImageCache(path)
+        return _cache
+
+
+def remove_old_images(directory):
+    """Deletes the images older versions left directly in **directory**."""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+
+    for name in names:
+        if OLD_IMAGE_RE.fullmatch(name):
+            try:
+                os.unlink(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+class ImageCache:
+    """
+    Downloads images in the background and keeps them in **path**.
+
+    fetch() returns a concurrent.futures.Future with the filename of the
+    image; it may be cancelled as long as the download hasn't started.
+    Lower **priority** numbers are downloaded first.
+    """
+
+    def __init__(self, path=None, max_bytes=MAX_BYTES, max_workers=MAX_WORKERS):
+        self.path = path or utils.to_cache_path('images')
+        self.max_bytes = max_bytes
+        self.max_workers = max(1, max_workers)
+
+        # Reentrant, since cancelling a job runs _finish()
+        self._lock = threading.RLock()
+        self._requests = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._pending = {}
+        self._workers = []
+        self._local = threading.local()
+
+        self._url_locks = {}
+        self._entries = None
+        self._total = 0
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def filename(self, url, size=None):
+        """Returns where the image of **url** scaled to **size** is (or will be) stored."""
+        if size:
+            return os.path.join(self.path, '%s_%dx%d.jpg' % (self._key(url), size[0], size[1]))
+        return os.path.join(self.path, self._key(url))
+
+    def cached(self, url, size=None):
+        """Returns the filename of the image if it's in the cache, or None."""
+        filename = self.filename(url, size)
+        with self._lock:
+            if not os.path.isfile(filename):
+                return None
+            self._touch(filename)
+        return filename
+
+    def fetch(self, url, size=None, priority=0):
+        """
+        Returns a future that resolves to the filename of the image of
+        **url**, scaled to fit **size** (width, height) if given.
+
+        Every caller gets its own future; the download itself is only
+        cancelled once all the callers waiting for it have cancelled.
+        """
+        future = futures.Future()
+        filename = self.cached(url, size)
+        if filename:
+            future.set_result(filename)
+            return future
+
+        request = (url, tuple(size) if size else None)
+        with self._lock:
+            job = self._pending.get(request)
+            if job is None:
+                job = futures.Future()
+                job.priority = priority
+                job.waiters = set()
+                self._pending[request] = job
+                job.add_done_callback(lambda j: self._finish(request, j))
+                enqueue = True
+            else:
+                # Queue it again if it's now wanted sooner; the worker
+                # skips whichever entry comes last
+                enqueue = priority < job.priority
+                job.priority = min(priority, job.priority)
+            job.waiters.add(future)
+
+            if enqueue:
+                self._requests.put((priority, next(self._order), request, job))
+                if len(self._workers) < min(self.max_workers, self._requests.qsize()):
+                    worker = threading.Thread(target=self._work, daemon=True,
+                                              name='trackma-image-%d' % len(self._workers))
+                    self._workers.append(worker)
+                    worker.start()
+
+        future.add_done_callback(lambda f: self._abandon(job, f))
+        return future
+
+    def _abandon(self, job, future):
+        if not future.cancelled():
+            return
+        with self._lock:
+            job.waiters.discard(future)
+            if not job.waiters:
+                # Only possible if no worker has started it yet
+                job.cancel()
+
+    def _finish(self, request, job):
+        with self._lock:
+            if self._pending.get(request) is job:
+                del self._pending[request]
+            waiters = job.waiters
+            job.waiters = set()
+
+        for future in waiters:
+            if job.cancelled():
+                future.cancel()
+            elif not future.set_running_or_notify_cancel():
+                continue
+            elif job.exception():
+                future.set_exception(job.exception())
+            else:
+                future.set_result(job.result())
+
+    def _work(self):
+        while True:
+            (priority, order, (url, size), job) = self._requests.get()
+            with self._lock:
+                if job.done() or job.running():
+                    continue
+                if not job.set_running_or_notify_cancel():
+                    continue
+
+            try:
+                job.set_result(self._get(url, size))
+            except Exception as e:
+                job.set_exception(e)
+
+    def _get(self, url, size):
+        original = self.filename(url)
+
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        try:
+            # Only one worker downloads an image, even for different sizes
+            with url_lock:
+                if not os.path.isfile(original):
+                    self._store(original, self._download(url))
+        finally:
+            with self._lock:
+                self._url_locks.pop(url, None)
+
+        if not size:
+            return original
+
+        try:
+            from PIL import Image
+        except ImportError:
+            # Can't scale; the interface has to do with the original
+            return original
+
+        import io
+
+        scaled = io.BytesIO()
+        with Image.open(original) as image:
+            image.thumbnail(size, Image.LANCZOS)
+            image.convert('RGB').save(scaled, 'JPEG')
+
+        filename = self.filename(url, size)
+        self._store(filename, scaled.getvalue())
+        return filename
+
+    def _connection(self, scheme, netloc):
+        import http.client
+
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        connection = connections.get((scheme, netloc))
+        if connection is None:
+            if scheme == 'https':
+                connection = http.client.HTTPSConnection(netloc, timeout=30)
+            elif scheme == 'http':
+                connection = http.client.HTTPConnection(netloc, timeout=30)
+            else:
+                raise utils.TrackmaError("Unsupported image URL: %s" % scheme)
+            connections[(scheme, netloc)] = connection
+        return connection
+
+    def _download(self, url):
+        import http.client
+        import urllib.parse
+
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            headers = {'User-Agent': 'TrackmaImage/{}'.format(utils.VERSION)}
+
+            # A kept-alive connection may have been closed by the server
+            # in the meantime, so retry once on a fresh one.
+            for attempt in range(2):
+                connection = self._connection(parts.scheme, parts.netloc)
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    connection.close()
+                    del self._local.connections[(parts.scheme, parts.netloc)]
+                    if attempt:
+                        raise utils.TrackmaError("Error getting image: %s" % e)
+
+            if response.will_close:
+                connection.close()
+                del self._local.connections[(parts.scheme, parts.netloc)]
+
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                url = urllib.parse.urljoin(url, response.getheader('Location'))
+                continue
+            if response.status != 200:
+                raise utils.TrackmaError("Error getting image: HTTP %d" % response.status)
+            return data
+
+        raise utils.TrackmaError("Error getting image: too many redirects")
+
+    def _load_entries(self):
+        # Called with the lock held
+        if self._entries is not None:
+            return
+
+        utils.make_dir(self.path)
+        files = []
+        for name in os.listdir(self.path):
+            filename = os.path.join(self.path, name)
+            if name.endswith('.tmp'):
+                continue
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, filename, stat.st_size))
+
+        self._entries = collections.OrderedDict()
+        self._total = 0
+        for (mtime, filename, size) in sorted(files):
+            self._entries[filename] = size
+            self._total += size
+
+    def _touch(self, filename):
+        # Called with the lock held
+        self._load_entries()
+        if filename in self._entries:
+            self._entries.move_to_end(filename)
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+
+    def _store(self, filename, data):
+        tmp_name = filename + '.tmp'
+        with self._lock:
+            self._load_entries()
+        with open(tmp_name, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_name, filename)
+
+        with self._lock:
+            self._total += len(data) - self._entries.pop(filename, 0)
+            self._entries[filename] = len(data)
+            self._trim(keep=filename)
+
+    def _trim(self, keep=None):
+        # Called with the lock held
+        for filename in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if filename == keep:
+                continue
+            self._total -= self._entries.pop(filename)
+            try:
+                os.unlink(filename)
+            except OSError:
+                pass
+
+    def size(self):
+        """Returns the bytes used by the cache."""
+        with self._lock:
+            self._load_entries()
+            return self._total
+
+
+class Prefetcher:
+    """
+    Keeps the images of the rows around the visible part of a list
+    downloading in the background, so selecting one of them shows its
+    image right away.
+
+    Call update() with the URLs that should be prefetched, most wanted
+    first, whenever the view scrolls or changes; prefetches for URLs
+    that aren't listed anymore are cancelled if they haven't started.
+    """
+
+    def __init__(self, size=None, cache=None, priority=PREFETCH_PRIORITY):
+        self.size = size
+        self.cache = cache or get_cache()
+        self.priority = priority
+        self.futures = {}
+
+    def update(self, urls):
+        wanted = {}
+        for url in urls:
+            if url in wanted:
+                continue
+            future = self.futures.pop(url, None)
+            if future is None:
+                if self.cache.cached(url, self.size):
+                    continue
+                future = self.cache.fetch(url, self.size, self.priority + len(wanted))
+            wanted[url] = future
+
+        self.clear()
+        self.futures = {url: future for (url, future) in wanted.items()
+                        if not future.done()}
+
+    def pending(self, url):
+        """Returns whether **url** is being prefetched."""
+        future = self.futures.get(url)
+        return future is not None and not future.done()
+
+    def clear(self):
+        """Cancels all the prefetches."""
+        for future in self.futures.values():
+            future.cancel()
+        self.futures = {}
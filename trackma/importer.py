@@ -0,0 +1,443 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Imports lists exported from other places into the current list.
+
+Entries are read one at a time from MyAnimeList XML exports (also
+gzipped) and from CSV, TSV or JSON files like the ones written by
+``trackma list --format``. Each one is matched to a show of the list,
+by title or, when asked to, by ID, or else to a remote show found with
+a search; the searches are remembered between imports. The differences
+with the list are then queued in one go.
+"""
+
+import csv
+import datetime
+import os
+import pickle
+import re
+
+from trackma import utils
+
+FORMATS = ('mal', 'csv', 'json')
+
+# Keys of an entry, besides id and title, and what they need from the API
+ENTRY_KEYS = {
+    'my_progress':    'can_update',
+    'my_score':       'can_score',
+    'my_status':      'can_status',
+    'my_tags':        'can_tag',
+    'my_start_date':  'can_date',
+    'my_finish_date': 'can_date',
+}
+
+# Fields of MyAnimeList exports, for anime and manga
+MAL_FIELDS = {
+    'series_animedb_id':   'id',
+    'manga_mangadb_id':    'id',
+    'series_title':        'title',
+    'manga_title':         'title',
+    'my_watched_episodes': 'my_progress',
+    'my_read_chapters':    'my_progress',
+    'my_score':            'my_score',
+    'my_status':           'my_status',
+    'my_tags':             'my_tags',
+    'my_start_date':       'my_start_date',
+    'my_finish_date':      'my_finish_date',
+}
+
+_READ_SIZE = 64 * 1024
+
+
+def guess_format(filename):
+    """Returns the format of **filename** from its extension, or None."""
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+
+    if name.endswith('.xml'):
+        return 'mal'
+    if name.endswith(('.csv', '.tsv')):
+        return 'csv'
+    if name.endswith(('.json', '.jsonl')):
+        return 'json'
+    return None
+
+
+def read_file(filename, fmt=None):
+    """
+    Yields the entries of **filename**, as dictionaries with an id,
+    a title and any of the ENTRY_KEYS, as strings or numbers.
+    """
+    fmt = fmt or guess_format(filename)
+    if fmt not in FORMATS:
+        raise utils.TrackmaError("Unknown import format for %s." % filename)
+
+    if fmt == 'mal':
+        # The parser wants bytes, it reads the encoding from the file
+        f = _open(filename, 'rb')
+        reader = read_mal_xml
+    else:
+        f = _open(filename, 'rt')
+        reader = read_csv if fmt == 'csv' else read_json
+
+    with f:
+        try:
+            yield from reader(f)
+        except (ValueError, SyntaxError, csv.Error) as e:
+            # SyntaxError includes the errors of the XML parser
+            raise utils.TrackmaError("Couldn't read %s: %s" % (filename, e))
+
+
+def _open(filename, mode):
+    try:
+        if filename.lower().endswith('.gz'):
+            import gzip
+            return gzip.open(filename, mode, encoding=None if 'b' in mode else 'utf-8')
+        if 'b' in mode:
+            return open(filename, mode)
+        return open(filename, mode, encoding='utf-8', newline='')
+    except OSError as e:
+        raise utils.TrackmaError("Couldn't open %s: %s" % (filename, e))
+
+
+def read_mal_xml(f):
+    """Yields the entries of a MyAnimeList XML export."""
+    from xml.etree import ElementTree
+
+    root = None
+    for (event, elem) in ElementTree.iterparse(f, events=('start', 'end')):
+        if root is None:
+            root = elem
+        elif event == 'end' and elem.tag in ('anime', 'manga'):
+            entry = {}
+            for child in elem:
+                key = MAL_FIELDS.get(child.tag)
+                if key:
+                    entry[key] = (child.text or '').strip()
+            yield entry
+
+            # Drop what has been parsed so far
+            root.clear()
+
+
+def read_csv(f):
+    """Yields the rows of a CSV or TSV file with a header line."""
+    header = f.readline()
+    delimiter = '\t' if '\t' in header else ','
+    fields = next(csv.reader([header], delimiter=delimiter), [])
+    for row in csv.DictReader(f, fieldnames=fields, delimiter=delimiter):
+        yield row
+
+
+def read_json(f):
+    """
+    Yields the objects of a JSON array, or of a file with one JSON
+    object per line, without loading the whole file at once.
+    """
+    import json
+
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    while True:
+        # Skip what separates the objects
+        buffer = buffer.lstrip(' \t\r\n[],')
+        if not buffer:
+            if eof:
+                return
+            chunk = f.read(_READ_SIZE)
+            eof = not chunk
+            buffer = chunk
+            continue
+
+        try:
+            (obj, end) = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise
+            # The object isn't complete yet
+            chunk = f.read(_READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+
+        if not isinstance(obj, dict):
+            raise ValueError("Expected a JSON object, got %s" % type(obj).__name__)
+        yield obj
+        buffer = buffer[end:]
+
+
+def normalize_title(title):
+    """Returns **title** in lowercase, with the punctuation and spacing collapsed."""
+    return re.sub(r'\W+', ' ', str(title).lower()).strip()
+
+
+class SearchCache:
+    """
+    Remembers the remote show (or None) each searched title matched to.
+    It's kept per API and mediatype, since show IDs differ between them.
+    """
+
+    def __init__(self, api, mediatype, path=None):
+        self.path = path or utils.to_cache_path('search', '%s.%s' % (api, mediatype))
+        self.changed = False
+        try:
+            self.results = utils.load_data(self.path)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            self.results = {}
+
+    def __contains__(self, title):
+        return normalize_title(title) in self.results
+
+    def get(self, title):
+        return self.results.get(normalize_title(title))
+
+    def set(self, title, show):
+        self.results[normalize_title(title)] = show
+        self.changed = True
+
+    def save(self):
+        if self.changed:
+            utils.make_dir(os.path.dirname(self.path))
+            utils.save_data(self.results, self.path)
+            self.changed = False
+
+
+class ImportPlan:
+    """
+    The result of comparing an import with the list.
+
+    **changes** are the changes to shows already in the list, in the form
+    Engine.apply_changes takes; **adds** are the remote shows to add,
+    already with the imported progress, score and status; **unmatched**
+    are the titles of the entries that matched no show.
+    """
+
+    def __init__(self):
+        self.entries = 0
+        self.changes = []
+        self.adds = []
+        self.unmatched = []
+
+
+class Importer:
+    """
+    Imports entries into the list of **engine**.
+
+    Entries are matched by title. With **use_ids**, the ID of an entry
+    is trusted to be a show ID of the current API and is tried first.
+    """
+    name = 'Importer'
+
+    def __init__(self, engine, use_ids=False, search_cache=None):
+        self.engine = engine
+        self.msg = engine.msg
+        self.use_ids = use_ids
+        self.mediainfo = engine.mediainfo
+        self.search_cache = search_cache or SearchCache(
+            engine.api_info['shortname'], engine.api_info['mediatype'])
+
+        self._statuses = {normalize_title(name).replace(' ', ''): status
+                          for (status, name) in self.mediainfo['statuses_dict'].items()}
+        self._titles = None
+
+    def import_file(self, filename, fmt=None, dry_run=False):
+        """Imports **filename** and returns the ImportPlan."""
+        plan = self.plan(read_file(filename, fmt))
+        if not dry_run:
+            self.apply(plan)
+        return plan
+
+    def plan(self, entries):
+        """Matches **entries** to shows and returns an ImportPlan with the differences."""
+        plan = ImportPlan()
+        added = set()
+        try:
+            for entry in entries:
+                plan.entries += 1
+                values = self._values(entry)
+                title = str(entry.get('title') or '').strip()
+
+                show = self._find_local(entry, title)
+                if show:
+                    # Only keep what would change
+                    values = {key: value for (key, value) in self._check(show, values).items()
+                              if show.get(key) != value}
+                    if values:
+                        values['id'] = show['id']
+                        plan.changes.append(values)
+                    continue
+
+                show = self._find_remote(title) if title else None
+                if show is None:
+                    plan.unmatched.append(title or entry.get('id'))
+                elif show['id'] not in added:
+                    added.add(show['id'])
+                    plan.adds.append(self._new_show(show, values))
+        finally:
+            self.search_cache.save()
+
+        self.msg.info(self.name, "%d entries: %d shows to change, %d to add, %d not found." % (
+            plan.entries, len(plan.changes), len(plan.adds), len(plan.unmatched)))
+        return plan
+
+    def apply(self, plan):
+        """
+        Queues the changes and adds of **plan** at once. Invalid ones
+        are skipped with a warning. Returns the number of shows changed
+        and added.
+        """
+        added = 0
+        with self.engine.batch():
+            changed = len(self.engine.apply_changes(plan.changes, skip_invalid=True))
+
+            for show in plan.adds:
+                try:
+                    self.engine.add_show(show, show['my_status'])
+                    added += 1
+                except utils.TrackmaError as e:
+                    self.msg.warn(self.name, "Couldn't add %s: %s" % (show['title'], e))
+
+        self.msg.info(self.name, "Imported: %d shows changed, %d added." % (changed, added))
+        return (changed, added)
+
+    def _values(self, entry):
+        values = {}
+        for (key, needs) in ENTRY_KEYS.items():
+            value = entry.get(key)
+            if value is None or value == '' or not self.mediainfo.get(needs):
+                continue
+
+            try:
+                value = getattr(self, '_convert_' + key.split('_', 1)[1])(value)
+            except (TypeError, ValueError):
+                self.msg.warn(self.name, "Ignoring invalid %s for %s: %s" % (
+                    key, entry.get('title'), value))
+                continue
+            if value is not None:
+                values[key] = value
+        return values
+
+    def _convert_progress(self, value):
+        return int(float(value))
+
+    def _convert_score(self, value):
+        score = float(value)
+        if not score:
+            # Exports use 0 for no score
+            return None
+        # Engine.check_change rounds it to the score step, or rejects it
+        return score
+
+    def _convert_status(self, value):
+        if isinstance(value, int) or str(value).isdigit():
+            if int(value) in self.mediainfo['statuses_dict']:
+                return int(value)
+        if value in self.mediainfo['statuses_dict']:
+            return value
+
+        status = self._statuses.get(normalize_title(value).replace(' ', ''))
+        if status is None:
+            raise ValueError(value)
+        return status
+
+    def _convert_tags(self, value):
+        return value
+
+    def _convert_start_date(self, value):
+        if isinstance(value, datetime.date):
+            return value
+        if not value.strip('0-'):
+            # 0000-00-00 is no date
+            return None
+        return datetime.date.fromisoformat(value)
+
+    _convert_finish_date = _convert_start_date
+
+    def _find_local(self, entry, title):
+        if self.use_ids and entry.get('id'):
+            showid = entry['id']
+            if isinstance(showid, str) and showid.isdigit():
+                showid = int(showid)
+            try:
+                return self.engine.get_show_info(showid)
+            except utils.EngineError:
+                pass
+
+        if self._titles is None:
+            # Titles, aliases and altnames of the list, built only once
+            self._titles = {}
+            for show in self.engine.get_list():
+                for name in [show['title']] + list(show.get('aliases') or []):
+                    self._titles.setdefault(normalize_title(name), show)
+            for (showid, altname) in self.engine.altnames().items():
+                try:
+                    self._titles.setdefault(normalize_title(altname),
+                                            self.engine.get_show_info(showid))
+                except utils.EngineError:
+                    pass
+
+        return self._titles.get(normalize_title(title))
+
+    def _find_remote(self, title):
+        if title in self.search_cache:
+            return self.search_cache.get(title)
+
+        try:
+            results = self.engine.search(title)
+        except utils.DataError:
+            # No results
+            results = []
+        except utils.TrackmaError as e:
+            # Try again next time
+            self.msg.warn(self.name, "Couldn't search for %s: %s" % (title, e))
+            return None
+
+        # Only an exact title is a safe guess
+        wanted = normalize_title(title)
+        show = None
+        for result in results:
+            names = [result['title']] + list(result.get('aliases') or [])
+            if any(normalize_title(name) == wanted for name in names):
+                show = result
+                break
+
+        self.search_cache.set(title, show)
+        return show
+
+    def _check(self, show, values):
+        # Checked like Engine.apply_changes does, but only the invalid
+        # values are left out
+        checked = {}
+        for (key, value) in values.items():
+            try:
+                checked[key] = self.engine.check_change(show, key, value)
+            except utils.EngineError:
+                self.msg.warn(self.name, "Ignoring invalid %s for %s: %s" % (
+                    key, show['title'], value))
+        return checked
+
+    def _new_show(self, show, values):
+        show = dict(utils.show(), **show)
+        if show['total'] and values.get('my_progress', 0) > show['total']:
+            values['my_progress'] = show['total']
+
+        show.update(self._check(show, values))
+        if show['my_status'] not in self.mediainfo['statuses_dict']:
+            show['my_status'] = self.mediainfo['statuses'][0]
+        return show
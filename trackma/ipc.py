@@ -0,0 +1,269 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Protocol and client for talking to trackma-daemon.
+
+Messages are JSON objects, one per line, over a Unix socket:
+
+- Requests: {"id": 1, "method": "get_list", "params": [...]}
+- Replies: {"id": 1, "result": ...} or
+  {"id": 1, "error": {"type": "EngineError", "message": "..."}}
+- Signals: {"signal": "episode_changed", "params": [...]}
+- Messages: {"message": ["Engine", 2, "Ready."]}
+- Reloads: {"reloaded": true}, after the daemon's engine changed account or mediatype.
+
+Values JSON can't represent (tuples, dates, dictionaries with
+non-string keys) are wrapped in single-key objects, see encode().
+"""
+
+import collections.abc
+import datetime
+import itertools
+import json
+import os
+import queue
+import socket
+import threading
+import traceback
+
+from trackma import messenger
+from trackma import utils
+from trackma.signals import report_to
+
+# Engine attributes clients can read
+ATTRIBUTES = ('api_info', 'mediainfo', 'config', 'account',
+              'loaded', 'playing', 'startup_timings')
+
+# The ones that only change when the engine reloads, so clients keep them
+CACHED_ATTRIBUTES = ('api_info', 'mediainfo', 'account')
+
+
+def socket_path():
+    """Returns the default path of the daemon socket."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'trackma.sock')
+    return utils.to_data_path('trackma.sock')
+
+
+def encode(obj):
+    """Converts **obj** into something json.dumps accepts, see decode()."""
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, dict):
+        if all(isinstance(key, str) for key in obj):
+            return {key: encode(value) for key, value in obj.items()}
+        return {'__dict__': [[encode(key), encode(value)] for key, value in obj.items()]}
+    if isinstance(obj, tuple):
+        return {'__tuple__': [encode(item) for item in obj]}
+    if isinstance(obj, datetime.datetime):
+        return {'__datetime__': obj.isoformat()}
+    if isinstance(obj, datetime.date):
+        return {'__date__': obj.isoformat()}
+    if isinstance(obj, (list, set, frozenset, collections.abc.KeysView, collections.abc.ValuesView)):
+        return [encode(item) for item in obj]
+    raise TypeError("Can't encode {}".format(type(obj).__name__))
+
+
+def decode(obj):
+    """Reverses encode()."""
+    if isinstance(obj, list):
+        return [decode(item) for item in obj]
+    if isinstance(obj, dict):
+        if len(obj) == 1:
+            (key, value) = next(iter(obj.items()))
+            if key == '__dict__':
+                return {_hashable(decode(k)): decode(v) for (k, v) in value}
+            if key == '__tuple__':
+                return tuple(decode(item) for item in value)
+            if key == '__datetime__':
+                return datetime.datetime.fromisoformat(value)
+            if key == '__date__':
+                return datetime.date.fromisoformat(value)
+        return {key: decode(value) for key, value in obj.items()}
+    return obj
+
+
+def _hashable(key):
+    return tuple(key) if isinstance(key, list) else key
+
+
+def dumps(message):
+    return (json.dumps(encode(message)) + '\n').encode('utf-8')
+
+
+def loads(line):
+    return decode(json.loads(line.decode('utf-8')))
+
+
+class EngineProxy:
+    """
+    Stands in for an Engine hosted by trackma-daemon.
+
+    Method calls are forwarded to the daemon and block until it replies;
+    Trackma errors raised by the engine are raised here too.
+    Signals and messages arrive in the background and are delivered on
+    a separate thread, so callbacks can call the engine back.
+
+    The daemon owns the engine, so start() does nothing and unload()
+    only closes the connection.
+
+    The attributes in CACHED_ATTRIBUTES are kept until the daemon's
+    engine reloads; the other ones are asked for every time.
+    """
+    name = 'EngineProxy'
+
+    def __init__(self, path=None, message_handler=None):
+        self.path = path or socket_path()
+        self.set_message_handler(message_handler)
+        self.signals = {}
+        self.cache = {}
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(self.path)
+        except OSError as e:
+            self.sock.close()
+            raise utils.EngineFatal("Couldn't connect to trackma-daemon: {}".format(e))
+        self.rfile = self.sock.makefile('rb')
+
+        self._ids = itertools.count(1)
+        self._replies = {}
+        # Taken to register a reply and to give up on all of them
+        self._replies_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._events = queue.Queue()
+        self._closed = False
+        self._on_error = report_to(self)
+
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        threading.Thread(target=self._dispatch_loop, daemon=True).start()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        if name in CACHED_ATTRIBUTES:
+            if name not in self.cache:
+                self.cache[name] = self._call('__getattr__', name)
+            return self.cache[name]
+        if name in ATTRIBUTES:
+            return self._call('__getattr__', name)
+
+        def method(*args):
+            return self._call(name, *args)
+        method.__name__ = name
+        return method
+
+    def _call(self, method, *params):
+        request_id = next(self._ids)
+        reply = [threading.Event(), None]
+        with self._replies_lock:
+            if self._closed:
+                raise utils.EngineFatal("Not connected to trackma-daemon.")
+            self._replies[request_id] = reply
+
+        try:
+            with self._send_lock:
+                self.sock.sendall(dumps({'id': request_id, 'method': method, 'params': list(params)}))
+        except OSError:
+            with self._replies_lock:
+                self._replies.pop(request_id, None)
+            raise utils.EngineFatal("Lost connection to trackma-daemon.")
+
+        reply[0].wait()
+        message = reply[1]
+        if message is None:
+            raise utils.EngineFatal("Lost connection to trackma-daemon.")
+        if 'error' in message:
+            error = getattr(utils, message['error']['type'], None)
+            if not (isinstance(error, type) and issubclass(error, (utils.TrackmaError, utils.TrackmaFatal))):
+                error = utils.EngineError
+            raise error(message['error']['message'])
+        return message['result']
+
+    def _read_loop(self):
+        try:
+            for line in self.rfile:
+                message = loads(line)
+                if 'id' in message:
+                    with self._replies_lock:
+                        reply = self._replies.pop(message['id'], None)
+                    if reply:
+                        reply[1] = message
+                        reply[0].set()
+                else:
+                    if 'reloaded' in message:
+                        # Right away, so replies read after this one
+                        # don't meet a stale cache
+                        self.cache.clear()
+                    self._events.put(message)
+        except (OSError, ValueError):
+            pass
+
+        # Wake up everyone still waiting for a reply
+        with self._replies_lock:
+            self._closed = True
+            (replies, self._replies) = (self._replies, {})
+        for reply in replies.values():
+            reply[0].set()
+        self._events.put(None)
+
+    def _dispatch_loop(self):
+        while True:
+            message = self._events.get()
+            if message is None:
+                return
+
+            try:
+                if 'signal' in message:
+                    callback = self.signals.get(message['signal'])
+                    if callback:
+                        callback(*message['params'])
+                elif 'message' in message:
+                    if self.message_handler:
+                        self.message_handler(*message['message'])
+            except Exception as e:
+                # Keep delivering the next ones
+                try:
+                    self._on_error(message.get('signal', 'message'), None, e)
+                except Exception:
+                    # The message handler itself failed
+                    traceback.print_exc()
+
+    def connect_signal(self, signal, callback):
+        self.signals[signal] = callback
+
+    def set_message_handler(self, message_handler):
+        self.message_handler = message_handler
+        self.msg = messenger.Messenger(message_handler)
+
+    def start(self, minimal=False):
+        pass
+
+    def reload(self, account=None, mediatype=None):
+        self.cache.clear()
+        return self._call('reload', account, mediatype)
+
+    def unload(self):
+        if not self._closed:
+            self._closed = True
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
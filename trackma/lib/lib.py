@@ -59,6 +59,10 @@ class lib():
 
     default_mediatype = None
 
+    # Headers sent with every request made through the opener
+    opener_headers = []
+    _opener = None
+
     # Supported signals for the data handler
     signals = {
         'show_info_changed': None,
@@ -71,6 +75,11 @@ class lib():
         self.msg = messenger
         self.msg.info(self.name, 'Initializing...')
 
+        # Several accounts of the same API can be loaded at once,
+        # so these can't be shared through the class.
+        self.signals = dict.fromkeys(self.signals)
+        self.api_info = dict(self.api_info)
+
         if not userconfig.get('mediatype'):
             userconfig['mediatype'] = self.default_mediatype
 
@@ -83,6 +92,23 @@ class lib():
         self.api_info['mediatype'] = self.mediatype
         self.api_info['supported_mediatypes'] = list(self.mediatypes.keys())
 
+    @property
+    def opener(self):
+        """
+        urllib opener for the API requests. It's built on first use since
+        importing urllib.request is slow and many commands never go online.
+        """
+        if self._opener is None:
+            import urllib.request
+            self._opener = urllib.request.build_opener()
+            self._opener.addheaders = self.opener_headers
+        return self._opener
+
+    def _make_request(self, url, data=None):
+        """Returns a urllib Request for the opener, importing urllib.request only then."""
+        import urllib.request
+        return urllib.request.Request(url, data)
+
     def _emit_signal(self, signal, *args):
         try:
             if self.signals[signal]:
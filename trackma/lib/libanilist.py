@@ -15,8 +15,8 @@
 #
 
 import json
+import urllib.error
 import urllib.parse
-import urllib.request
 import socket
 import time
 import datetime
@@ -158,8 +158,7 @@ class libanilist(lib):
         if self.scoreformat:
             self._apply_scoreformat(self.scoreformat)
 
-        self.opener = urllib.request.build_opener()
-        self.opener.addheaders = [('User-agent', self.user_agent)]
+        self.opener_headers = [('User-agent', self.user_agent)]
 
     def _raw_request(self, method, url, get=None, post=None, jsonpost=None, auth=False):
         if get:
@@ -169,7 +168,7 @@ class libanilist(lib):
         if jsonpost:
             post = json.dumps(jsonpost, ensure_ascii=False).encode('utf-8')
 
-        request = urllib.request.Request(url, post)
+        request = self._make_request(url, post)
         request.get_method = lambda: method
 
         request.add_header('Content-Type', 'application/json')
@@ -183,7 +182,7 @@ class libanilist(lib):
         try:
             response = self.opener.open(request, timeout=10)
             return json.loads(response.read().decode('utf-8'))
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             if e.code == 400:
                 raise utils.APIError("Invalid HTTP request: %s" % e.read())
             else:
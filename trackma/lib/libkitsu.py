@@ -17,8 +17,8 @@
 
 import datetime
 import time
+import urllib.error
 import urllib.parse
-import urllib.request
 import json
 import gzip
 import socket
@@ -146,8 +146,7 @@ class libkitsu(lib):
         self.password = account['password']
 
         # Build opener with the mashape API key
-        self.opener = urllib.request.build_opener()
-        self.opener.addheaders = [
+        self.opener_headers = [
             ('User-Agent',      self.user_agent),
             ('Accept',          'application/vnd.api+json'),
             ('Accept-Encoding', 'gzip'),
@@ -166,7 +165,7 @@ class libkitsu(lib):
             post = body.encode('utf-8')
             content_type = 'application/vnd.api+json'
 
-        request = urllib.request.Request(url, post)
+        request = self._make_request(url, post)
         request.get_method = lambda: method
 
         if content_type:
@@ -187,7 +186,7 @@ class libkitsu(lib):
                 return gzip.GzipFile(fileobj=response).read().decode('utf-8')
             else:
                 return response.read().decode('utf-8')
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             if e.code == 401:
                 raise utils.APIError("Incorrect credentials.")
             else:
@@ -196,7 +195,7 @@ class libkitsu(lib):
                     raise utils.APIError("API error: %s" % api_error)
                 else:
                     raise utils.APIError("Connection error: %s" % e)
-        except urllib.request.URLError as e:
+        except urllib.error.URLError as e:
             raise utils.APIError("URL error: %s" % e)
         except socket.timeout:
             raise utils.APIError("Operation timed out.")
@@ -370,7 +369,7 @@ class libkitsu(lib):
                 i += 1
 
             return showlist
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             raise utils.APIError(
                 "Error getting list (HTTPError): %s" % e.read())
         except urllib.error.URLError as e:
@@ -408,7 +407,7 @@ class libkitsu(lib):
 
             data_json = json.loads(data)
             return int(data_json['data']['id'])
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             raise utils.APIError('Error adding: ' + str(e.code))
         except urllib.error.URLError as e:
             raise utils.APIError('Error adding: ' + str(e.reason))
@@ -423,7 +422,7 @@ class libkitsu(lib):
         try:
             self._request('PATCH', self.prefix + "/library-entries/%s" %
                           item['my_id'], body=data, auth=True)
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             raise utils.APIError('Error updating: ' + str(e.code))
         except urllib.error.URLError as e:
             raise utils.APIError('Error updating: ' + str(e.reason))
@@ -436,7 +435,7 @@ class libkitsu(lib):
         try:
             self._request('DELETE', self.prefix +
                           "/library-entries/%s" % item['my_id'], auth=True)
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             raise utils.APIError('Error deleting: ' + str(e.code))
         except urllib.error.URLError as e:
             raise utils.APIError('Error deleting: ' + str(e.reason))
@@ -465,7 +464,7 @@ class libkitsu(lib):
                 raise utils.APIError('No results.')
 
             return infolist
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             raise utils.APIError('Error searching: ' + str(e.code))
         except urllib.error.URLError as e:
             raise utils.APIError('Error searching: ' + str(e.reason))
@@ -15,8 +15,8 @@
 #
 
 import json
+import urllib.error
 import urllib.parse
-import urllib.request
 import socket
 import time
 import datetime
@@ -144,8 +144,7 @@ class libmal(lib):
             self.watched_str = "num_episodes_watched"
             self.watched_send_str = "num_watched_episodes" # Please fix this upstream...
 
-        self.opener = urllib.request.build_opener()
-        self.opener.addheaders = [
+        self.opener_headers = [
             ('User-Agent',      self.user_agent),
             ('Accept',          'application/json'),
             ('Accept-Encoding', 'gzip'),
@@ -163,7 +162,7 @@ class libmal(lib):
             self.msg.debug(self.name, "POST data: " + str(post))
 
         self.msg.debug(self.name, method + " URL: " + url)
-        request = urllib.request.Request(url, post)
+        request = self._make_request(url, post)
         request.get_method = lambda: method
 
         if content_type:
@@ -184,9 +183,9 @@ class libmal(lib):
                 response = response.read().decode('utf-8')
             
             return json.loads(response)
-        except urllib.request.HTTPError as e:
+        except urllib.error.HTTPError as e:
             raise utils.APIError("Connection error: %s" % e)
-        except urllib.request.URLError as e:
+        except urllib.error.URLError as e:
             raise utils.APIError("URL error: %s" % e)
         except socket.timeout:
             raise utils.APIError("Operation timed out.")
@@ -15,8 +15,8 @@
 #
 
 import json
+import urllib.error
 import urllib.parse
-import urllib.request
 import socket
 import time
 
@@ -134,10 +134,7 @@ class libshikimori(lib):
             self.total_str = "episodes"
             self.watched_str = "episodes"
 
-        # handler=urllib.request.HTTPHandler(debuglevel=1)
-        #self.opener = urllib.request.build_opener(handler)
-        self.opener = urllib.request.build_opener()
-        self.opener.addheaders = [('User-agent', 'Trackma')]
+        self.opener_headers = [('User-agent', 'Trackma')]
 
     def _request(self, method, url, get=None, post=None, jsondata=None, auth=False):
         content_type = None
@@ -151,7 +148,7 @@ class libshikimori(lib):
             post = json.dumps(jsondata).encode('utf-8')
             content_type = 'application/json'
 
-        request = urllib.request.Request(url, post)
+        request = self._make_request(url, post)
         self.msg.debug(self.name, "URL: %s" % url)
         request.get_method = lambda: method
 
@@ -168,7 +165,7 @@ class libshikimori(lib):
             response = self.opener.open(request)
             
             return json.loads(response.read().decode('utf-8'))
-        except urllib.request.URLError as e:
+        except urllib.error.URLError as e:
             raise utils.APIError("URL error: %s" % e)
         except socket.timeout:
             raise utils.APIError("Operation timed out.")
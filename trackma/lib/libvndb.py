@@ -17,7 +17,6 @@
 import socket
 import json
 import datetime
-import ssl
 
 from trackma.lib.lib import lib
 from trackma import utils
@@ -91,6 +90,7 @@ class libvndb(lib):
 
     def _connect(self):
         """Create TCP socket and connect"""
+        import ssl
 
         self.context = ssl.create_default_context()
         try:
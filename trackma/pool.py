@@ -0,0 +1,144 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections
+import threading
+from concurrent import futures
+
+from trackma import utils
+from trackma.engine import Engine
+
+
+class EnginePool:
+    """
+    Keeps the engines of several accounts loaded at once.
+
+    Switching to an account that's already loaded is instant. At most
+    **max_engines** stay loaded; when another one is needed the least
+    recently used engine (other than the active one) is unloaded, which
+    also sends its queue if autosend_at_exit is set.
+
+    Engines are keyed by account and mediatype, so the same account can
+    be loaded with several mediatypes; each one has its own lock. The
+    mediatypes loaded here aren't saved as the ones to load next time.
+    """
+    name = 'Pool'
+
+    def __init__(self, max_engines=4, message_handler=None, engine_class=Engine):
+        self.max_engines = max(1, max_engines)
+        self.message_handler = message_handler
+        self.engine_class = engine_class
+
+        self.engines = collections.OrderedDict()
+        self.active = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(account, mediatype):
+        return (account['username'], account['api'], mediatype)
+
+    def _find(self, account, mediatype):
+        if mediatype:
+            return self.key(account, mediatype)
+
+        # Without a mediatype, the most recently used engine of the account
+        for key in reversed(self.engines):
+            if key[:2] == self.key(account, None)[:2]:
+                return key
+        return None
+
+    def get(self, account, mediatype=None):
+        """
+        Returns the started engine of **account** with **mediatype**,
+        loading it if needed. Without a mediatype, any loaded engine of
+        the account is used, or else the one it was last used with.
+        """
+        with self._lock:
+            key = self._find(account, mediatype)
+            engine = self.engines.get(key)
+            if engine is not None:
+                self.engines.move_to_end(key)
+                return engine
+
+            self._evict(self.max_engines - 1)
+
+            engine = self.engine_class(account, self.message_handler, mediatype=mediatype)
+            engine.start()
+            self.engines[self.key(account, engine.api_info['mediatype'])] = engine
+            return engine
+
+    def switch(self, account, mediatype=None):
+        """Makes the engine of **account** the active one and returns it."""
+        with self._lock:
+            engine = self.get(account, mediatype)
+            self.active = engine
+            return engine
+
+    def _evict(self, size):
+        for key in list(self.engines):
+            if len(self.engines) <= size:
+                break
+            if self.engines[key] is self.active:
+                continue
+            self.engines.pop(key).unload()
+
+    def unload(self, account=None, mediatype=None):
+        """Unloads the engine of **account**, or all of them."""
+        with self._lock:
+            if account:
+                keys = [self._find(account, mediatype)]
+            else:
+                keys = list(self.engines)
+
+            for key in keys:
+                engine = self.engines.pop(key, None)
+                if engine is not None:
+                    if engine is self.active:
+                        self.active = None
+                    engine.unload()
+
+    def _run_all(self, method, max_workers):
+        with self._lock:
+            engines = dict(self.engines)
+
+        errors = {}
+        if not engines:
+            return errors
+
+        with futures.ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix='trackma-pool') as executor:
+            running = {executor.submit(getattr(engine, method)): key
+                       for (key, engine) in engines.items()}
+            for future in futures.as_completed(running):
+                try:
+                    future.result()
+                except utils.TrackmaError as e:
+                    errors[running[future]] = e
+        return errors
+
+    def download_all(self, max_workers=4):
+        """
+        Runs list_download on every loaded engine concurrently.
+        Returns a dictionary of key -> error for the ones that failed.
+        """
+        return self._run_all('list_download', max_workers)
+
+    def upload_all(self, max_workers=4):
+        """
+        Runs list_upload on every loaded engine concurrently.
+        Returns a dictionary of key -> error for the ones that failed.
+        """
+        return self._run_all('list_upload', max_workers)
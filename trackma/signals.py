@@ -0,0 +1,216 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections
+import contextlib
+import threading
+import time
+import traceback
+
+
+def report_to(owner):
+    """
+    Returns an on_error callback for SignalBus that warns through the
+    messenger **owner** has at the time, with the traceback as debug
+    messages.
+    """
+    def on_error(signal, callback, error):
+        owner.msg.warn(owner.name, "Error in a listener of {}: {}".format(signal, error))
+        for line in traceback.format_exception(type(error), error, error.__traceback__):
+            owner.msg.debug(owner.name, line.rstrip())
+    return on_error
+
+
+class SignalBus:
+    """
+    Delivers the signals of an engine component to its listeners.
+
+    Each signal has one primary callback, set with connect() (this is
+    what connect_signal has always done, so setting it again replaces
+    it), plus any number of subscribers. The primary callback is called
+    first, then the subscribers in the order they subscribed; an
+    exception from the primary callback is raised after the
+    subscribers have run.
+
+    An exception from a subscriber doesn't keep the next ones from
+    running. It's passed to **on_error** as on_error(signal, callback,
+    exception), or printed if there's none; see report_to().
+
+    Subscribers added with queued=True are called on a dispatcher
+    thread instead, in the order the signals were emitted, so a slow
+    one doesn't hold up the emitting thread.
+
+    Signals listed in **coalesce** only carry the latest state (like
+    queue_changed). While a batch() is open they're held back, and
+    only the last emission of each is delivered when it closes. For
+    queued subscribers, an emission that's still waiting in the queue
+    is updated with the latest arguments instead of queued again.
+
+    Unknown signal names raise KeyError.
+    """
+
+    def __init__(self, names, coalesce=(), stats=None, on_error=None):
+        self.primary = dict.fromkeys(names)
+        self.subscribers = {name: () for name in names}
+        self.queued_subscribers = {name: () for name in names}
+        self.coalesce = frozenset(coalesce)
+        self.stats = stats
+        self.on_error = on_error
+
+        self._lock = threading.Lock()
+        self._batch_depth = 0
+        self._pending = {}
+
+        # Deliveries waiting for the queued subscribers
+        self._queue = collections.deque()
+        self._queued = {}
+        self._queue_cond = threading.Condition(self._lock)
+        self._dispatching = False
+        self._dispatcher = None
+
+    def connect(self, signal, callback):
+        """Sets the primary callback of **signal**."""
+        if signal not in self.primary:
+            raise KeyError(signal)
+        self.primary[signal] = callback
+
+    def subscribe(self, signal, callback, queued=False):
+        """
+        Adds **callback** as a subscriber of **signal**; with **queued**
+        it's called on the dispatcher thread.
+        """
+        subscribers = self.queued_subscribers if queued else self.subscribers
+        with self._lock:
+            # Copy on write so emit() can iterate without the lock
+            subscribers[signal] = subscribers[signal] + (callback,)
+
+    def unsubscribe(self, signal, callback):
+        """Removes **callback** from the subscribers of **signal**, if it's there."""
+        with self._lock:
+            for subscribers in (self.subscribers, self.queued_subscribers):
+                subscribers[signal] = tuple(
+                    cb for cb in subscribers[signal] if cb != callback)
+
+    def emit(self, signal, *args):
+        """Delivers **signal**, or holds it back if it's coalesced and a batch is open."""
+        if signal not in self.primary:
+            raise KeyError(signal)
+
+        if signal in self.coalesce:
+            with self._lock:
+                if self._batch_depth:
+                    # Keep the first position, but the latest arguments
+                    self._pending[signal] = args
+                    return
+
+        self._deliver(signal, args)
+
+    def _deliver(self, signal, args):
+        callback = self.primary[signal]
+        start = time.time()
+        error = False
+        try:
+            if callback:
+                callback(*args)
+        except Exception:
+            error = True
+            raise
+        finally:
+            if self.stats:
+                self.stats.record(signal, time.time() - start, error)
+
+            # Subscribers get the signal even if the primary callback failed
+            for subscriber in self.subscribers[signal]:
+                self._call(signal, subscriber, args)
+
+            if self.queued_subscribers[signal]:
+                self._enqueue(signal, args)
+
+    def _call(self, signal, subscriber, args):
+        try:
+            subscriber(*args)
+        except Exception as e:
+            # Keep calling the next ones
+            if self.on_error:
+                self.on_error(signal, subscriber, e)
+            else:
+                traceback.print_exc()
+
+    def _enqueue(self, signal, args):
+        with self._lock:
+            if signal in self.coalesce and signal in self._queued:
+                # Still waiting, deliver the latest state instead
+                self._queued[signal][1] = args
+                return
+
+            delivery = [signal, args]
+            self._queue.append(delivery)
+            if signal in self.coalesce:
+                self._queued[signal] = delivery
+
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, daemon=True, name='trackma-signals')
+                self._dispatcher.start()
+            self._queue_cond.notify_all()
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._dispatching = False
+                    self._queue_cond.notify_all()
+                    self._queue_cond.wait()
+                self._dispatching = True
+                delivery = self._queue.popleft()
+                (signal, args) = delivery
+                if self._queued.get(signal) is delivery:
+                    del self._queued[signal]
+
+            for subscriber in self.queued_subscribers[signal]:
+                self._call(signal, subscriber, args)
+
+    def flush(self, timeout=None):
+        """
+        Waits until the queued subscribers got every signal emitted so
+        far. Returns False if **timeout** expired first.
+        """
+        with self._lock:
+            return self._queue_cond.wait_for(
+                lambda: not self._queue and not self._dispatching, timeout)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Holds back the coalesced signals until the outermost batch
+        closes, then delivers the last emission of each one.
+        """
+        with self._lock:
+            self._batch_depth += 1
+
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth:
+                    pending = {}
+                else:
+                    pending = self._pending
+                    self._pending = {}
+
+            for signal, args in pending.items():
+                self._deliver(signal, args)
@@ -0,0 +1,99 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import time
+
+
+class StartupPlan:
+    """
+    Runs a set of startup phases concurrently, respecting the
+    dependencies declared between them.
+
+    Each phase starts as soon as all the phases it requires have
+    finished, so the total time tends to the slowest chain of phases
+    instead of the sum of all of them. If a phase fails, no new phases
+    are started and the first error is raised once the running ones
+    are done.
+    """
+    name = 'Startup'
+
+    def __init__(self, messenger, max_workers=4):
+        self.msg = messenger
+        self.max_workers = max_workers
+        self.phases = {}
+        self.timings = {}
+
+    def add(self, name, func, requires=()):
+        """
+        Adds phase **name** running **func**, after the phases in **requires**.
+        They must have been added already, so there can't be cycles.
+        """
+        if name in self.phases:
+            raise ValueError("Duplicate phase: {}".format(name))
+        for required in requires:
+            if required not in self.phases:
+                raise ValueError("Unknown phase: {}".format(required))
+
+        self.phases[name] = (func, tuple(requires))
+
+    def _run_phase(self, name, func):
+        start = time.time()
+        try:
+            func()
+        finally:
+            self.timings[name] = time.time() - start
+            self.msg.debug(self.name, "Phase {} took {:.3f}s".format(
+                name, self.timings[name]))
+
+    def run(self):
+        """Runs all phases and returns a dictionary with their durations."""
+        from concurrent import futures
+
+        start = time.time()
+        pending = dict(self.phases)
+        done = set()
+        running = {}
+        error = None
+
+        with futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix='trackma-startup') as executor:
+            while pending or running:
+                if not error:
+                    for name, (func, requires) in list(pending.items()):
+                        if done.issuperset(requires):
+                            del pending[name]
+                            future = executor.submit(self._run_phase, name, func)
+                            running[future] = name
+
+                if not running:
+                    break
+
+                finished, _ = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() and not error:
+                        error = future.exception()
+                    done.add(name)
+
+        self.timings['total'] = time.time() - start
+        self.msg.debug(self.name, "Startup took {:.3f}s".format(
+            self.timings['total']))
+
+        if error:
+            raise error
+
+        return self.timings
@@ -0,0 +1,74 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections
+import math
+import threading
+
+
+class CallStats:
+    """
+    Thread-safe call counters keyed by name.
+
+    Keeps the call count, the exception count, the cumulative time and
+    the last **samples** durations of each key, which are used to
+    estimate the 95th percentile.
+    """
+
+    def __init__(self, samples=256):
+        self.samples = samples
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, elapsed, error=False):
+        """Records a call to **key** that took **elapsed** seconds."""
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = {
+                    'count': 0,
+                    'errors': 0,
+                    'total': 0.0,
+                    'durations': collections.deque(maxlen=self.samples),
+                }
+
+            stat['count'] += 1
+            stat['total'] += elapsed
+            stat['durations'].append(elapsed)
+            if error:
+                stat['errors'] += 1
+
+    def snapshot(self):
+        """
+        Returns a dictionary of key -> dict with count, errors,
+        total, mean and p95 (all times in seconds).
+        """
+        with self._lock:
+            stats = [(key, dict(stat, durations=sorted(stat['durations'])))
+                     for (key, stat) in self._stats.items()]
+
+        result = {}
+        for (key, stat) in stats:
+            durations = stat.pop('durations')
+            stat['mean'] = stat['total'] / stat['count']
+            # Nearest rank
+            stat['p95'] = durations[math.ceil(len(durations) * 0.95) - 1]
+            result[key] = stat
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
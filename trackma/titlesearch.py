@@ -0,0 +1,117 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import bisect
+import functools
+import re
+
+REGEX_CHARS = frozenset('.^$*+?{}[]\\|()')
+
+
+@functools.lru_cache(maxsize=128)
+def compile_pattern(pattern):
+    """Compiles a case-insensitive user pattern, caching recent ones."""
+    return re.compile(pattern, re.I)
+
+
+def is_literal(pattern):
+    """Returns True if the pattern has no regex special characters."""
+    return not REGEX_CHARS.intersection(pattern)
+
+
+class TitleSearch:
+    """
+    Local title search over the list of a data handler.
+
+    Keeps a sorted array of lowercase titles (plus aliases and
+    alternative names) so prefix lookups for autocompletion are a
+    binary search. The array is rebuilt lazily, only after the data
+    handler reports that a title or altname changed.
+    """
+
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+        self._version = None
+        self._keys = []
+        self._entries = []
+
+    def _refresh(self):
+        version = self.data_handler.index_version
+        if version == self._version:
+            return
+
+        showlist = self.data_handler.get() or {}
+        altnames = self.data_handler.altnames_get()
+
+        entries = []
+        for show in showlist.values():
+            for title in [show['title']] + show.get('aliases', []):
+                entries.append((title.lower(), show['id'], title, False))
+
+            altname = altnames.get(show['id'])
+            if altname:
+                entries.append((altname.lower(), show['id'], altname, True))
+
+        entries.sort()
+        self._entries = entries
+        self._keys = [entry[0] for entry in entries]
+        self._version = version
+
+    def search(self, pattern, altnames=False):
+        """
+        Returns the shows whose title matches the regex **pattern**
+        anywhere. With **altnames**, aliases and alternative names are
+        searched too.
+        """
+        regex = compile_pattern(pattern)
+        showlist = self.data_handler.get()
+
+        if not altnames:
+            return [show for show in showlist.values() if regex.search(show['title'])]
+
+        self._refresh()
+        found = dict.fromkeys(showid for (key, showid, title, is_alt)
+                              in self._entries if regex.search(title))
+        return [showlist[showid] for showid in found if showid in showlist]
+
+    def complete(self, prefix, altnames=False):
+        """
+        Returns the titles starting with **prefix** (case-insensitive).
+        Literal prefixes are looked up by binary search; anything with
+        regex characters is matched as a pattern at the start of the title.
+        """
+        self._refresh()
+
+        if is_literal(prefix):
+            key = prefix.lower()
+            start = bisect.bisect_left(self._keys, key)
+            end = bisect.bisect_left(self._keys, key + '\uffff', start)
+            candidates = self._entries[start:end]
+        else:
+            regex = compile_pattern(prefix)
+            candidates = [entry for entry in self._entries if regex.match(entry[2])]
+
+        showlist = self.data_handler.get()
+        titles = []
+        for (key, showid, title, is_alt) in candidates:
+            show = showlist.get(showid)
+            if not show:
+                continue
+            if not altnames and title != show['title']:
+                continue
+            titles.append(title)
+
+        return list(dict.fromkeys(titles))
@@ -0,0 +1,172 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+
+from trackma.tracker import tracker
+from trackma import utils
+
+# Which child status to report when nobody owns a countdown
+STATE_PRIORITY = {
+    utils.TRACKER_PLAYING: 4,
+    utils.TRACKER_NOT_FOUND: 3,
+    utils.TRACKER_UNRECOGNIZED: 2,
+    utils.TRACKER_IGNORED: 1,
+    utils.TRACKER_NOVIDEO: 0,
+}
+
+
+class CompositeTracker(tracker.TrackerBase):
+    """
+    Runs several trackers at once (e.g. MPRIS and Jellyfin) and merges
+    what they report into a single tracker for the engine.
+
+    The first tracker to detect a (show, episode) owns it: only its
+    countdown is reported and only its update goes through. Other
+    trackers playing the same thing are muted until the owner stops,
+    and an episode isn't updated twice while any of them still plays
+    it. Playing it again later updates it again, like a single tracker.
+    """
+    name = 'Tracker (composite)'
+
+    def __init__(self, messenger, tracker_list, config, watch_dirs, redirections=None, tracker_classes=()):
+        self.tracker_classes = tracker_classes
+        self.children = []
+        self.owners = {}
+        # (signal, key) sent for the playbacks still running
+        self.done = set()
+        self.composite_lock = threading.RLock()
+
+        super().__init__(messenger, tracker_list, config, watch_dirs, redirections)
+
+    def _start(self, config, watch_dirs):
+        for tracker_class in self.tracker_classes:
+            child = tracker_class(self.msg, self.list, config,
+                                  watch_dirs, self.redirections)
+
+            for signal in self.signals:
+                handler = getattr(self, '_child_' + signal)
+                child.connect_signal(signal, self._make_handler(child, handler))
+
+            self.children.append(child)
+
+    def _make_handler(self, child, handler):
+        def _handler(*args):
+            with self.composite_lock:
+                handler(child, *args)
+        return _handler
+
+    def _owner_of(self, key):
+        owner = self.owners.get(key)
+        if owner and owner.active and owner.last_show_tuple:
+            return owner
+        return None
+
+    def _child_state(self, child, status):
+        self._forget_stopped()
+        self._emit_signal('state', self.get_status())
+
+    def _child_detected(self, child, path, filename):
+        self._emit_signal('detected', path, filename)
+
+    def _child_removed(self, child, path, filename):
+        self._emit_signal('removed', path, filename)
+
+    def _child_playing(self, child, showid, playing, episode):
+        self._forget_stopped()
+        key = (showid, episode)
+        owner = self._owner_of(key)
+
+        if playing:
+            if owner and owner is not child:
+                self.msg.debug(self.name, "{} is already tracked by {}.".format(
+                    key, owner.name))
+                return
+            self.owners[key] = child
+        else:
+            if self.owners.get(key) is not child:
+                return
+            del self.owners[key]
+
+        self._emit_signal('playing', showid, playing, episode)
+
+    def _child_update(self, child, show, episode):
+        self._child_finished(child, 'update', show, episode)
+
+    def _child_unrecognised(self, child, show, episode):
+        self._child_finished(child, 'unrecognised', show, episode)
+
+    def _child_finished(self, child, signal, show, episode):
+        key = self._key(show, episode)
+        owner = self._owner_of(key)
+
+        if owner and owner is not child:
+            self.msg.debug(self.name, "Ignoring {} from {}, owned by {}.".format(
+                signal, child.name, owner.name))
+            return
+        if (signal, key) in self.done:
+            self.msg.debug(self.name, "Already sent {} for {}.".format(
+                signal, key))
+            return
+
+        self.done.add((signal, key))
+        self._emit_signal(signal, show, episode)
+
+    @staticmethod
+    def _key(show, episode):
+        return (show['id'] or show['title'], episode)
+
+    def _forget_stopped(self):
+        # Forget what was sent for the shows nobody is playing anymore
+        playing = {self._key(*child.last_show_tuple) for child in self.children
+                   if child.active and child.last_show_tuple}
+        self.done = {entry for entry in self.done if entry[1] in playing}
+
+    def _main_child(self):
+        # The tracker owning a countdown takes precedence, otherwise
+        # report whichever tracker is in the most relevant state.
+        for owner in self.owners.values():
+            if owner.active and owner.last_show_tuple:
+                return owner
+
+        if self.children:
+            return max(self.children,
+                       key=lambda child: STATE_PRIORITY.get(child.last_state, 0))
+
+        return None
+
+    def get_status(self):
+        with self.composite_lock:
+            child = self._main_child()
+
+        if child:
+            return child.get_status()
+        return super().get_status()
+
+    def update_list(self, tracker_list):
+        super().update_list(tracker_list)
+        for child in self.children:
+            child.update_list(tracker_list)
+
+    def set_message_handler(self, message_handler):
+        super().set_message_handler(message_handler)
+        for child in self.children:
+            child.set_message_handler(message_handler)
+
+    def disable(self):
+        for child in self.children:
+            child.disable()
+        super().disable()
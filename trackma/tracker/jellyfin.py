@@ -15,7 +15,6 @@
 
 # TODO: Add gui stuff for this
 
-import time
 import os
 import requests
 
@@ -29,7 +28,7 @@ PAUSED = 4
 IDLE = 5
 
 
-class JellyfinTracker(tracker.TrackerBase):
+class JellyfinTracker(tracker.PollingTrackerBase):
     name = 'Tracker (Jellyfin)'
 
     def __init__(self, messenger, tracker_list, config, watch_dirs, redirections=None):
@@ -43,47 +42,44 @@ class JellyfinTracker(tracker.TrackerBase):
 
         super().__init__(messenger, tracker_list, config, watch_dirs, redirections)
 
-    def observe(self, config, watch_dirs):
+    def prepare(self, config, watch_dirs):
         self.msg.info(self.name, "Using Jellyfin.")
 
-        while self.active:
-            session_info = self._get_sessions_info()
-            self.status_log.append(session_info['status'])
+    def poll(self, config, watch_dirs):
+        session_info = self._get_sessions_info()
+        self.status_log.append(session_info['status'])
 
-            if self.status_log[-1] == ACTIVE or self.status_log[-1] == IDLE:
-                if self.status_log[-1] == IDLE and self.status_log[-2] == NOT_RUNNING:
-                    self.msg.info(self.name, "Reconnected to Jellyfin.")
-                    self.wait_s = config['tracker_update_wait_s']
+        if self.status_log[-1] == ACTIVE or self.status_log[-1] == IDLE:
+            if self.status_log[-1] == IDLE and self.status_log[-2] == NOT_RUNNING:
+                self.msg.info(self.name, "Reconnected to Jellyfin.")
+                self.wait_s = config['tracker_update_wait_s']
 
-                try:
-                    (state, show_tuple) = self._get_playing_show(session_info['file_name'])
+            try:
+                (state, show_tuple) = self._get_playing_show(session_info['file_name'])
 
-                    self.view_offset = int(session_info['view_offset'])
+                self.view_offset = int(session_info['view_offset'])
 
-                    self.update_show_if_needed(state, show_tuple)
+                self.update_show_if_needed(state, show_tuple)
 
-                    if session_info['state'] == PAUSED:
-                        self.pause_timer()
-                    elif session_info['state'] == PLAYING:
-                        self.resume_timer()
+                if session_info['state'] == PAUSED:
+                    self.pause_timer()
+                elif session_info['state'] == PLAYING:
+                    self.resume_timer()
 
-                except (IndexError,TypeError):
-                    if self.status_log[-1] == IDLE:
-                        self.last_filename = None
-                        self.update_show_if_needed(0, None)
-                    else:
-                        pass
+            except (IndexError,TypeError):
+                if self.status_log[-1] == IDLE:
+                    self.last_filename = None
+                    self.update_show_if_needed(0, None)
+                else:
+                    pass
 
-            elif self.status_log[-1] == CLAIMED and self.status_log[-2] == CLAIMED:
-                self.msg.warn(
-                    self.name, "Claimed Jellyfin, login in the settings and restart trackma.")
-            elif self.status_log[-1] == NOT_RUNNING and self.status_log[-2] == NOT_RUNNING:
-                self.msg.warn(self.name, "Jellyfin is not running.")
+        elif self.status_log[-1] == CLAIMED and self.status_log[-2] == CLAIMED:
+            self.msg.warn(
+                self.name, "Claimed Jellyfin, login in the settings and restart trackma.")
+        elif self.status_log[-1] == NOT_RUNNING and self.status_log[-2] == NOT_RUNNING:
+            self.msg.warn(self.name, "Jellyfin is not running.")
 
-            del self.status_log[0]
-
-            # Wait for the interval before running check again
-            time.sleep(config['tracker_interval'])
+        del self.status_log[0]
 
     def _get_sessions_info(self):
         session_url = self.host_port+"/Sessions?api_key={}".format(self.api_key)
@@ -96,7 +92,7 @@ class JellyfinTracker(tracker.TrackerBase):
         }
 
         try:
-            response = requests.get(session_url)
+            response = self.runtime.http_session().get(session_url)
             response_json = response.json()
         except requests.exceptions.ConnectionError:
             return info
@@ -14,7 +14,6 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import time
 import json
 import base64
 import urllib.request
@@ -31,7 +30,7 @@ PLAYING = 4
 PAUSED = 5
 
 
-class KodiTracker(tracker.TrackerBase):
+class KodiTracker(tracker.PollingTrackerBase):
     name = 'Tracker (Kodi)'
 
     def __init__(self, messenger, tracker_list, config, watch_dirs, redirections=None):
@@ -128,38 +127,35 @@ class KodiTracker(tracker.TrackerBase):
 
         return info[prop]
 
-    def observe(self, config, watch_dirs):
+    def prepare(self, config, watch_dirs):
         self.msg.info(self.name, "Using Kodi.")
 
-        while self.active:
-            self.status_log.append(self._get_kodi_status())
+    def poll(self, config, watch_dirs):
+        self.status_log.append(self._get_kodi_status())
 
-            if self.status_log[-1] == IDLE and self.status_log[-2] == NOT_RUNNING:
-                self.msg.info(self.name, "Reconnected to Kodi.")
+        if self.status_log[-1] == IDLE and self.status_log[-2] == NOT_RUNNING:
+            self.msg.info(self.name, "Reconnected to Kodi.")
 
-            if self.status_log[-1] == ACTIVE:
-                if self.config['kodi_obey_update_wait_s']:
-                    self.wait_s = config['tracker_update_wait_s']
-                else:
-                    self.wait_s = self._timer_from_file()
-
-                player = self._playing_file()
-                (state, show_tuple) = self._get_playing_show(player[0])
+        if self.status_log[-1] == ACTIVE:
+            if self.config['kodi_obey_update_wait_s']:
+                self.wait_s = config['tracker_update_wait_s']
+            else:
+                self.wait_s = self._timer_from_file()
 
-                self.update_show_if_needed(state, show_tuple)
+            player = self._playing_file()
+            (state, show_tuple) = self._get_playing_show(player[0])
 
-                if player[1] == PAUSED:
-                    self.pause_timer()
-                elif player[1] == PLAYING:
-                    self.resume_timer()
+            self.update_show_if_needed(state, show_tuple)
 
-            elif self.status_log[-1] == AUTH_REQUIRED:
-                self.msg.warn(
-                    self.name, "Authentication needed by Kodi, login in the settings and restart trackma.")
-            elif self.status_log[-1] == NOT_RUNNING:
-                self.msg.warn(self.name, "Kodi HTTP Server is not running.")
+            if player[1] == PAUSED:
+                self.pause_timer()
+            elif player[1] == PLAYING:
+                self.resume_timer()
 
-            del self.status_log[0]
+        elif self.status_log[-1] == AUTH_REQUIRED:
+            self.msg.warn(
+                self.name, "Authentication needed by Kodi, login in the settings and restart trackma.")
+        elif self.status_log[-1] == NOT_RUNNING:
+            self.msg.warn(self.name, "Kodi HTTP Server is not running.")
 
-            # Wait for the interval before running check again
-            time.sleep(config['tracker_interval'])
+        del self.status_log[0]
@@ -15,7 +15,6 @@
 #
 
 import ntpath
-import time
 import urllib.parse
 import urllib.request
 import xml.dom.minidom as xdmd
@@ -31,7 +30,7 @@ PAUSED = 4
 IDLE = 5
 
 
-class PlexTracker(tracker.TrackerBase):
+class PlexTracker(tracker.PollingTrackerBase):
     name = 'Tracker (Plex)'
 
     def __init__(self, messenger, tracker_list, config, watch_dirs, redirections=None):
@@ -87,59 +86,56 @@ class PlexTracker(tracker.TrackerBase):
         except IndexError:
             return None
 
-    def observe(self, config, watch_dirs):
+    def prepare(self, config, watch_dirs):
         self.msg.info(self.name, "Using Plex.")
 
-        while self.active:
-            self.status_log.append(self.get_plex_status())
+    def poll(self, config, watch_dirs):
+        self.status_log.append(self.get_plex_status())
 
-            if self.status_log[-1] == ACTIVE or self.status_log[-1] == IDLE:
-                if self.status_log[-1] == IDLE and self.status_log[-2] == NOT_RUNNING:
-                    self.msg.info(self.name, "Reconnected to Plex.")
+        if self.status_log[-1] == ACTIVE or self.status_log[-1] == IDLE:
+            if self.status_log[-1] == IDLE and self.status_log[-2] == NOT_RUNNING:
+                self.msg.info(self.name, "Reconnected to Plex.")
 
-                if self.config['plex_obey_update_wait_s']:
-                    self.wait_s = config['tracker_update_wait_s']
-                else:
-                    self.wait_s = self.timer_from_file()
-
-                try:
-                    xuser = self._get_sessions_info("User", "title")
+            if self.config['plex_obey_update_wait_s']:
+                self.wait_s = config['tracker_update_wait_s']
+            else:
+                self.wait_s = self.timer_from_file()
 
-                    player = self.playing_file()
-                    (state, show_tuple) = self._get_playing_show(player[0])
+            try:
+                xuser = self._get_sessions_info("User", "title")
 
-                    if self.token:
-                        if self.config['plex_user'] == xuser:
-                            self.view_offset = int(self._get_sessions_info("Video", "viewOffset"))
-                            self.update_show_if_needed(state, show_tuple)
+                player = self.playing_file()
+                (state, show_tuple) = self._get_playing_show(player[0])
 
-                            if player[1] == PAUSED:
-                                self.pause_timer()
-                            elif player[1] == PLAYING:
-                                self.resume_timer()
-                    else:
+                if self.token:
+                    if self.config['plex_user'] == xuser:
+                        self.view_offset = int(self._get_sessions_info("Video", "viewOffset"))
                         self.update_show_if_needed(state, show_tuple)
 
                         if player[1] == PAUSED:
                             self.pause_timer()
                         elif player[1] == PLAYING:
                             self.resume_timer()
-                except IndexError:
-                    if self.status_log[-1] == IDLE:
-                        self.last_filename = None
-                        self.update_show_if_needed(0, None)
-                    else:
-                        pass
-            elif self.status_log[-1] == CLAIMED and self.status_log[-2] == CLAIMED:
-                self.msg.warn(
-                    self.name, "Claimed Plex Media Server, login in the settings and restart trackma.")
-            elif self.status_log[-1] == NOT_RUNNING and self.status_log[-2] == NOT_RUNNING:
-                self.msg.warn(self.name, "Plex Media Server is not running.")
-
-            del self.status_log[0]
-
-            # Wait for the interval before running check again
-            time.sleep(config['tracker_interval'])
+                else:
+                    self.update_show_if_needed(state, show_tuple)
+
+                    if player[1] == PAUSED:
+                        self.pause_timer()
+                    elif player[1] == PLAYING:
+                        self.resume_timer()
+            except IndexError:
+                if self.status_log[-1] == IDLE:
+                    self.last_filename = None
+                    self.update_show_if_needed(0, None)
+                else:
+                    pass
+        elif self.status_log[-1] == CLAIMED and self.status_log[-2] == CLAIMED:
+            self.msg.warn(
+                self.name, "Claimed Plex Media Server, login in the settings and restart trackma.")
+        elif self.status_log[-1] == NOT_RUNNING and self.status_log[-2] == NOT_RUNNING:
+            self.msg.warn(self.name, "Plex Media Server is not running.")
+
+        del self.status_log[0]
 
     def _get_plex_token(self):
         username = self.config['plex_user']
@@ -14,7 +14,6 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import time
 import re
 import os
 import subprocess
@@ -23,7 +22,7 @@ from trackma.tracker import tracker
 from trackma import utils
 
 
-class PollingTracker(tracker.TrackerBase):
+class PollingTracker(tracker.PollingTrackerBase):
     name = 'Tracker (polling)'
 
     def get_playing_file(self, watch_dirs, players):
@@ -46,15 +45,13 @@ class PollingTracker(tracker.TrackerBase):
 
         return None
 
-    def observe(self, config, watch_dirs):
+    def prepare(self, config, watch_dirs):
         self.msg.info(
             self.name, "pyinotify not available; using polling (slow).")
-        while self.active:
-            # This runs the tracker and update the playing show if necessary
-            filename = self.get_playing_file(
-                watch_dirs, config['tracker_process'])
-            (state, show_tuple) = self._get_playing_show(filename)
-            self.update_show_if_needed(state, show_tuple)
-
-            # Wait for the interval before running check again
-            time.sleep(config['tracker_interval'])
+
+    def poll(self, config, watch_dirs):
+        # This runs the tracker and update the playing show if necessary
+        filename = self.get_playing_file(
+            watch_dirs, config['tracker_process'])
+        (state, show_tuple) = self._get_playing_show(filename)
+        self.update_show_if_needed(state, show_tuple)
@@ -0,0 +1,102 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TrackerRuntime:
+    """
+    Shared asyncio runtime for the trackers.
+
+    A single event loop runs in a daemon thread and drives every
+    polling tracker as a coroutine. Blocking work (HTTP requests,
+    lsof calls, engine callbacks) is sent to a small shared
+    thread pool, so watching several sources doesn't need
+    one thread per tracker.
+
+    Use :func:`get_runtime` instead of instancing this directly.
+    """
+    name = 'TrackerRuntime'
+
+    def __init__(self, max_workers=4):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='trackma-tracker')
+        self.loop.set_default_executor(self.executor)
+
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        self._thread = threading.Thread(
+            target=self._run, name='trackma-tracker-loop')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def spawn(self, coro):
+        """
+        Schedules a coroutine in the runtime loop. Can be called from any
+        thread; returns a :class:`concurrent.futures.Future`.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run_blocking(self, func, *args):
+        """Runs a blocking function in the shared pool and waits for it."""
+        return await self.loop.run_in_executor(self.executor, func, *args)
+
+    def call_later(self, delay, callback, *args):
+        """
+        Runs **callback** in the shared pool after **delay** seconds.
+        Returns a future whose ``cancel()`` drops the call if it
+        hasn't started yet. Thread-safe.
+        """
+        async def _delayed():
+            await asyncio.sleep(max(delay, 0))
+            await self.run_blocking(callback, *args)
+
+        return self.spawn(_delayed())
+
+    def http_session(self):
+        """
+        Returns the HTTP session shared by the network trackers,
+        so they reuse their connections between polls.
+        """
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                self._session = requests.Session()
+
+            return self._session
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    """Returns the process-wide tracker runtime, starting it if needed."""
+    global _runtime
+
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = TrackerRuntime()
+
+        return _runtime
@@ -14,16 +14,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import asyncio
 import threading
 import re
 import time
 import os
 
-import ctypes
-
 from trackma import messenger
 from trackma import utils
+from trackma.signals import SignalBus, report_to
 from trackma.extras import AnimeInfoExtractor
+from trackma.tracker import runtime
 
 
 class TrackerBase(object):
@@ -53,6 +54,10 @@ class TrackerBase(object):
         self.msg = messenger
         self.msg.info(self.name, 'Initializing...')
 
+        # Each instance needs its own callbacks, as several trackers
+        # can be running at once.
+        self.bus = SignalBus(self.signals, on_error=report_to(self))
+
         self.list = tracker_list
         self.config = config
         self.redirections = redirections
@@ -66,11 +71,21 @@ class TrackerBase(object):
 
         self.view_offset = None
 
-        tracker_args = (config, watch_dirs)
-        tracker_t = threading.Thread(target=self.observe, args=tracker_args)
-        tracker_t.daemon = True
+        # The countdown is a scheduled call in the tracker runtime;
+        # the lock serializes it against the tracker's own updates.
+        self.runtime = runtime.get_runtime()
+        self._lock = threading.RLock()
+        self._scheduled_update = None
 
         self.msg.debug(self.name, 'Enabling tracker...')
+        self._start(config, watch_dirs)
+
+    def _start(self, config, watch_dirs):
+        # Trackers driven by external events (inotify, MPRIS, win32)
+        # keep running their blocking observe loop in their own thread.
+        tracker_t = threading.Thread(
+            target=self.observe, args=(config, watch_dirs))
+        tracker_t.daemon = True
         tracker_t.start()
 
     def set_message_handler(self, message_handler):
@@ -80,13 +95,21 @@ class TrackerBase(object):
     def disable(self):
         self.msg.info(self.name, 'Unloading...')
         self.active = False
+        self._cancel_scheduled_update()
 
     def update_list(self, tracker_list):
         self.list = tracker_list
 
     def connect_signal(self, signal, callback):
         try:
-            self.signals[signal] = callback
+            self.bus.connect(signal, callback)
+        except KeyError:
+            raise utils.EngineFatal("Invalid signal.")
+
+    def subscribe_signal(self, signal, callback, queued=False):
+        """Adds **callback** as an additional listener of **signal**."""
+        try:
+            self.bus.subscribe(signal, callback, queued)
         except KeyError:
             raise utils.EngineFatal("Invalid signal.")
 
@@ -105,11 +128,31 @@ class TrackerBase(object):
 
     def _emit_signal(self, signal, *args):
         try:
-            if self.signals[signal]:
-                self.signals[signal](*args)
+            self.bus.emit(signal, *args)
         except KeyError:
             raise Exception("Call to undefined signal.")
 
+    def _cancel_scheduled_update(self):
+        if self._scheduled_update:
+            self._scheduled_update.cancel()
+            self._scheduled_update = None
+
+    def _schedule_update(self, state, show_tuple, delay):
+        # Fire the update when the countdown ends instead of waiting
+        # for the next time the tracker happens to check the player.
+        self._cancel_scheduled_update()
+        self._scheduled_update = self.runtime.call_later(
+            delay, self._scheduled_update_expired, state, show_tuple)
+
+    def _scheduled_update_expired(self, state, show_tuple):
+        with self._lock:
+            if (not self.active or self.last_updated or
+                    state != self.last_state or show_tuple != self.last_show_tuple):
+                return
+
+            self._scheduled_update = None
+            self._update_show(state, show_tuple)
+
     def _update_show(self, state, show_tuple):
         if self.timer_paused:
             return
@@ -120,7 +163,12 @@ class TrackerBase(object):
             1 + (self.wait_s or self.config['tracker_update_wait_s']) + self.timer_offset - (time.time() - self.last_time))
         self._emit_signal('state', self.get_status())
 
-        if self.timer <= 0:
+        if self.timer > 0:
+            if not self._scheduled_update or self._scheduled_update.done():
+                self._schedule_update(state, show_tuple, self.timer)
+        else:
+            self._cancel_scheduled_update()
+
             # Perform show update
             self.last_updated = True
             action = None
@@ -140,6 +188,7 @@ class TrackerBase(object):
         self.last_updated = True
         self.last_state = utils.TRACKER_IGNORED
         self.timer = None
+        self._cancel_scheduled_update()
         self._emit_signal('state', self.get_status())
 
     def _update_state(self, state):
@@ -149,6 +198,7 @@ class TrackerBase(object):
             self.last_close_queue = None
 
         # Clear up pause and set our new time offset
+        self._cancel_scheduled_update()
         self.timer_paused = None
         self.timer_offset = 0
         self.last_time = time.time()
@@ -161,19 +211,30 @@ class TrackerBase(object):
                     'playing', last_show['id'], False, last_show_ep)
 
     def pause_timer(self):
-        if not self.timer_paused:
-            self.timer_paused = time.time()
+        with self._lock:
+            if not self.timer_paused:
+                self.timer_paused = time.time()
+                self._cancel_scheduled_update()
 
-            self._emit_signal('state', self.get_status())
+                self._emit_signal('state', self.get_status())
 
     def resume_timer(self):
-        if self.timer_paused:
-            self.timer_offset += time.time() - self.timer_paused
-            self.timer_paused = None
+        with self._lock:
+            if self.timer_paused:
+                self.timer_offset += time.time() - self.timer_paused
+                self.timer_paused = None
 
-            self._emit_signal('state', self.get_status())
+                self._emit_signal('state', self.get_status())
+
+                # Reschedule the countdown with the new offset
+                if self.last_show_tuple and not self.last_updated and self.timer is not None:
+                    self._update_show(self.last_state, self.last_show_tuple)
 
     def update_show_if_needed(self, state, show_tuple):
+        with self._lock:
+            self._update_show_if_needed(state, show_tuple)
+
+    def _update_show_if_needed(self, state, show_tuple):
         # If the state and show are unchanged, skip to countdown
         if show_tuple and state == self.last_state and show_tuple == self.last_show_tuple and not self.last_updated:
             self._update_show(state, show_tuple)
@@ -289,3 +350,42 @@ class TrackerBase(object):
         else:
             self.last_filename = None
             return (utils.TRACKER_NOVIDEO, None)  # Not playing
+
+
+class PollingTrackerBase(TrackerBase):
+    """
+    Base for trackers that periodically check a source (lsof, Plex,
+    Jellyfin, Kodi). Instead of a thread with a sleep loop each,
+    they implement :func:`poll` and run as coroutines in the
+    shared tracker runtime.
+    """
+
+    def _start(self, config, watch_dirs):
+        self.runtime.spawn(self._poll_loop(config, watch_dirs))
+
+    async def _poll_loop(self, config, watch_dirs):
+        # Errors would otherwise stay in the future spawn() returned
+        try:
+            await self.runtime.run_blocking(self.prepare, config, watch_dirs)
+        except Exception as e:
+            self.msg.warn(self.name, "Couldn't start tracker: {}".format(e))
+            return
+
+        while self.active:
+            try:
+                await self.runtime.run_blocking(self.poll, config, watch_dirs)
+            except Exception as e:
+                self.msg.warn(self.name, "Error while polling: {}".format(e))
+
+            # Wait for the interval before running check again
+            await asyncio.sleep(config['tracker_interval'])
+
+        self.msg.debug(self.name, "Tracker has stopped.")
+
+    def prepare(self, config, watch_dirs):
+        """Called once in the runtime before polling starts."""
+        pass
+
+    def poll(self, config, watch_dirs):
+        """Checks the source once and updates the tracker state."""
+        raise NotImplementedError
@@ -0,0 +1,117 @@
+# This file is part of Trackma.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+
+
+class TrackerList:
+    """
+    List of shows the trackers and the library scanner match against.
+
+    It's patched one show at a time by the engine instead of being
+    rebuilt after every change. Adding or removing a show replaces the
+    inner dictionaries (copy-on-write) so the tracker threads can keep
+    iterating over them safely; changing an existing show just swaps
+    its entry.
+
+    For compatibility it unpacks like the old ``(showlist, altnames_map)``
+    tuple.
+    """
+
+    def __init__(self, entries=(), altnames_map=None):
+        self.shows = {entry['id']: entry for entry in entries}
+        self.altnames_map = dict(altnames_map or {})
+        self.version = 0
+
+        # Lowercase title -> set of show IDs, used for exact matches
+        self.titles = {}
+        for entry in self.shows.values():
+            self._index_titles(entry)
+
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter((self.shows, self.altnames_map))
+
+    def __getitem__(self, index):
+        return (self.shows, self.altnames_map)[index]
+
+    def __len__(self):
+        return 2
+
+    def _index_titles(self, entry):
+        for title in entry['titles']:
+            self.titles.setdefault(title.lower(), set()).add(entry['id'])
+
+    def _unindex_titles(self, entry):
+        for title in entry['titles']:
+            ids = self.titles.get(title.lower())
+            if ids:
+                ids.discard(entry['id'])
+                if not ids:
+                    del self.titles[title.lower()]
+
+    def update_show(self, entry):
+        """Adds or replaces the entry of a single show."""
+        with self._lock:
+            showid = entry['id']
+            old = self.shows.get(showid)
+
+            if old is None:
+                shows = dict(self.shows)
+                shows[showid] = entry
+                self.shows = shows
+            else:
+                self.shows[showid] = entry
+                if old['titles'] != entry['titles']:
+                    self._unindex_titles(old)
+
+            if old is None or old['titles'] != entry['titles']:
+                self._index_titles(entry)
+
+            self.version += 1
+
+    def remove_show(self, showid):
+        """Removes a single show from the list, if it's there."""
+        with self._lock:
+            if showid not in self.shows:
+                return
+
+            shows = dict(self.shows)
+            old = shows.pop(showid)
+            self.shows = shows
+
+            self._unindex_titles(old)
+            self.version += 1
+
+    def set_altname(self, showid, altname):
+        """Sets (or clears, if empty) the alternative name of a show."""
+        with self._lock:
+            altnames_map = {name: sid for name, sid in self.altnames_map.items()
+                            if sid != showid}
+            if altname:
+                altnames_map[altname.lower()] = showid
+            self.altnames_map = altnames_map
+
+            self.version += 1
+
+    def find_title(self, title):
+        """Returns the show entry whose title exactly matches **title**, if unique."""
+        with self._lock:
+            ids = self.titles.get(title.lower())
+            if ids and len(ids) == 1:
+                return self.shows.get(next(iter(ids)))
+            return None
@@ -27,13 +27,14 @@ except ImportError:
 import cmd
 import shlex
 import textwrap
-import re
 import argparse
+import contextlib
 from operator import itemgetter  # Used for sorting list
 
 from trackma.engine import Engine
 from trackma.accounts import AccountManager
 from trackma import messenger
+from trackma import titlesearch
 from trackma import utils
 
 _COLOR_RESET = '\033[0m'
@@ -54,6 +55,85 @@ _PCOLOR_API = '\001\033[0;34m\002'
 _PCOLOR_MEDIATYPE = '\001\033[0;33m\002'
 _PCOLOR_FILTER = '\001\033[0;35m\002'
 
+# Fields written by the machine-readable list formats
+EXPORT_FIELDS = ('id', 'title', 'altname', 'my_progress', 'total', 'my_score',
+                 'my_status', 'status', 'my_start_date', 'my_finish_date', 'url')
+EXPORT_FORMATS = ('table', 'json', 'tsv')
+LIST_SORTS = ('id', 'title', 'my_progress', 'total', 'my_score')
+
+
+def export_rows(showlist, altnames):
+    """Yields a dictionary with the EXPORT_FIELDS of every show."""
+    for show in showlist:
+        row = {field: show.get(field) for field in EXPORT_FIELDS}
+        row['altname'] = altnames.get(show['id'])
+        for field in ('my_start_date', 'my_finish_date'):
+            if row[field]:
+                row[field] = row[field].isoformat()
+        yield row
+
+
+def write_json(rows, out):
+    """Writes **rows** as a JSON array, one object per line, as they come."""
+    import json
+
+    out.write('[')
+    separator = '\n'
+    for row in rows:
+        out.write(separator)
+        out.write(json.dumps(row, default=str))
+        separator = ',\n'
+    out.write('\n]\n')
+
+
+def write_tsv(rows, out):
+    """Writes **rows** as tab separated values with a header line."""
+    out.write('\t'.join(EXPORT_FIELDS) + '\n')
+    for row in rows:
+        out.write('\t'.join(
+            '' if row[field] is None else
+            str(row[field]).replace('\t', ' ').replace('\n', ' ')
+            for field in EXPORT_FIELDS) + '\n')
+
+
+def write_list(engine, fmt, status=None, sort='title', out=None):
+    """
+    Writes the list of **engine** in **fmt** ('json' or 'tsv'),
+    only with the shows in **status** if given.
+    """
+    showlist = engine.filter_list(status) if status is not None else engine.get_list()
+    showlist = sorted(showlist, key=itemgetter(sort))
+    rows = export_rows(showlist, engine.altnames())
+
+    if fmt == 'json':
+        write_json(rows, out or sys.stdout)
+    elif fmt == 'tsv':
+        write_tsv(rows, out or sys.stdout)
+    else:
+        raise ValueError("Unknown format: {}".format(fmt))
+
+
+def list_parser():
+    parser = argparse.ArgumentParser(prog='list', add_help=False)
+    parser.add_argument('-s', '--status',
+                        help='Status to list (like in the filter command), or "all".')
+    parser.add_argument('-f', '--format', choices=EXPORT_FORMATS,
+                        help='Output format (default: table).')
+    parser.add_argument('--json', dest='format', action='store_const', const='json')
+    parser.add_argument('--tsv', dest='format', action='store_const', const='tsv')
+    parser.add_argument('--sort', choices=LIST_SORTS)
+    return parser
+
+
+def guess_status(engine, string):
+    """Returns the status named **string**, or None for all. Raises KeyError."""
+    if string.lower() == 'all':
+        return None
+    for k, v in engine.mediainfo['statuses_dict'].items():
+        if string.lower() == v.lower().replace(' ', ''):
+            return k
+    raise KeyError(string)
+
 
 class Trackma_cmd(cmd.Cmd):
     """
@@ -68,7 +148,12 @@ class Trackma_cmd(cmd.Cmd):
     stdout = sys.stdout
     in_prompt = False
     sortedlist = []
+    # One-shot commands that only need the cached list
+    readonly_commands = ('list', 'ls', 'info', 'search', 'viewqueue')
     needed_args = {
+        'list':         (0, 6),
+        'ls':           (0, 6),
+        'import':       (1, 5),
         'altname':      (1, 2),
         'filter':       (0, 1),
         'sort':         1,
@@ -85,7 +170,8 @@ class Trackma_cmd(cmd.Cmd):
         'status':       2,
     }
 
-    def __init__(self, account_num=None, debug=False, interactive=True):
+    def __init__(self, account_num=None, debug=False, interactive=True, attach=False,
+                 output_format='table'):
         super().__init__()
 
         if interactive:
@@ -98,9 +184,14 @@ class Trackma_cmd(cmd.Cmd):
 
         self.interactive = interactive
         self.debug = debug
+        self.attach = attach
+        self.output_format = output_format
 
         self.accountman = Trackma_accounts()
-        if account_num:
+        if attach:
+            # The daemon already has an account loaded
+            self.account = None
+        elif account_num:
             try:
                 self.account = self.accountman.get_account(account_num)
             except KeyError:
@@ -115,6 +206,29 @@ class Trackma_cmd(cmd.Cmd):
     def forget_account(self):
         self.accountman.set_default(None)
 
+    def run_batch(self, lines):
+        """
+        Runs the commands in **lines**, one per line, against the loaded
+        engine. The list cache and the queue are saved once at the end,
+        when the engine is unloaded and the queue sent if configured to.
+        Empty lines and lines starting with # are skipped.
+        """
+        # The daemon saves on its own
+        batch = contextlib.nullcontext() if self.attach else self.engine.batch()
+        with batch:
+            for line in lines:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line in ('quit', 'exit', 'EOF'):
+                    break
+                self.onecmd(line)
+
+        try:
+            self.engine.unload()
+        except utils.TrackmaError as e:
+            self.display_error(e)
+
     def _update_prompt(self):
         self.prompt = "{c_u}{u}{c_r} [{c_a}{a}{c_r}] ({c_mt}{mt}{c_r}) {c_s}{s}{c_r} >> ".format(
             u=self.engine.get_userconfig('username'),
@@ -155,14 +269,19 @@ class Trackma_cmd(cmd.Cmd):
         if do.lower() == 'y':
             self.do_add([show['title']])
 
-    def start(self):
+    def start(self, minimal=False):
         """
         Initializes the engine
 
-        Creates an Engine object and starts it.
+        Creates an Engine object and starts it. With **minimal** only
+        the cached list is loaded, see Engine.start.
         """
 
-        if self.interactive:
+        if self.attach:
+            from trackma import ipc
+            self.engine = ipc.EngineProxy(
+                message_handler=self.messagehandler if self.interactive else None)
+        elif self.interactive:
             print('Initializing engine...')
             self.engine = Engine(self.account, self.messagehandler)
         else:
@@ -177,7 +296,7 @@ class Trackma_cmd(cmd.Cmd):
         self.engine.connect_signal('episode_changed', self._load_list)
         self.engine.connect_signal('prompt_for_update', self._ask_update)
         self.engine.connect_signal('prompt_for_add', self._ask_add)
-        self.engine.start()
+        self.engine.start(minimal)
 
         # Start with default filter selected
         self.filter_num = self.engine.mediainfo['statuses'][0]
@@ -356,11 +475,41 @@ class Trackma_cmd(cmd.Cmd):
     def do_list(self, args):
         """
         Lists all shows available in the local list.
+        With a format other than table, all the shows are written
+        in the given format, in the current filter unless a
+        status is given ("all" for the whole list).
 
+        :optparam --status Status to list
+        :optparam --format Output format: table, json or tsv
+        :optparam --sort Sort type
         :name list|ls
+        :usage list [--status <status>] [--format <format>] [--sort <sort type>]
+        :example list --status all --format json
         """
-        # Show the list in memory
-        self._make_list(self.sortedlist)
+        try:
+            options = list_parser().parse_args(args)
+        except SystemExit:
+            return
+
+        fmt = options.format or self.output_format
+        if fmt == 'table' and not options.status and not options.sort:
+            # Show the list in memory
+            self._make_list(self.sortedlist)
+            return
+
+        try:
+            status = self.filter_num if options.status is None else \
+                guess_status(self.engine, options.status)
+        except KeyError:
+            print("Invalid status.")
+            return
+
+        if fmt == 'table':
+            showlist = self.engine.filter_list(status) if status is not None else self.engine.get_list()
+            self._make_list(list(enumerate(
+                sorted(showlist, key=itemgetter(options.sort or self.sort)), 1)))
+        else:
+            write_list(self.engine, fmt, status, options.sort or self.sort)
 
     def do_info(self, args):
         """
@@ -394,8 +543,8 @@ class Trackma_cmd(cmd.Cmd):
         :param pattern Regex pattern to search for.
         :usage search <pattern>
         """
-        sortedlist = list(v for v in self.sortedlist if re.search(
-            args[0], v[1]['title'], re.I))
+        regex = titlesearch.compile_pattern(args[0])
+        sortedlist = list(v for v in self.sortedlist if regex.search(v[1]['title']))
         self._make_list(sortedlist)
 
     def do_add(self, args):
@@ -450,6 +599,57 @@ class Trackma_cmd(cmd.Cmd):
         except utils.TrackmaError as e:
             self.display_error(e)
 
+    def do_import(self, args):
+        """
+        Imports a list exported from another place, like a MyAnimeList
+        XML export or a CSV, TSV or JSON file written by list.
+        Entries are matched to the shows of the list by title, or else
+        searched for and added. The changes are queued at once.
+        IDs are only used for MyAnimeList exports on a MyAnimeList
+        account, or with --ids.
+
+        :param file File to import (.xml, .xml.gz, .csv, .tsv, .json).
+        :optparam --format Format of the file: mal, csv or json (default: from the extension)
+        :optparam --dry-run Only show what would change
+        :optparam --ids Match by ID too, for files written with this API
+        :usage import <file> [--format <format>] [--dry-run] [--ids]
+        :example import animelist.xml.gz --dry-run
+        """
+        from trackma import importer
+
+        parser = argparse.ArgumentParser(prog='import', add_help=False)
+        parser.add_argument('file')
+        parser.add_argument('--format', choices=importer.FORMATS)
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--ids', action='store_true')
+        try:
+            options = parser.parse_args(args)
+        except SystemExit:
+            return
+
+        if self.attach:
+            print("Importing isn't available with --attach.")
+            return
+
+        try:
+            fmt = options.format or importer.guess_format(options.file)
+            # The IDs of other files may be from any API
+            use_ids = options.ids or (
+                fmt == 'mal' and self.engine.api_info['shortname'] == 'mal')
+
+            imp = importer.Importer(self.engine, use_ids=use_ids)
+            plan = imp.import_file(options.file, fmt, dry_run=options.dry_run)
+        except utils.TrackmaError as e:
+            self.display_error(e)
+            return
+
+        print("%d entries: %d shows to change, %d to add." % (
+            plan.entries, len(plan.changes), len(plan.adds)))
+        if plan.unmatched:
+            print("Not found (%d):" % len(plan.unmatched))
+            for title in plan.unmatched:
+                print("  %s" % title)
+
     def do_rescan(self, args):
         """
         Re-scans the local library.
@@ -690,6 +890,25 @@ class Trackma_cmd(cmd.Cmd):
         else:
             print("Queue is empty.")
 
+    def do_stats(self, args):
+        """
+        Shows how long the interface and the user hooks took to handle
+        each engine signal.
+        """
+        stats = self.engine.stats()
+        if not stats['signals'] and not stats['hooks']:
+            print("No signals emitted yet.")
+            return
+
+        print("%-32s %7s %7s %10s %10s %10s" %
+              ('Signal', 'Calls', 'Errors', 'Total ms', 'Mean ms', 'P95 ms'))
+        for section in ('signals', 'hooks'):
+            for name, stat in sorted(stats[section].items(),
+                                     key=lambda item: item[1]['total'], reverse=True):
+                print("%-32s %7d %7d %10.1f %10.1f %10.1f" % (
+                    name, stat['count'], stat['errors'], stat['total'] * 1000,
+                    stat['mean'] * 1000, stat['p95'] * 1000))
+
     def do_exit(self, args):
         self.do_quit(args)
 
@@ -846,10 +1065,10 @@ class Trackma_cmd(cmd.Cmd):
             print(out)
 
     def _guess_status(self, string):
-        for k, v in self.engine.mediainfo['statuses_dict'].items():
-            if string.lower() == v.lower().replace(' ', ''):
-                return k
-        raise KeyError
+        status = guess_status(self.engine, string)
+        if status is None:
+            raise KeyError(string)
+        return status
 
     def _parse_doc(self, cmd, doc):
         lines = doc.split('\n')
@@ -883,10 +1102,10 @@ class Trackma_cmd(cmd.Cmd):
         # Fixed column widths
         col_id_length = 7
         col_index_length = 6
-        col_title_length = 5
         col_episodes_length = 9
         col_score_length = 6
         altnames = self.engine.altnames()
+        has_progress = self.engine.mediainfo['has_progress']
 
         # Calculate maximum width for the title column
         # based on the width of the terminal
@@ -894,16 +1113,6 @@ class Trackma_cmd(cmd.Cmd):
         max_title_length = width - col_id_length - \
             col_episodes_length - col_score_length - col_index_length - 5
 
-        # Find the widest title so we can adjust the title column
-        for index, show in showlist:
-            if len(show['title']) > col_title_length:
-                if len(show['title']) > max_title_length:
-                    # Stop if we exceeded the maximum column width
-                    col_title_length = max_title_length
-                    break
-                else:
-                    col_title_length = len(show['title'])
-
         # Print header
         print("| {0:{1}} {2:{3}} {4:{5}} {6:{7}} |".format(
             'Index',    col_index_length,
@@ -913,7 +1122,7 @@ class Trackma_cmd(cmd.Cmd):
 
         # List shows
         for index, show in showlist:
-            if self.engine.mediainfo['has_progress']:
+            if has_progress:
                 episodes_str = "{0:3} / {1}".format(
                     show['my_progress'], show['total'] or '?')
             else:
@@ -1049,6 +1258,55 @@ class Trackma_accounts(AccountManager):
             print("No accounts.")
 
 
+def export_list(args, options):
+    """
+    Writes the list to stdout in a machine-readable format, straight
+    from a minimally started engine, without the command interpreter.
+    """
+    if args.attach:
+        from trackma import ipc
+        engine = ipc.EngineProxy()
+    else:
+        accountman = Trackma_accounts()
+        try:
+            account = accountman.get_account(args.account) if args.account \
+                else accountman.select_account(False)
+        except (KeyError, ValueError):
+            print("Account {} doesn't exist.".format(args.account), file=sys.stderr)
+            return 1
+
+        engine = Engine(account)
+        engine.set_config("tracker_enabled", False)
+        engine.set_config("library_autoscan", False)
+        engine.set_config("use_hooks", False)
+
+    try:
+        engine.start(minimal=True)
+        try:
+            status = guess_status(engine, options.status or 'all')
+        except KeyError:
+            print("Invalid status.", file=sys.stderr)
+            return 1
+
+        write_list(engine, options.format, status, options.sort or 'title')
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output piped into something that stopped reading, like head
+        sys.stdout = None
+    except utils.TrackmaFatal as e:
+        if not args.attach:
+            accountman.set_default(None)
+        print("%s: %s" % (type(e).__name__, e), file=sys.stderr)
+        return 1
+    finally:
+        if args.attach:
+            engine.unload()
+        else:
+            # Nothing changed, so just release the database lock
+            engine.unload(force=True)
+    return 0
+
+
 def main():
     # Process args
     parser = argparse.ArgumentParser()
@@ -1056,29 +1314,58 @@ def main():
                         help='Use specific account number.')
     parser.add_argument('-d', '--debug', action='store_true',
                         help='Show debugging messages.')
+    parser.add_argument('--attach', action='store_true',
+                        help='Use the engine of a running trackma-daemon.')
+    parser.add_argument('--json', dest='format', action='store_const', const='json',
+                        help='Write lists as JSON.')
+    parser.add_argument('--tsv', dest='format', action='store_const', const='tsv',
+                        help='Write lists as tab separated values.')
+    parser.add_argument('-b', '--batch', metavar='FILE',
+                        help='Run the commands in FILE (- for stdin), one per line, and exit.')
     parser.add_argument(
         'cmd', nargs='?', help='Run the following command and exit. Will run in interactive mode if not specified. - will take in commands from stdin.')
     parser.add_argument('args', nargs=argparse.REMAINDER,
                         help='Arguments for the aforementioned command, if any.')
     args = parser.parse_args()
 
+    if args.cmd in ('list', 'ls'):
+        try:
+            options = list_parser().parse_args(args.args)
+        except SystemExit:
+            sys.exit(2)
+        options.format = options.format or args.format
+        if options.format not in (None, 'table'):
+            sys.exit(export_list(args, options))
+
     # Boot Trackma CLI
+    if args.cmd == '-':
+        args.batch = '-'
+    if args.batch == '-':
+        batch_file = sys.stdin
+    elif args.batch:
+        try:
+            batch_file = open(args.batch)
+        except OSError as e:
+            print("Couldn't open batch file: %s" % e, file=sys.stderr)
+            sys.exit(1)
+
     main_cmd = Trackma_cmd(args.account, args.debug,
-                           interactive=args.cmd is None)
+                           interactive=args.cmd is None and not args.batch, attach=args.attach,
+                           output_format=args.format or 'table')
     try:
-        main_cmd.start()
-        if args.cmd:
-            if args.cmd == '-':
-                # Run commands from stdin
-                for cmd in sys.stdin:
-                    main_cmd.onecmd(cmd)
-            else:
-                # Run the specified command in the arguments
-                main_cmd.execute(args.cmd, args.args, args.cmd)
+        main_cmd.start(minimal=args.cmd in Trackma_cmd.readonly_commands)
+        if args.batch:
+            # Run commands from the file or stdin
+            with batch_file:
+                main_cmd.run_batch(batch_file)
+        elif args.cmd:
+            # Run the specified command in the arguments
+            main_cmd.execute(args.cmd, args.args, args.cmd)
         else:
             main_cmd.cmdloop()
     except utils.TrackmaFatal as e:
-        main_cmd.forget_account()
+        if not args.attach:
+            main_cmd.forget_account()
         print("%s%s: %s%s" % (_COLOR_FATAL, type(e).__name__, e, _COLOR_RESET))
 
 
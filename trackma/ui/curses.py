@@ -25,6 +25,7 @@ except ImportError:
           "urwid package.")
     sys.exit(-1)
 
+import bisect
 import re
 import urwid
 import webbrowser
@@ -46,6 +47,7 @@ class Trackma_urwid():
     engine = None
     mainloop = None
     cur_sort = 'title'
+    cur_filter = 0
     sorts_iter = cycle(('my_progress', 'total', 'my_score', 'id', 'title'))
     cur_order = False
     orders_iter = cycle((True, False))
@@ -196,36 +198,44 @@ class Trackma_urwid():
             self.tracker_state(track_info)
 
         for status in self.filters_nums:
-            self.lists[status] = urwid.ListBox(ShowWalker([]))
+            self.lists[status] = urwid.ListBox(
+                ShowWalker(sort_key=self.cur_sort, reverse=self.cur_order))
+            self.filters_sizes.append(0)
 
         self._rebuild_lists()
 
-        # Put the number of shows in every status in a list
-        for status in self.filters_nums:
-            self.filters_sizes.append(len(self.lists[status].body))
-
         self.set_filter(0)
         self.status('Ready.')
         self.started = True
 
     def _rebuild_lists(self, status=None):
         if status:
-            self.lists[status].body[:] = []
             showlist = self.engine.filter_list(status)
+            items = {status: []}
         else:
-            for _status in self.lists.keys():
-                self.lists[_status].body[:] = []
             showlist = self.engine.get_list()
+            items = {_status: [] for _status in self.lists.keys()}
 
         library = self.engine.library()
-        sortedlist = sorted(showlist, key=itemgetter(
-            self.cur_sort), reverse=self.cur_order)
+        for show in showlist:
+            items[show['my_status']].append(self._make_item(show, library))
+
+        for (_status, _items) in items.items():
+            self.lists[_status].body.set_order(self.cur_sort, self.cur_order, _items)
+            self._update_size(_status)
 
-        for show in sortedlist:
-            item = ShowItem(show, self.engine.mediainfo['has_progress'], self.engine.altname(
-                show['id']), library.get(show['id']))
+    def _make_item(self, show, library=None):
+        if library is None:
+            library = self.engine.library()
+        return ShowItem(show, self.engine.mediainfo['has_progress'],
+                        self.engine.altname(show['id']), library.get(show['id']))
 
-            self.lists[show['my_status']].body.append(item)
+    def _update_size(self, status):
+        index = self.filters_nums.index(status)
+        self.filters_sizes[index] = len(self.lists[status].body)
+        if self.cur_filter == index:
+            self.header_filter.set_text("Filter:%s (%d)" % (
+                self.filters[status], self.filters_sizes[index]))
 
     def start(self, account):
         """Starts the engine"""
@@ -238,8 +248,8 @@ class Trackma_urwid():
         self.engine.connect_signal('score_changed', self.changed_show)
         self.engine.connect_signal('status_changed', self.changed_show_status)
         self.engine.connect_signal('playing', self.playing_show)
-        self.engine.connect_signal('show_added', self.changed_list)
-        self.engine.connect_signal('show_deleted', self.changed_list)
+        self.engine.connect_signal('show_added', self.added_show)
+        self.engine.connect_signal('show_deleted', self.deleted_show)
         self.engine.connect_signal('show_synced', self.changed_show)
         self.engine.connect_signal('queue_changed', self.changed_queue)
         self.engine.connect_signal('prompt_for_update', self.prompt_update)
@@ -341,16 +351,21 @@ class Trackma_urwid():
         _sort = next(self.sorts_iter)
         self.cur_sort = _sort
         self.header_sort.set_text("Sort:%s" % _sort)
-        self._rebuild_lists()
+        self._sort_lists()
         self.status("Ready.")
 
     def change_sort_order(self):
         self.status("Sorting...")
         _order = next(self.orders_iter)
         self.cur_order = _order
-        self._rebuild_lists()
+        self._sort_lists()
         self.status("Ready.")
 
+    def _sort_lists(self):
+        # The shows didn't change, so keep their items
+        for showlist in self.lists.values():
+            showlist.body.set_order(self.cur_sort, self.cur_order)
+
     def do_update(self):
         item = self._get_selected_item()
         if item:
@@ -685,9 +700,20 @@ class Trackma_urwid():
             self.mainloop.draw_screen()
 
     def changed_show_status(self, show, old_status=None):
-        self._rebuild_lists(show['my_status'])
-        if old_status is not None:
-            self._rebuild_lists(old_status)
+        # Move the show's item to its new list
+        item = None
+        for status in ([old_status] if old_status in self.lists else self.lists):
+            item = self.lists[status].body.remove_show(show['id'])
+            if item:
+                self._update_size(status)
+                break
+
+        if item:
+            item.update(show)
+        else:
+            item = self._make_item(show)
+        self.lists[show['my_status']].body.insert_show(item)
+        self._update_size(show['my_status'])
 
         go_filter = 0
         for _filter in self.filters_nums:
@@ -727,8 +753,14 @@ class Trackma_urwid():
         self.lists[status].body.playing_show(show, is_playing)
         self.mainloop.draw_screen()
 
-    def changed_list(self, show):
-        self._rebuild_lists(show['my_status'])
+    def added_show(self, show):
+        self.lists[show['my_status']].body.insert_show(self._make_item(show))
+        self._update_size(show['my_status'])
+
+    def deleted_show(self, show):
+        for status in self.lists:
+            if self.lists[status].body.remove_show(show['id']):
+                self._update_size(status)
 
     def ask(self, msg, callback, data=u''):
         self.asker = Asker(msg, str(data))
@@ -1066,12 +1098,83 @@ class SearchItem(urwid.WidgetWrap):
 
 
 class ShowWalker(urwid.SimpleListWalker):
+    """
+    List of ShowItems kept sorted by **sort_key**.
+
+    The sort keys are kept in a parallel ascending list, so shows can be
+    found, inserted and moved with bisect instead of sorting the whole
+    list again. With **reverse** the items are shown in descending order.
+    """
+
+    def __init__(self, contents=(), sort_key='title', reverse=False):
+        super().__init__([])
+        self.set_order(sort_key, reverse, contents)
+
+    def _key(self, show):
+        value = show[self.sort_key]
+        # Missing values go last, ties are broken by ID
+        return (value is None, value if value is not None else 0, show['id'])
+
+    def _position(self, index):
+        # Position in the walker of the key at **index**
+        return len(self.keys) - 1 - index if self.reverse else index
+
+    def set_order(self, sort_key, reverse, items=None):
+        """Sorts the list again, optionally replacing its **items**."""
+        if items is None:
+            items = list(self)
+
+        self.sort_key = sort_key
+        self.reverse = reverse
+
+        keyed = sorted(((self._key(item.show), item) for item in items),
+                       key=itemgetter(0))
+        self.keys = [key for (key, item) in keyed]
+        self.item_keys = {item.showid: key for (key, item) in keyed}
+
+        ordered = [item for (key, item) in keyed]
+        if reverse:
+            ordered.reverse()
+        self[:] = ordered
+        if ordered:
+            self.set_focus(0)
+
     def _get_showitem(self, showid):
-        for i, item in enumerate(self):
-            if showid == item.showid:
-                return (i, item)
-        #raise Exception('Show not found in ShowWalker.')
-        return (None, None)
+        key = self.item_keys.get(showid)
+        if key is None:
+            return (None, None)
+
+        position = self._position(bisect.bisect_left(self.keys, key))
+        return (position, self[position])
+
+    def insert_show(self, item):
+        """Inserts **item** in its sorted position, keeping the focus."""
+        if item.showid in self.item_keys:
+            self.remove_show(item.showid)
+
+        key = self._key(item.show)
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.item_keys[item.showid] = key
+
+        position = self._position(index)
+        focus = self.focus if len(self) else None
+        self.insert(position, item)
+        if focus is not None and position <= focus:
+            self.set_focus(focus + 1)
+
+    def remove_show(self, showid):
+        """Removes the item of **showid** and returns it, or None."""
+        (position, item) = self._get_showitem(showid)
+        if item is None:
+            return None
+
+        focus = self.focus
+        self.keys.pop(bisect.bisect_left(self.keys, self.item_keys.pop(showid)))
+        del self[position]
+        if len(self) and position < focus:
+            self.set_focus(focus - 1)
+        return item
 
     def highlight_show(self, show, tocolor):
         (position, showitem) = self._get_showitem(show['id'])
@@ -1081,6 +1184,13 @@ class ShowWalker(urwid.SimpleListWalker):
         (position, showitem) = self._get_showitem(show['id'])
         if showitem:
             showitem.update(show)
+            if self._key(show) != self.item_keys[show['id']]:
+                # Its sort value changed, move it but keep it focused
+                focused = (position == self.focus)
+                self.remove_show(show['id'])
+                self.insert_show(showitem)
+                if focused:
+                    self.select_show(show)
             return True
         else:
             return False
@@ -1164,6 +1274,8 @@ class ShowItem(urwid.WidgetWrap):
 
     def update(self, show):
         if show['id'] == self.showid:
+            self.show = show
+
             # Update progress
             if self.has_progress:
                 self.episodes_str.set_text(
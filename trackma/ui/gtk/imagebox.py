@@ -14,61 +14,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import os
-import threading
-import urllib.request
-from io import BytesIO
+import importlib.util
 
 from gi.repository import GLib, Gtk, GdkPixbuf
+from trackma import imagecache
 from trackma import utils
 
-try:
-    import Image
-    imaging_available = True
-except ImportError:
-    try:
-        from PIL import Image
-        imaging_available = True
-    except ImportError:
-        imaging_available = False
-
-
-class ImageThread(threading.Thread):
-    def __init__(self, url, filename, width, height, callback):
-        threading.Thread.__init__(self)
-        self._url = url
-        self._filename = filename
-        self._width = width
-        self._height = height
-        self._callback = callback
-        self._stop_request = threading.Event()
-
-    def run(self):
-        self._save_image(self._download_file())
-
-        if self._stop_request.is_set():
-            return
-
-        if os.path.exists(self._filename):
-            GLib.idle_add(self._callback, self._filename)
-
-    def _download_file(self):
-        request = urllib.request.Request(self._url)
-        request.add_header(
-            "User-Agent", "TrackmaImage/{}".format(utils.VERSION))
-        return BytesIO(urllib.request.urlopen(request).read())
-
-    def _save_image(self, img_bytes):
-        if imaging_available:
-            image = Image.open(img_bytes)
-            image.thumbnail((self._width, self._height), Image.ANTIALIAS)
-            image.convert("RGB").save(self._filename)
-        else:
-            with open(self._filename, 'wb') as img_file:
-                img_file.write(img_bytes.read())
-
-    def stop(self):
-        self._stop_request.set()
+# The image cache scales the images with PIL
+imaging_available = importlib.util.find_spec('PIL') is not None
 
 
 class ImageBox(Gtk.HBox):
@@ -84,7 +37,7 @@ class ImageBox(Gtk.HBox):
         self._label_holder = Gtk.Label()
         self._label_holder.set_size_request(width, height)
 
-        self._image_thread = None
+        self._image_future = None
 
         if imaging_available:
             self.pack_start(self._label_holder, False, False, 0)
@@ -119,17 +72,40 @@ class ImageBox(Gtk.HBox):
         self._image.show()
         self._label_holder.hide()
 
-    def set_image_remote(self, url, filename):
+    def set_image_remote(self, url):
         if not imaging_available:
             return
 
-        if self._image_thread:
-            self._image_thread.stop()
+        if self._image_future:
+            self._image_future.cancel()
+
+        cache = imagecache.get_cache()
+        size = (self._width, self._height)
+        filename = cache.cached(url, size)
+        if filename:
+            self._image_future = None
+            self.set_image(filename)
+            return
 
         self.set_text("Loading...")
-        self._image_thread = ImageThread(
-            url, filename, self._width, self._height, self.set_image)
-        self._image_thread.start()
+        self._image_future = cache.fetch(url, size)
+        self._image_future.add_done_callback(self._image_fetched)
+
+    def _image_fetched(self, future):
+        # Called from a cache thread
+        if future is not self._image_future or future.cancelled():
+            return
+
+        try:
+            GLib.idle_add(self._set_fetched_image, future, future.result())
+        except (utils.TrackmaError, OSError) as e:
+            GLib.idle_add(self.set_text, "Couldn't get image")
+            print("Warning: Error getting image ({})".format(e))
+
+    def _set_fetched_image(self, future, filename):
+        # Another image may have been asked for in the meantime
+        if future is self._image_future:
+            self.set_image(filename)
 
 
 def scale(w, h, x, y, maximum=True):
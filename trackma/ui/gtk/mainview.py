@@ -15,17 +15,22 @@
 #
 
 import html
+import itertools
 import os
 import threading
 
 from gi.repository import GLib, Gtk, Gdk, GObject
 from trackma.ui.gtk import gtk_dir
-from trackma.ui.gtk.imagebox import ImageBox
+from trackma.ui.gtk.imagebox import ImageBox, imaging_available
 from trackma.ui.gtk.showeventtype import ShowEventType
 from trackma.ui.gtk.showtreeview import ShowTreeView, ShowListStore, ShowListFilter
+from trackma import imagecache
 from trackma import utils
 from trackma import messenger
 
+# Shows added to the list per main loop iteration after the first page
+POPULATE_BATCH = 500
+
 
 @Gtk.Template.from_file(os.path.join(gtk_dir, 'data/mainview.ui'))
 class MainView(Gtk.Box):
@@ -73,12 +78,16 @@ class MainView(Gtk.Box):
         self._debug = debug
 
         self._image_thread = None
+        self._prefetcher = imagecache.Prefetcher((100, 150))
+        self._prefetch_source = None
         self._current_page = None
         self.statusbox_handler = None
         self.notebook_switch_handler = None
         self._hovering_over_tabs = None
         self._pages = {}
         self._page_handler_ids = {}
+        self._pending_shows = {}
+        self._populate_generation = 0
 
         self._init_widgets()
         self._init_signals()
@@ -260,6 +269,8 @@ class MainView(Gtk.Box):
                 self._pages[status].connect('show-action', self._on_show_action))
             self._page_handler_ids[status].append(
                 self._pages[status].connect('column-toggled', self._on_column_toggled))
+            self._page_handler_ids[status].append(
+                self._pages[status].connect('view-changed', self._queue_prefetch))
             self.notebook.append_page(self._pages[status],
                                       page_title)
 
@@ -267,23 +278,69 @@ class MainView(Gtk.Box):
         self.notebook.show_all()
 
     def populate_all_pages(self):
+        """
+        Fills the list with the shows of the visible page right away,
+        and with the rest in batches while the main loop is idle.
+
+        The pages only filter and sort the list once they're first shown.
+        """
+        self._populate_generation += 1
+
         for status in self._pages:
             self._block_handlers_for_status(status)
-            tree_view = self._pages[status].show_tree_view
-            tree_view.freeze_child_notify()
+            self._pages[status].detach_model()
 
         self._list.clear()
-        library = self._engine.library()
+        self._pending_shows = {}
+
+        page = self.notebook.get_nth_page(self.notebook.get_current_page())
+        current_status = page.status if page else None
+        first = []
         for show in self._engine.get_list():
-            self._list.append(show,
-                              self._engine.altname(show['id']),
-                              library.get(show['id']))
+            if current_status is None or show['my_status'] == current_status:
+                first.append(show)
+            else:
+                self._pending_shows[show['id']] = show
+
+        self._list.append_shows(first, self._engine.altnames(), self._engine.library())
+        if page:
+            page.attach_model()
 
-        self._list.set_sort_column_id(1, Gtk.SortType.ASCENDING)
         for status in self._pages:
-            tree_view = self._pages[status].show_tree_view
-            tree_view.thaw_child_notify()
             self._unblock_handlers_for_status(status)
+        self._update_page_titles()
+
+        if self._pending_shows:
+            GLib.idle_add(self._populate_pending, self._populate_generation)
+
+    def _populate_pending(self, generation):
+        if generation != self._populate_generation:
+            # The list was populated again in the meantime
+            return False
+
+        batch = []
+        for show_id in itertools.islice(self._pending_shows, POPULATE_BATCH):
+            batch.append(self._pending_shows[show_id])
+        for show in batch:
+            del self._pending_shows[show['id']]
+
+        # Detach the views that aren't visible while inserting
+        current = self.notebook.get_nth_page(self.notebook.get_current_page())
+        for page in self._pages.values():
+            if page is not current:
+                page.detach_view()
+
+        self._list.append_shows(batch, self._engine.altnames(), self._engine.library())
+
+        for page in self._pages.values():
+            page.attach_view()
+        self._update_page_titles()
+
+        return bool(self._pending_shows)
+
+    def _update_page_titles(self):
+        for page in self._pages.values():
+            page.update_title()
 
     def _block_handlers_for_status(self, status):
         for handler_id in self._page_handler_ids[status]:
@@ -412,6 +469,7 @@ class MainView(Gtk.Box):
     def _update_show(self, show):
         status = show['my_status']
         self._list.update(show)
+        self._update_page_titles()
         if self._current_page and show['id'] == self._current_page.selected_show:
             self.btn_episode_show_entry.set_label(str(show['my_progress']))
             self.spinbtn_score.set_value(show['my_score'])
@@ -428,11 +486,14 @@ class MainView(Gtk.Box):
     def _update_show_status(self, show, old_status):
         # Rebuild lists
         status = show['my_status']
+        # It'll be in the list already, or never if it was deleted
+        self._pending_shows.pop(show['id'], None)
         try:
             self._engine.get_show_info(showid=show['id'])
             self._list.update_or_append(show)
         except utils.EngineError:
             self._list.remove(show)
+        self._update_page_titles()
         pagenumber = self._pages[status].pagenumber
         current_page = self.notebook.get_current_page()
         if current_page != pagenumber:
@@ -470,7 +531,31 @@ class MainView(Gtk.Box):
 
     def _on_switch_notebook_page(self, notebook, page, page_num):
         self._current_page = page
+        page.attach_model()
         self._update_widgets_for_selected_show()
+        self._queue_prefetch()
+
+    def _queue_prefetch(self, *args):
+        # Wait for scrolling to settle
+        if self._prefetch_source is None:
+            self._prefetch_source = GLib.timeout_add(100, self._prefetch_images)
+
+    def _prefetch_images(self):
+        self._prefetch_source = None
+        if not (self._current_page and imaging_available):
+            return False
+
+        urls = []
+        for show_id in self._current_page.visible_shows():
+            try:
+                show = self._engine.get_show_info(show_id)
+            except utils.EngineError:
+                continue
+            if show.get('image_thumb') or show.get('image'):
+                urls.append(show.get('image_thumb') or show['image'])
+
+        self._prefetcher.update(urls)
+        return False
 
     def _on_show_selected(self, page, selected_show):
         self._update_widgets_for_selected_show()
@@ -512,17 +597,7 @@ class MainView(Gtk.Box):
 
         # Image
         if show.get('image_thumb') or show.get('image'):
-            utils.make_dir(utils.to_cache_path())
-            filename = utils.to_cache_path(
-                "%s_%s_%s.jpg" % (self._engine.api_info['shortname'],
-                                  self._engine.api_info['mediatype'],
-                                  show['id']))
-
-            if os.path.isfile(filename):
-                self.image_box.set_image(filename)
-            else:
-                self.image_box.set_image_remote(show.get('image_thumb') or show['image'],
-                                                filename)
+            self.image_box.set_image_remote(show.get('image_thumb') or show['image'])
         else:
             self.image_box.set_text('No Image')
 
@@ -569,6 +644,7 @@ class NotebookPage(Gtk.ScrolledWindow):
                         (int, object)),
         'column-toggled': (GObject.SignalFlags.RUN_FIRST, None,
                            (str, bool)),
+        'view-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
     }
 
     def __init__(self, engine, page_num, status, config, _list=None, title=None):
@@ -592,36 +668,66 @@ class NotebookPage(Gtk.ScrolledWindow):
             config['colors'],
             config['visible_columns'],
             config['episodebar_style'])
-        self._show_tree_view.set_model(
-            Gtk.TreeModelSort(
-                model=ShowListFilter(
-                    status=self.status,
-                    child_model=self._list
-                )
-            )
-        )
-        self._title.set_text('%s (%d)' % (
-            self._title_text,
-            len(self._show_tree_view.props.model)
-        ))
+        # The model is only made once the page is shown, see attach_model()
+        self._model = None
+        self._sort_column_id = None
+        self._view_detached = False
+        self.update_title()
+
         self._show_tree_view.get_selection().connect(
             "changed", self._on_selection_changed)
         self._show_tree_view.connect("row-activated", self._on_row_activated)
         self._show_tree_view.connect("column-toggled", self._on_column_toggled)
         self._show_tree_view.connect(
             "button-press-event", self._on_show_context_menu)
-        self._show_tree_view.get_model().connect("row-inserted", self._update_title)
-        self._show_tree_view.get_model().connect("row-deleted", self._update_title)
+        self.get_vadjustment().connect("value-changed", self._on_view_changed)
+        self.get_vadjustment().connect("changed", self._on_view_changed)
 
         self.add(self._show_tree_view)
 
     def set_column_visible(self, column_name, visible):
         self._show_tree_view.cols[column_name].set_visible(visible)
 
-    def _update_title(self, model, *args):
+    def attach_model(self):
+        """Makes the filtered and sorted model of the page, if needed."""
+        if self._model is None:
+            self._model = Gtk.TreeModelSort(
+                model=ShowListFilter(
+                    status=self.status,
+                    child_model=self._list
+                )
+            )
+            if self._sort_column_id is not None:
+                self._model.set_sort_column_id(*self._sort_column_id)
+            self._view_detached = False
+            self._show_tree_view.set_model(self._model)
+
+    def detach_model(self):
+        """Drops the model, so changes to the list don't go through it."""
+        if self._model is not None:
+            # Keep the column the user sorted by
+            (column_id, order) = self._model.get_sort_column_id()
+            if column_id is not None:
+                self._sort_column_id = (column_id, order)
+        self._model = None
+        self._view_detached = False
+        self._show_tree_view.set_model(None)
+
+    def detach_view(self):
+        """Detaches the view while a batch of rows is inserted."""
+        if self._model is not None and not self._view_detached:
+            self._view_detached = True
+            self._show_tree_view.set_model(None)
+
+    def attach_view(self):
+        if self._view_detached:
+            self._view_detached = False
+            self._show_tree_view.set_model(self._model)
+
+    def update_title(self):
         self._title.set_text('%s (%d)' % (
             self._title_text,
-            len(model)
+            self._list.count(self._status)
         ))
 
     @property
@@ -648,6 +754,29 @@ class NotebookPage(Gtk.ScrolledWindow):
     def show_tree_view(self):
         return self._show_tree_view
 
+    def visible_shows(self):
+        """
+        Returns the IDs of the visible shows, then of as many shows
+        right below and above them.
+        """
+        visible = self._show_tree_view.get_visible_range()
+        if not visible:
+            return []
+
+        model = self._show_tree_view.get_model()
+        rows = len(model)
+        first = visible[0].get_indices()[0]
+        last = visible[1].get_indices()[0]
+        margin = last - first + 1
+        order = itertools.chain(range(first, last + 1),
+                                range(last + 1, min(rows, last + 1 + margin)),
+                                range(first - 1, max(-1, first - 1 - margin), -1))
+
+        return [model[row][0] for row in order]
+
+    def _on_view_changed(self, adjustment):
+        self.emit('view-changed')
+
     def _on_selection_changed(self, selection):
         (tree_model, tree_iter) = selection.get_selected()
         if not tree_iter:
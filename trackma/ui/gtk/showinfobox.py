@@ -62,14 +62,7 @@ class ShowInfoBox(Gtk.Box):
 
         # Load image
         if show.get('image'):
-            imagefile = utils.to_cache_path("%s_%s_f_%s.jpg" % (self._engine.api_info['shortname'],
-                                                                self._engine.api_info['mediatype'],
-                                                                show['id']))
-
-            if os.path.isfile(imagefile):
-                self.image_box.set_image(imagefile)
-            else:
-                self.image_box.set_image_remote(show['image'], imagefile)
+            self.image_box.set_image_remote(show['image'])
         else:
             self.image_box.set_text('No Image')
 
@@ -14,6 +14,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import collections
+
 from gi.repository import Gtk, Gdk, Pango, GObject
 from trackma import utils
 
@@ -43,6 +45,9 @@ class ShowListStore(Gtk.ListStore):
         super().__init__(*self.__class__.__columns__())
         self.colors = colors
         self.decimals = decimals
+        # Shows per status (as stored in the my-status column), so pages
+        # can tell their size without a filter
+        self.status_counts = collections.Counter()
         self.set_sort_column_id(1, Gtk.SortType.ASCENDING)
 
     @staticmethod
@@ -122,6 +127,22 @@ class ShowListStore(Gtk.ListStore):
                show['status']
                ]
         super().append(row)
+        self.status_counts[str(show['my_status'])] += 1
+
+    def append_shows(self, shows, altnames, library):
+        """Appends a batch of shows."""
+        for show in shows:
+            self.append(show, altnames.get(show['id']), library.get(show['id']))
+
+    def clear(self):
+        super().clear()
+        self.status_counts.clear()
+
+    def count(self, status=None):
+        """Number of shows in **status**, or of all of them."""
+        if status is None:
+            return len(self)
+        return self.status_counts[str(status)]
 
     def update_or_append(self, show):
         for row in self:
@@ -146,6 +167,9 @@ class ShowListStore(Gtk.ListStore):
             row[3] = show['my_score']
             row[5] = score_str
             row[9] = self._get_color(show, row[8])
+            if row[15] != str(show['my_status']):
+                self.status_counts[row[15]] -= 1
+                self.status_counts[str(show['my_status'])] += 1
             row[15] = show['my_status']
         return
 
@@ -165,6 +189,7 @@ class ShowListStore(Gtk.ListStore):
     def remove(self, show=None, id=None):
         for row in self:
             if int(row[0]) == (show['id'] if show is not None else id):
+                self.status_counts[row[15]] -= 1
                 Gtk.ListStore.remove(self, row.iter)
                 return
 
@@ -356,6 +381,9 @@ class ShowTreeView(Gtk.TreeView):
 
     def select(self, show):
         """Select specified row or first if not found"""
+        if self.get_model() is None:
+            return
+
         for row in self.get_model():
             if int(row[0]) == show['id']:
                 selection = self.get_selection()
@@ -18,6 +18,7 @@
 from trackma.ui.qt.mainwindow import MainWindow
 from trackma import messenger
 from trackma import utils
+import importlib.util
 import sys
 import os
 
@@ -61,16 +62,12 @@ if 'PYQT5' not in os.environ:
         sys.exit(-1)
 
 
-try:
-    from PIL import Image
+# The image cache scales the images with PIL
+if importlib.util.find_spec('PIL'):
     os.environ['imaging_available'] = "1"
-except ImportError:
-    try:
-        import Image
-        os.environ['imaging_available'] = "1"
-    except ImportError:
-        print("Warning: PIL or Pillow isn't available. "
-              "Preview images will be disabled.")
+else:
+    print("Warning: PIL or Pillow isn't available. "
+          "Preview images will be disabled.")
 
 
 def main():
@@ -15,6 +15,7 @@
 #
 
 from trackma import utils
+from trackma import imagecache
 from trackma import messenger
 from trackma.accounts import AccountManager
 from trackma.ui.qt.util import getIcon, FilterBar
@@ -43,6 +44,7 @@ from PyQt5 import QtCore, QtGui
 import base64
 import subprocess
 import datetime
+import itertools
 import os
 import sys
 pyqt_version = 5
@@ -125,6 +127,12 @@ class MainWindow(QMainWindow):
         self.image_timer.setSingleShot(True)
         self.image_timer.timeout.connect(self.s_download_image)
 
+        self.prefetcher = imagecache.Prefetcher((100, 140))
+        self.prefetch_timer = QtCore.QTimer()
+        self.prefetch_timer.setInterval(100)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.s_prefetch_images)
+
         self.busy_timer = QtCore.QTimer()
         self.busy_timer.setInterval(100)
         self.busy_timer.setSingleShot(True)
@@ -302,6 +310,14 @@ class MainWindow(QMainWindow):
         self.view.model().sourceModel().progressChanged.connect(self.s_set_episode)
         self.view.model().sourceModel().scoreChanged.connect(self.s_set_score)
 
+        # Prefetch the images of the rows in view once it settles
+        self.view.verticalScrollBar().valueChanged.connect(self.s_queue_prefetch)
+        self.view.verticalScrollBar().rangeChanged.connect(self.s_queue_prefetch)
+        self.view.model().layoutChanged.connect(self.s_queue_prefetch)
+        self.view.model().modelReset.connect(self.s_queue_prefetch)
+        self.view.model().rowsInserted.connect(self.s_queue_prefetch)
+        self.view.model().rowsRemoved.connect(self.s_queue_prefetch)
+
         # Context menu for right click on list header
         self.menu_columns = QMenu()
         self.column_keys = {'id': 0,
@@ -471,7 +487,8 @@ class MainWindow(QMainWindow):
         self.worker.raised_fatal.connect(self.fatal)
         self.worker.changed_show.connect(self.ws_changed_show)
         self.worker.changed_show_status.connect(self.ws_changed_show_status)
-        self.worker.changed_list.connect(self.ws_changed_list)
+        self.worker.added_show.connect(self.ws_added_show)
+        self.worker.deleted_show.connect(self.ws_deleted_show)
         self.worker.changed_queue.connect(self.ws_changed_queue)
         self.worker.tracker_state.connect(self.ws_tracker_state)
         self.worker.playing_show.connect(self.ws_changed_show)
@@ -850,12 +867,14 @@ class MainWindow(QMainWindow):
             if self.image_worker is not None:
                 self.image_worker.cancel()
 
-            utils.make_dir(utils.to_cache_path())
-            filename = utils.to_cache_path("%s_%s_%s.jpg" % (
-                self.api_info['shortname'], self.api_info['mediatype'], show['id']))
+            filename = imagecache.get_cache().cached(
+                show.get('image_thumb') or show['image'], (100, 140))
 
-            if os.path.isfile(filename):
+            if filename:
                 self.s_show_image(filename)
+            elif self.prefetcher.pending(show.get('image_thumb') or show['image']):
+                # Already on its way, just move it ahead
+                self.s_download_image(show)
             else:
                 if "imaging_available" in os.environ:
                     self.show_image.setText('Waiting...')
@@ -1029,17 +1048,50 @@ class MainWindow(QMainWindow):
         self.config['sort_index'] = index
         self.config['sort_order'] = order
 
-    def s_download_image(self):
-        show = self.worker.engine.get_show_info(self.selected_show_id)
+    def s_download_image(self, show=None):
+        if not show:
+            show = self.worker.engine.get_show_info(self.selected_show_id)
         self.show_image.setText('Downloading...')
-        filename = utils.to_cache_path("%s_%s_%s.jpg" % (
-            self.api_info['shortname'], self.api_info['mediatype'], show['id']))
 
         self.image_worker = ImageWorker(
-            show.get('image_thumb') or show['image'], filename, (100, 140))
+            show.get('image_thumb') or show['image'], (100, 140))
         self.image_worker.finished.connect(self.s_show_image)
         self.image_worker.start()
 
+    def s_queue_prefetch(self, *args):
+        # Not connected to start() directly, the signals' arguments
+        # would be taken as the interval
+        self.prefetch_timer.start()
+
+    def s_prefetch_images(self):
+        if "imaging_available" not in os.environ:
+            return
+
+        model = self.view.model()
+        showlist = model.sourceModel().showlist
+        rows = model.rowCount()
+        first = self.view.rowAt(0)
+        if not showlist or first == -1:
+            self.prefetcher.clear()
+            return
+
+        last = self.view.rowAt(self.view.viewport().height() - 1)
+        if last == -1:
+            last = rows - 1
+
+        # Visible rows first, then the ones right below and above
+        margin = last - first + 1
+        order = itertools.chain(range(first, last + 1),
+                                range(last + 1, min(rows, last + 1 + margin)),
+                                range(first - 1, max(-1, first - 1 - margin), -1))
+
+        urls = []
+        for row in order:
+            show = showlist[model.mapToSource(model.index(row, 0)).row()]
+            if show.get('image_thumb') or show.get('image'):
+                urls.append(show.get('image_thumb') or show['image'])
+        self.prefetcher.update(urls)
+
     def s_tab_changed(self, index):
         # Change the filter of the main view to the specified status
         status = self.notebook.tabData(index)
@@ -1349,10 +1401,23 @@ class MainWindow(QMainWindow):
         # Refresh filter
         self.s_filter_changed()
 
-    def ws_changed_list(self, show):
-        self._rebuild_view()
-        self._recalculate_counts()
-        self.s_filter_changed()
+    def ws_added_show(self, show):
+        # Only the new row is added, so the view keeps its selection and scroll
+        self.view.model().sourceModel().addShow(
+            show, self.worker.engine.altname(show['id']))
+
+        self.counts[show['my_status']] += 1
+        self.counts['!ALL'] += 1
+        self._update_counts()
+
+    def ws_deleted_show(self, show):
+        if show['id'] == self.selected_show_id:
+            self._select_show(None)
+        self.view.model().sourceModel().removeShow(show['id'])
+
+        self.counts[show['my_status']] -= 1
+        self.counts['!ALL'] -= 1
+        self._update_counts()
 
     def ws_changed_queue(self, queue):
         self._update_queue_counter(queue)
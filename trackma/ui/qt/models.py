@@ -47,14 +47,17 @@ class ShowListModel(QtCore.QAbstractTableModel):
         self.palette = palette
         self.playing = set()
         self.mediainfo = {}
+        self.search_keys = {}
 
         super().__init__(parent)
 
     def setDateFormat(self, date_format):
         self.date_format = date_format
+        self.search_keys.clear()
 
     def setMediaInfo(self, mediainfo):
         self.mediainfo = mediainfo
+        self.search_keys.clear()
 
     def _date(self, obj):
         if obj:
@@ -62,7 +65,7 @@ class ShowListModel(QtCore.QAbstractTableModel):
         else:
             return '-'
 
-    def _calculate_color(self, row, show):
+    def _calculate_color(self, show):
         color = None
 
         if show['id'] in self.playing:
@@ -79,20 +82,20 @@ class ShowListModel(QtCore.QAbstractTableModel):
             color = None
 
         if color:
-            self.colors[row] = QtGui.QBrush(getColor(self.palette[color]))
-        elif row in self.colors:
-            del self.colors[row]
+            self.colors[show['id']] = QtGui.QBrush(getColor(self.palette[color]))
+        else:
+            self.colors.pop(show['id'], None)
 
-    def _calculate_next_ep(self, row, show):
+    def _calculate_next_ep(self, show):
         if self.mediainfo.get('date_next_ep'):
             if 'next_ep_time' in show:
                 delta = show['next_ep_time'] - datetime.datetime.utcnow()
-                self.next_ep[row] = "%i days, %02d hrs." % (
+                self.next_ep[show['id']] = "%i days, %02d hrs." % (
                     delta.days, delta.seconds/3600)
-            elif row in self.next_ep:
-                del self.next_ep[row]
+            else:
+                self.next_ep.pop(show['id'], None)
 
-    def _calculate_eps(self, row, show):
+    def _calculate_eps(self, show):
         aired_eps = utils.estimate_aired_episodes(show)
         library_eps = self.library.get(show['id'])
 
@@ -100,9 +103,18 @@ class ShowListModel(QtCore.QAbstractTableModel):
             library_eps = library_eps.keys()
 
         if aired_eps or library_eps:
-            self.eps[row] = (aired_eps, library_eps)
-        elif row in self.eps:
-            del self.eps[row]
+            self.eps[show['id']] = (aired_eps, library_eps)
+        else:
+            self.eps.pop(show['id'], None)
+
+    def _calculate(self, show):
+        # The derived data is kept by show ID, so it stays valid when
+        # rows are inserted or removed
+        self._calculate_color(show)
+
+        if self.mediainfo.get('can_play'):
+            self._calculate_next_ep(show)
+            self._calculate_eps(show)
 
     def setShowList(self, showlist, altnames, library):
         self.beginResetModel()
@@ -115,19 +127,16 @@ class ShowListModel(QtCore.QAbstractTableModel):
         self.colors = {}
         self.next_ep = {}
         self.eps = {}
+        self.search_keys = {}
 
         for row, show in enumerate(self.showlist):
             self.id_map[show['id']] = row
-            self._calculate_color(row, show)
-
-            if self.mediainfo.get('can_play'):
-                self._calculate_next_ep(row, show)
-                self._calculate_eps(row, show)
+            self._calculate(show)
 
         self.endResetModel()
 
     def update(self, showid, is_playing=None):
-        # Recalculate color and emit the changed signal
+        # Recalculate the row and emit the changed signal
         row = self.id_map[showid]
         show = self.showlist[row]
 
@@ -137,10 +146,75 @@ class ShowListModel(QtCore.QAbstractTableModel):
             else:
                 self.playing.discard(showid)
 
-        self._calculate_color(row, show)
+        self._calculate(show)
+        self.search_keys.pop(showid, None)
         self.dataChanged.emit(self.index(
             row, 0), self.index(row, len(self.columns)-1))
 
+    def addShow(self, show, altname=None):
+        if show['id'] in self.id_map:
+            self.update(show['id'])
+            return
+
+        if self.showlist is None:
+            # Not built yet; it will come with the whole list
+            return
+
+        row = len(self.showlist)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+
+        self.showlist.append(show)
+        self.id_map[show['id']] = row
+        if altname:
+            self.altnames[show['id']] = altname
+        self._calculate(show)
+
+        self.endInsertRows()
+
+    def removeShow(self, showid):
+        row = self.id_map.get(showid)
+        if row is None:
+            return
+
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+
+        del self.showlist[row]
+        del self.id_map[showid]
+        for next_row in range(row, len(self.showlist)):
+            self.id_map[self.showlist[next_row]['id']] = next_row
+
+        self.colors.pop(showid, None)
+        self.next_ep.pop(showid, None)
+        self.eps.pop(showid, None)
+        self.search_keys.pop(showid, None)
+        self.playing.discard(showid)
+
+        self.endRemoveRows()
+
+    def searchKeys(self, row):
+        """
+        Returns the text of every column of **row** as the filter sees
+        it: a tuple with one string per column, the text of all of them
+        joined by newlines, and the same in lower case.
+
+        They're only made again after the row changes.
+        """
+        show = self.showlist[row]
+        keys = self.search_keys.get(show['id'])
+        if keys is None:
+            columns = []
+            text = []
+            for column in range(len(self.columns)):
+                value = self.data(self.index(row, column), QtCore.Qt.DisplayRole)
+                columns.append(str(value))
+                # Like QSortFilterProxyModel, only match plain values
+                if isinstance(value, (str, int, float)):
+                    text.append(columns[-1])
+
+            text = '\n'.join(text)
+            keys = self.search_keys[show['id']] = (tuple(columns), text, text.lower())
+        return keys
+
     def rowCount(self, parent):
         if self.showlist:
             return len(self.showlist)
@@ -189,12 +263,13 @@ class ShowListModel(QtCore.QAbstractTableModel):
                     total = (int(show['my_progress']/12)+1) * \
                         12  # Round up to the next cour
 
-                if row in self.eps:
-                    return (show['my_progress'], total, self.eps[row][0], self.eps[row][1])
+                if show['id'] in self.eps:
+                    (aired_eps, library_eps) = self.eps[show['id']]
+                    return (show['my_progress'], total, aired_eps, library_eps)
                 else:
                     return (show['my_progress'], total, None, None)
             elif column == ShowListModel.COL_NEXT_EP:
-                return self.next_ep.get(row, '-')
+                return self.next_ep.get(show['id'], '-')
             elif column == ShowListModel.COL_START_DATE:
                 return self._date(show['start_date'])
             elif column == ShowListModel.COL_END_DATE:
@@ -208,7 +283,7 @@ class ShowListModel(QtCore.QAbstractTableModel):
             elif column == ShowListModel.COL_MY_STATUS:
                 return self.mediainfo['statuses_dict'][show['my_status']]
         elif role == QtCore.Qt.BackgroundRole:
-            return self.colors.get(row)
+            return self.colors.get(show['id'])
         elif role == QtCore.Qt.DecorationRole:
             if column == ShowListModel.COL_TITLE and show['id'] in self.playing:
                 return getIcon('media-playback-start')
@@ -218,8 +293,8 @@ class ShowListModel(QtCore.QAbstractTableModel):
         elif role == QtCore.Qt.ToolTipRole:
             if column == ShowListModel.COL_PERCENT:
                 tooltip = "Watched: %d<br>" % show['my_progress']
-                if self.eps.get(row):
-                    (aired_eps, library_eps) = self.eps.get(row)
+                if self.eps.get(show['id']):
+                    (aired_eps, library_eps) = self.eps.get(show['id'])
                     if aired_eps:
                         tooltip += "Aired (estimated): %d<br>" % aired_eps
                     if library_eps:
@@ -328,18 +403,16 @@ class AddListModel(QtCore.QAbstractListModel):
         self.results = new_results
 
         self.thumbs.clear()
+        self.pool.cancelAll()
 
         if self.results:
             for row, item in enumerate(self.results):
                 if item.get('image'):
-                    filename = utils.to_cache_path("%s_%s_f_%s.jpg" % (
-                        self.api_info['shortname'], self.api_info['mediatype'], item['id']))
-
-                    if self.pool.exists(filename):
-                        self.thumbs[row] = self.pool.getThumb(filename).scaled(
+                    if self.pool.exists(item['image']):
+                        self.thumbs[row] = self.pool.getThumb(item['image']).scaled(
                             100, 140, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
                     else:
-                        self.pool.queueDownload(row, item['image'], filename)
+                        self.pool.queueDownload(row, item['image'])
 
         self.endResetModel()
 
@@ -380,8 +453,16 @@ class AddListProxy(QtCore.QSortFilterProxyModel):
 
 
 class ShowListProxy(QtCore.QSortFilterProxyModel):
+    """
+    Filters the show list by status, by column (filter_columns) and by
+    a fixed string matched against any column.
+
+    Rows are matched against the search keys cached by the source
+    model, so typing in the filter bar doesn't format every cell again.
+    """
     filter_columns = None
     filter_status = None
+    filter_string = ''
 
     def setFilterStatus(self, status):
         self.filter_status = status
@@ -394,15 +475,28 @@ class ShowListProxy(QtCore.QSortFilterProxyModel):
         self.filter_columns = columns
         self.invalidateFilter()
 
+    def setFilterFixedString(self, string):
+        self.filter_string = string
+        super().setFilterFixedString(string)
+
     def filterAcceptsRow(self, source_row, source_parent):
-        if self.filter_status is not None and self.sourceModel().showlist[source_row]['my_status'] != self.filter_status:
+        model = self.sourceModel()
+        if self.filter_status is not None and model.showlist[source_row]['my_status'] != self.filter_status:
             return False
 
+        if not (self.filter_columns or self.filter_string):
+            return True
+
+        (columns, text, text_lower) = model.searchKeys(source_row)
+
         if self.filter_columns:
-            for col in range(self.sourceModel().columnCount(source_parent)):
-                index = self.sourceModel().index(source_row, col)
-                if (col in self.filter_columns and
-                        self.filter_columns[col] not in str(self.sourceModel().data(index, QtCore.Qt.DisplayRole))):
+            for (col, expression) in self.filter_columns.items():
+                if expression not in columns[col]:
                     return False
 
-        return super(ShowListProxy, self).filterAcceptsRow(source_row, source_parent)
+        if self.filter_string:
+            if self.filterCaseSensitivity() == QtCore.Qt.CaseSensitive:
+                return self.filter_string in text
+            return self.filter_string.lower() in text_lower
+
+        return True
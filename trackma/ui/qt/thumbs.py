@@ -1,10 +1,9 @@
-import queue
-import os
+from PyQt5 import QtCore, QtGui
 
-from PyQt5 import QtCore, QtGui, QtNetwork
+from trackma import imagecache
+from trackma import utils
 
-ATTRIB_FILE = 1000
-ATTRIB_ID = 1001
+THUMB_SIZE = (200, 280)
 
 
 class ThumbManager(QtCore.QObject):
@@ -13,55 +12,54 @@ class ThumbManager(QtCore.QObject):
     getThumb gets a thumbnail from the cache, and
     queueDownload starts a remote download.
 
+    Downloads go through the shared image cache, so a thumbnail
+    already being fetched for another view isn't fetched twice.
+
     When a remote download is finished, the itemFinished signal
     is emitted, along with the ID and a QImage object.
     """
 
     itemFinished = QtCore.pyqtSignal(str, QtGui.QImage)
+    _fetched = QtCore.pyqtSignal(str, str)
 
     def __init__(self, parent=None):
-        self.manager = QtNetwork.QNetworkAccessManager()
-        self.queue = queue.Queue()
+        self.cache = imagecache.get_cache()
         self.downloads = {}
 
         super().__init__(parent)
-
-    def exists(self, filename):
-        return os.path.isfile(filename)
-
-    def getThumb(self, filename):
-        return QtGui.QImage(filename)
-
-    def queueDownload(self, iid, url, filename):
-        self.queue.put((iid, url, filename))
-        self.processNext()
-
-    def processNext(self):
-        if not self.queue.empty() and len(self.downloads) < 3:
-            (iid, url, filename) = self.queue.get()
-
-            request = QtNetwork.QNetworkRequest(QtCore.QUrl(url))
-            request.setAttribute(
-                QtNetwork.QNetworkRequest.Attribute(ATTRIB_FILE), filename)
-            request.setAttribute(
-                QtNetwork.QNetworkRequest.Attribute(ATTRIB_ID), iid)
-
-            reply = self.manager.get(request)
-            self.downloads[filename] = reply
-
-            reply.finished.connect(self.onItemFinished)
-
-    def onItemFinished(self):
-        reply = self.sender()
-        iid = str(reply.request().attribute(ATTRIB_ID))
-        fname = reply.request().attribute(ATTRIB_FILE)
-
-        data = reply.readAll()
-        image = QtGui.QImage.fromData(data)
+        self._fetched.connect(self.onItemFinished)
+
+    def exists(self, url):
+        return self.cache.cached(url, THUMB_SIZE) is not None
+
+    def getThumb(self, url):
+        return QtGui.QImage(self.cache.cached(url, THUMB_SIZE))
+
+    def queueDownload(self, iid, url):
+        future = self.cache.fetch(url, THUMB_SIZE)
+        self.downloads[str(iid)] = future
+        future.add_done_callback(lambda f: self._done(str(iid), f))
+
+    def cancelAll(self):
+        for future in self.downloads.values():
+            future.cancel()
+        self.downloads.clear()
+
+    def _done(self, iid, future):
+        # Called from a cache thread; the signal is queued to the GUI thread
+        if future.cancelled():
+            return
+        try:
+            self._fetched.emit(iid, future.result())
+        except (utils.TrackmaError, OSError) as e:
+            print("Warning: Error getting image ({})".format(e))
+
+    def onItemFinished(self, iid, fname):
+        if self.downloads.pop(iid, None) is None:
+            # Cancelled in the meantime
+            return
+
+        image = QtGui.QImage(fname)
         thumb = image.scaled(
-            200, 280, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-        thumb.save(fname)
-
-        self.downloads.pop(fname)
+            THUMB_SIZE[0], THUMB_SIZE[1], QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
         self.itemFinished.emit(iid, thumb)
-        self.processNext()
@@ -14,7 +14,6 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import os
 import datetime
 
 from PyQt5 import QtCore, QtGui
@@ -28,7 +27,7 @@ from trackma.ui.qt.models import AddTableModel, AddListModel, AddListProxy, Show
 from trackma.ui.qt.workers import ImageWorker
 from trackma.ui.qt.util import getColor
 
-from trackma import utils
+from trackma import imagecache
 
 pyqt_version = 5
 
@@ -97,19 +96,16 @@ class DetailsWidget(QWidget):
         # Load show info
         self.show_info.setText('Wait...')
         self.worker_call('get_show_details', self.r_details_loaded, show)
-        api_info = self.worker.engine.api_info
 
         # Load show image
         if show.get('image'):
-            filename = utils.to_cache_path("%s_%s_f_%s.jpg" % (
-                api_info['shortname'], api_info['mediatype'], show['id']))
+            filename = imagecache.get_cache().cached(show['image'], (200, 280))
 
-            if os.path.isfile(filename):
+            if filename:
                 self.s_show_image(filename)
             else:
                 self.show_image.setText('Downloading...')
-                self.image_worker = ImageWorker(
-                    show['image'], filename, (200, 280))
+                self.image_worker = ImageWorker(show['image'], (200, 280))
                 self.image_worker.finished.connect(self.s_show_image)
                 self.image_worker.start()
         else:
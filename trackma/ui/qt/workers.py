@@ -14,67 +14,49 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import os
-
-from io import BytesIO
-import urllib.request
-
 from PyQt5 import QtCore
 
-try:
-    from PIL import Image
-except ImportError:
-    import Image
-
 from trackma.engine import Engine
+from trackma import imagecache
 from trackma import utils
 
 
-class ImageWorker(QtCore.QThread):
+class ImageWorker(QtCore.QObject):
     """
-    Image thread
+    Image worker
 
-    Downloads an image and shrinks it if necessary.
+    Gets an image through the shared image cache, shrunk to **size**
+    if given, and emits finished with its filename.
 
     """
     cancelled = False
     finished = QtCore.pyqtSignal(str)
 
-    def __init__(self, remote, local, size=None):
+    def __init__(self, remote, size=None):
         self.remote = remote
-        self.local = local
         self.size = size
+        self.future = None
         super(ImageWorker, self).__init__()
 
-    def __del__(self):
-        self.wait()
-
-    def run(self):
+    def start(self):
         self.cancelled = False
+        self.future = imagecache.get_cache().fetch(self.remote, self.size)
+        self.future.add_done_callback(self._done)
 
-        req = urllib.request.Request(self.remote)
-        req.add_header("User-agent", "TrackmaImage/{}".format(utils.VERSION))
-        try:
-            img_file = BytesIO(urllib.request.urlopen(req).read())
-            if self.size:
-                if "imaging_available" in os.environ:
-                    im = Image.open(img_file)
-                    im.thumbnail((self.size[0], self.size[1]), Image.ANTIALIAS)
-                    im.convert("RGB").save(self.local)
-            else:
-                with open(self.local, 'wb') as f:
-                    f.write(img_file.read())
-        except urllib.error.URLError as e:
-            print("Warning: Error getting image ({})".format(e))
-            return
-
-        if self.cancelled:
+    def _done(self, future):
+        # Called from a cache thread; the signal is queued to the GUI thread
+        if self.cancelled or future.cancelled():
             return
 
-        self.finished.emit(self.local)
+        try:
+            self.finished.emit(future.result())
+        except (utils.TrackmaError, OSError) as e:
+            print("Warning: Error getting image ({})".format(e))
 
     def cancel(self):
         self.cancelled = True
+        if self.future:
+            self.future.cancel()
 
 
 class EngineWorker(QtCore.QThread):
@@ -96,7 +78,8 @@ class EngineWorker(QtCore.QThread):
     # Event handler signals
     changed_show = QtCore.pyqtSignal(dict)
     changed_show_status = QtCore.pyqtSignal(dict, object)
-    changed_list = QtCore.pyqtSignal(dict)
+    added_show = QtCore.pyqtSignal(dict)
+    deleted_show = QtCore.pyqtSignal(dict)
     changed_queue = QtCore.pyqtSignal(int)
     tracker_state = QtCore.pyqtSignal(dict)
     playing_show = QtCore.pyqtSignal(dict, bool, int)
@@ -123,8 +106,11 @@ class EngineWorker(QtCore.QThread):
     def _changed_show_status(self, show, old_status=None):
         self.changed_show_status.emit(show, old_status)
 
-    def _changed_list(self, show):
-        self.changed_list.emit(show)
+    def _added_show(self, show):
+        self.added_show.emit(show)
+
+    def _deleted_show(self, show):
+        self.deleted_show.emit(show)
 
     def _changed_queue(self, queue):
         self.changed_queue.emit(len(queue))
@@ -149,8 +135,8 @@ class EngineWorker(QtCore.QThread):
         self.engine.connect_signal('tags_changed', self._changed_show)
         self.engine.connect_signal('status_changed', self._changed_show_status)
         self.engine.connect_signal('playing', self._playing_show)
-        self.engine.connect_signal('show_added', self._changed_list)
-        self.engine.connect_signal('show_deleted', self._changed_list)
+        self.engine.connect_signal('show_added', self._added_show)
+        self.engine.connect_signal('show_deleted', self._deleted_show)
         self.engine.connect_signal('show_synced', self._changed_show)
         self.engine.connect_signal('queue_changed', self._changed_queue)
         self.engine.connect_signal(
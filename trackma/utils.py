@@ -15,7 +15,6 @@
 #
 
 import os
-import subprocess
 import sys
 import re
 import time
@@ -23,7 +22,6 @@ import shutil
 import copy
 import datetime
 import json
-import difflib
 import pickle
 import uuid
 
@@ -215,19 +213,89 @@ def try_files(filenames):
             return filename
 
 
-def sync_file(fname, sync_url):
+def _sync_info_path(fname):
+    return fname + '.sync'
+
+
+def _load_sync_info(fname):
+    try:
+        with open(_sync_info_path(fname), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_sync_info(fname, info):
+    tmpname = _sync_info_path(fname) + '.tmp'
+    with open(tmpname, 'w') as f:
+        json.dump(info, f)
+    os.replace(tmpname, _sync_info_path(fname))
+
+
+def sync_outdated(fname, max_age):
+    """
+    Returns True if **fname** hasn't been synced (or checked against
+    the server) in the last **max_age** seconds.
+    """
+    if not file_exists(fname):
+        return True
+
+    checked = _load_sync_info(fname).get('checked')
+    if checked is None:
+        checked = os.path.getmtime(fname)
+
+    return checked < time.time() - max_age
+
+
+def sync_file(fname, sync_url, timeout=30):
+    """
+    Downloads **sync_url** into **fname** if it changed since the last sync.
+
+    The ETag and Last-Modified headers are kept in a sidecar file and
+    sent back as a conditional request; if the server answers 304 the
+    file isn't touched at all, so anything cached from it stays valid.
+    Returns True only if new contents were written.
+    """
     if not sync_url:
         return False
 
-    import urllib
+    import urllib.request
+    import urllib.error
     import socket
 
+    info = _load_sync_info(fname)
+    headers = {}
+    if file_exists(fname) and info.get('url') == sync_url:
+        if info.get('etag'):
+            headers['If-None-Match'] = info['etag']
+        if info.get('last_modified'):
+            headers['If-Modified-Since'] = info['last_modified']
+
+    tmpname = fname + '.tmp'
+    request = urllib.request.Request(sync_url, headers=headers)
     try:
-        with urllib.request.urlopen(sync_url) as r, open(fname, 'wb') as f:
+        with urllib.request.urlopen(request, timeout=timeout) as r, open(tmpname, 'wb') as f:
             shutil.copyfileobj(r, f)
-    except (socket.timeout, urllib.error.URLError):
+            response_headers = r.headers
+        os.replace(tmpname, fname)
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            return False
+        info['checked'] = time.time()
+        _save_sync_info(fname, info)
         return False
-
+    except (socket.timeout, urllib.error.URLError, OSError):
+        return False
+    finally:
+        if file_exists(tmpname):
+            os.remove(tmpname)
+
+    _save_sync_info(fname, {
+        'url': sync_url,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified'),
+        'checked': time.time(),
+    })
     return True
 
 
@@ -294,8 +362,15 @@ def guess_show(show_title, tracker_list):
         if showid in showlist:
             return showlist[showid]
 
+    # An exact title match needs no fuzzy search, if the list is indexed
+    if hasattr(tracker_list, 'find_title'):
+        show = tracker_list.find_title(show_title)
+        if show:
+            return show
+
     # Use difflib to see if the show title is similar to
     # one we have in the list
+    import difflib
     highest_ratio = (None, 0)
     matcher = difflib.SequenceMatcher()
     matcher.set_seq1(show_title.lower())
@@ -315,6 +390,15 @@ def guess_show(show_title, tracker_list):
         return playing_show
 
 
+def _redirection_index(redirections):
+    if not hasattr(redirections, 'lookup'):
+        # Plain relations dictionary, index it
+        from trackma.extras.redirections import RedirectionIndex
+        redirections = RedirectionIndex(redirections)
+
+    return redirections
+
+
 def redirect_show(show_tuple, redirections, tracker_list):
     """ Use a redirection dictionary and return the new show ID and episode acordingly """
     if not redirections:
@@ -322,19 +406,31 @@ def redirect_show(show_tuple, redirections, tracker_list):
 
     (show, ep) = show_tuple
     showlist = tracker_list[0]
+    redirections = _redirection_index(redirections)
 
-    if show['id'] in redirections:
-        for redirection in redirections[show['id']]:
-            (src_eps, dst_id, dst_eps) = redirection
+    for (new_show_id, new_ep) in redirections.lookup(show['id'], ep):
+        if new_show_id in showlist:
+            return (showlist[new_show_id], new_ep)
 
-            if (src_eps[1] == -1 and ep >= src_eps[0]) or (ep in range(src_eps[0], src_eps[1] + 1)):
-                new_show_id = dst_id
-                new_ep = ep + (dst_eps[0] - src_eps[0])
+    return show_tuple
 
-                if new_show_id in showlist:
-                    return (showlist[new_show_id], new_ep)
 
-    return show_tuple
+def redirect_range(show, start, end, redirections, tracker_list):
+    """
+    Redirect an episode range, which may span across several shows.
+    Returns a list of (show, start, end) segments.
+    """
+    if not redirections:
+        return [(show, start, end)]
+
+    showlist = tracker_list[0]
+    redirections = _redirection_index(redirections)
+
+    # Like redirect_show, use the first destination that's in our list,
+    # otherwise keep the original show and numbering
+    return [(showlist[new_show_id] if new_show_id != show['id'] else show, new_start, new_end)
+            for (new_show_id, new_start, new_end) in redirections.lookup_range(
+                show['id'], start, end, accept=lambda showid: showid in showlist)]
 
 
 def spawn_process(arg_list):
@@ -365,6 +461,7 @@ def spawn_process(arg_list):
             sys.exit(1)
         os.execv(arg_list[0], arg_list)
     else:
+        import subprocess
         subprocess.Popen(
             arg_list, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
@@ -478,6 +575,7 @@ config_defaults = {
     'auto_status_change_if_scored': True,
     'auto_date_change': True,
     'tracker_type': "auto",
+    'tracker_extra_types': [],
     'plex_host': "localhost",
     'plex_port': "32400",
     'plex_obey_update_wait_s': False,
@@ -496,6 +594,10 @@ config_defaults = {
     'redirections_url': 'https://raw.githubusercontent.com/erengy/anime-relations/master/anime-relations.txt',
     'redirections_time': 1,
     'use_hooks': True,
+    'hooks_workers': 2,
+    'hooks_queue_size': 32,
+    'hooks_timeout': 10,
+    'hooks_slow_threshold': 1,
 }
 
 userconfig_defaults = {